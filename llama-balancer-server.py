@@ -1,17 +1,31 @@
 ﻿import os
+import bisect
+import hashlib
+import hmac
 import json
+import queue
+import random
+import socket
 import sys
 import threading
 import time
 # New imports for refactoring
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
 from dataclasses import dataclass, field
-from collections import defaultdict, deque
-from datetime import datetime, timedelta, timezone
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timezone
 from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Pattern
 import re
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 from flask import Flask, Response, jsonify, request, stream_with_context
+from werkzeug.serving import WSGIRequestHandler
 
 
 # ------------------------------
@@ -28,6 +42,9 @@ SERVER_CONFIGS: Dict[str, Dict[str, Any]] = {}
 # Regex patterns (maintaining definition order): (compiled_pattern, server_names, pattern_string)
 MODEL_PATTERN_LIST: List[Tuple[Pattern[str], List[str], str]] = []
 
+# Load-balancing strategy per pattern string
+MODEL_PATTERN_STRATEGIES: Dict[str, "SelectionStrategy"] = {}
+
 # Fallback is set to model-side base URL (addr:model-port)
 FALLBACK_BACKEND: Optional[str] = None
 
@@ -38,70 +55,133 @@ SERVER_LIST_JSON = os.getenv("SERVER_LIST_JSON", "server-list.json")
 
 
 
-def _apply_servers_config(servers: Dict[str, Dict[str, Any]]) -> None:
+def _build_servers_config(servers: Dict[str, Dict[str, Any]], errors: List[str]) -> Dict[str, Dict[str, Any]]:
     # servers: {name: {addr, health-port, model-port, request-max}}
-    global SERVER_CONFIGS
-    SERVER_CONFIGS = {}
+    server_configs: Dict[str, Dict[str, Any]] = {}
     for name, cfg in (servers or {}).items():
         if not isinstance(name, str) or not isinstance(cfg, dict):
+            errors.append(f"server {name!r}: definition must be an object")
             continue
         addr = cfg.get("addr")
         hport = cfg.get("health-port")
         mport = cfg.get("model-port")
         request_max = cfg.get("request-max")
+        health_timeout = cfg.get("health-timeout")
+        weight = cfg.get("weight")
         if not isinstance(addr, str) or not isinstance(hport, int) or not isinstance(mport, int):
+            errors.append(f"server {name!r}: addr, health-port and model-port are required")
             continue
         addr_s = addr.rstrip("/")
         config = {"addr": addr_s, "health-port": hport, "model-port": mport}
         if isinstance(request_max, int) and request_max > 0:
             config["request-max"] = request_max
-        SERVER_CONFIGS[name] = config
-
-
-def _apply_model_server_list(models: Dict[str, List[str]], fallback_server_name: Optional[str]) -> None:
-    # Apply new schema (models: {pattern: [server_names...]})
-    global MODEL_PATTERN_LIST, FALLBACK_BACKEND
+        if isinstance(health_timeout, (int, float)) and not isinstance(health_timeout, bool) and health_timeout > 0:
+            config["health-timeout"] = float(health_timeout)
+        if isinstance(weight, int) and not isinstance(weight, bool) and weight > 0:
+            config["weight"] = weight
+        server_configs[name] = config
+    return server_configs
+
+
+def _build_model_server_list(
+    models: Dict[str, Any],
+    server_configs: Dict[str, Dict[str, Any]],
+    default_strategy: Optional[str],
+    errors: List[str],
+) -> Tuple[List[Tuple[Pattern[str], List[str], str]], Dict[str, "SelectionStrategy"]]:
+    # New schema (models: {pattern: [server_names...]} or {pattern: {"servers": [...], "strategy": name}})
     pattern_list: List[Tuple[Pattern[str], List[str], str]] = []
-    for pattern_str, server_names in (models or {}).items():
+    strategies: Dict[str, SelectionStrategy] = {}
+    for pattern_str, spec in (models or {}).items():
+        strategy_name = default_strategy
+        server_names = spec
+        if isinstance(spec, dict):
+            server_names = spec.get("servers")
+            if isinstance(spec.get("strategy"), str):
+                strategy_name = spec["strategy"]
         if not isinstance(pattern_str, str) or not isinstance(server_names, list):
+            errors.append(f"model pattern {pattern_str!r}: expected a list of server names")
             continue
         # Only validate server names
         valid_names: List[str] = []
         for n in server_names:
-            if isinstance(n, str) and n in SERVER_CONFIGS:
+            if isinstance(n, str) and n in server_configs:
                 valid_names.append(n)
+            else:
+                errors.append(f"model pattern {pattern_str!r}: unknown server {n!r}")
         if not valid_names:
             continue
+        if strategy_name and strategy_name not in SELECTION_STRATEGIES:
+            errors.append(f"model pattern {pattern_str!r}: unknown strategy {strategy_name!r}")
         try:
             compiled = re.compile(pattern_str)
             pattern_list.append((compiled, valid_names, pattern_str))
-        except re.error:
+            strategies[pattern_str] = _create_selection_strategy(strategy_name)
+        except re.error as e:
             # Skip invalid regex patterns
-            pass
-    MODEL_PATTERN_LIST = pattern_list
+            errors.append(f"model pattern {pattern_str!r}: {e}")
+    return pattern_list, strategies
+
+
+def _parse_server_list(data: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """Validate server-list.json content and build everything a swap needs; nothing global is touched"""
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        return {}, ["top level must be an object"]
+    servers = data.get("servers")
+    models = data.get("models")
+    # backward compat fallback key; new key is fallback_server
+    fallback_server = data.get("fallback_server")
+    # Default load-balancing strategy for patterns that do not set their own
+    strategy = data.get("strategy")
+    if not (isinstance(servers, dict) and len(servers) > 0):
+        # Legacy schema: models without servers (kept for compatibility); nothing can be routed
+        servers = {}
+    server_configs = _build_servers_config(servers, errors)
+    pattern_list, strategies = _build_model_server_list(
+        models if isinstance(models, dict) else {},
+        server_configs,
+        strategy if isinstance(strategy, str) else None,
+        errors,
+    )
+    if isinstance(fallback_server, str) and fallback_server not in server_configs:
+        errors.append(f"fallback_server {fallback_server!r} is not a defined server")
+    return {
+        "server_configs": server_configs,
+        "pattern_list": pattern_list,
+        "strategies": strategies,
+        "fallback_server": fallback_server if isinstance(fallback_server, str) else None,
+    }, errors
+
+
+def _apply_server_list(parsed: Dict[str, Any]) -> None:
+    """Swap in a parsed config: registry first, so every route always names a resolvable server"""
+    global SERVER_CONFIGS, MODEL_PATTERN_LIST, MODEL_PATTERN_STRATEGIES, FALLBACK_BACKEND
+    server_configs = parsed["server_configs"]
+    SERVER_REGISTRY.rebuild(server_configs)
+    SERVER_CONFIGS = server_configs
+    MODEL_ROUTES.rebuild(parsed["pattern_list"], parsed["strategies"])
+    MODEL_PATTERN_LIST = parsed["pattern_list"]
+    MODEL_PATTERN_STRATEGIES = parsed["strategies"]
     # Resolve fallback from server name to model base URL
-    if isinstance(fallback_server_name, str) and fallback_server_name in SERVER_CONFIGS:
+    fallback_server_name = parsed["fallback_server"]
+    if isinstance(fallback_server_name, str) and fallback_server_name in server_configs:
         FALLBACK_BACKEND = _get_model_base_url(fallback_server_name)
     else:
         # When unspecified, use any (first model base URL)
         model_urls = _get_model_base_urls()
         FALLBACK_BACKEND = model_urls[0] if model_urls else None
 
+
 def _load_servers_from_json() -> None:
     try:
         with open(SERVER_LIST_JSON, "r", encoding="utf-8") as f:
             data = json.load(f)
-        servers = data.get("servers") if isinstance(data, dict) else None
-        models = data.get("models") if isinstance(data, dict) else None
-        # backward compat fallback key; new key is fallback_server
-        fallback_server = data.get("fallback_server") if isinstance(data, dict) else None
-
-        if isinstance(servers, dict) and len(servers) > 0:
-            _apply_servers_config(servers)
-            _apply_model_server_list(models if isinstance(models, dict) else {}, fallback_server if isinstance(fallback_server, str) else None)
-        elif isinstance(models, dict) and len(models) > 0:
-            # Legacy schema: case where models contains base URLs (kept for compatibility)
-            _apply_model_server_list(models, fallback_server if isinstance(fallback_server, str) else None)
+        parsed, errors = _parse_server_list(data)
+        for err in errors:
+            print(f"[WARN] {SERVER_LIST_JSON}: {err}", file=sys.stderr)
+        if parsed:
+            _apply_server_list(parsed)
     except FileNotFoundError:
         pass
     except Exception as e:
@@ -109,43 +189,21 @@ def _load_servers_from_json() -> None:
 
 def _get_health_base_url(server_name: str) -> Optional[str]:
     """Get health check base URL for specified server name"""
-    config = SERVER_CONFIGS.get(server_name)
-    if not config:
-        return None
-    addr = config.get("addr")
-    hport = config.get("health-port")
-    if not isinstance(addr, str) or not isinstance(hport, int):
-        return None
-    return f"{addr.rstrip('/')}:{hport}"
+    srv = SERVER_REGISTRY.get_server(server_name)
+    return srv.health_base if srv else None
 
 def _get_model_base_url(server_name: str) -> Optional[str]:
     """Get model base URL for specified server name"""
-    config = SERVER_CONFIGS.get(server_name)
-    if not config:
-        return None
-    addr = config.get("addr")
-    mport = config.get("model-port")
-    if not isinstance(addr, str) or not isinstance(mport, int):
-        return None
-    return f"{addr.rstrip('/')}:{mport}"
+    srv = SERVER_REGISTRY.get_server(server_name)
+    return srv.model_base if srv else None
 
 def _get_health_base_urls() -> List[str]:
-    """Dynamically get list of health check base URLs"""
-    urls = []
-    for server_name in SERVER_CONFIGS.keys():
-        url = _get_health_base_url(server_name)
-        if url:
-            urls.append(url)
-    return urls
+    """Get list of health check base URLs (precomputed at load)"""
+    return SERVER_REGISTRY.health_bases()
 
 def _get_model_base_urls() -> List[str]:
-    """Dynamically get list of model base URLs"""
-    urls = []
-    for server_name in SERVER_CONFIGS.keys():
-        url = _get_model_base_url(server_name)
-        if url:
-            urls.append(url)
-    return urls
+    """Get list of model base URLs (precomputed at load)"""
+    return SERVER_REGISTRY.model_bases()
 
 def _get_model_backends_for_pattern(pattern: str) -> List[str]:
     """Get list of server names corresponding to specified pattern string"""
@@ -155,35 +213,137 @@ def _get_model_backends_for_pattern(pattern: str) -> List[str]:
     return []
 
 def _get_model_backends_for_model(model: str) -> List[str]:
-    """Get list of server names corresponding to specified model name (regex match)"""
-    for compiled_pattern, server_names, _ in MODEL_PATTERN_LIST:
-        try:
-            if compiled_pattern.fullmatch(model):
-                return server_names
-        except Exception:
-            continue
-    return []
+    """Get list of server names corresponding to specified model name (regex match, memoized)"""
+    return MODEL_ROUTES.lookup(model)
+
+def _get_model_route_for_model(model: str) -> Optional["ModelRoute"]:
+    """Get matched pattern, server names and strategy for specified model name (memoized)"""
+    return MODEL_ROUTES.route(model)
 
 def _get_modelurl_by_health_base(health_base: str) -> Optional[str]:
     """Get model URL from health check base URL"""
-    for server_name in SERVER_CONFIGS.keys():
-        if _get_health_base_url(server_name) == health_base:
-            return _get_model_base_url(server_name)
-    return None
+    srv = SERVER_REGISTRY.server_by_health_base(health_base)
+    return srv.model_base if srv else None
+
+def _get_health_timeouts(health_base: str) -> Tuple[float, float]:
+    """Get (connect, read) timeouts for health checks; "health-timeout" caps both for that server"""
+    srv = SERVER_REGISTRY.server_by_health_base(health_base)
+    if srv and srv.health_timeout is not None:
+        limit = srv.health_timeout
+        return (min(CONNECT_TIMEOUT_SEC, limit), min(HEALTH_READ_TIMEOUT_SEC, limit))
+    return (CONNECT_TIMEOUT_SEC, HEALTH_READ_TIMEOUT_SEC)
 
 # Health polling intervals and windows
 SAMPLE_INTERVAL_SEC = 1.0
 WINDOW_SECONDS = 5
 STICKY_TTL_SECONDS = 60 * 3
+STICKY_MAX_ENTRIES = int(os.getenv("STICKY_MAX_ENTRIES", "50000"))
+
+# Conversation-prefix affinity routing (prompt-cache reuse); opt-in, sticky routing stays the fallback
+PREFIX_AFFINITY_ENABLED = os.getenv("PREFIX_AFFINITY", "0") == "1"
+PREFIX_AFFINITY_TTL_SECONDS = int(os.getenv("PREFIX_AFFINITY_TTL_SECONDS", str(60 * 10)))
+PREFIX_AFFINITY_MAX_ENTRIES = int(os.getenv("PREFIX_AFFINITY_MAX_ENTRIES", "100000"))
+
+# Model name -> servers memo size, and pattern count from which patterns are matched as one alternation (0 disables)
+MODEL_ROUTE_CACHE_SIZE = int(os.getenv("MODEL_ROUTE_CACHE_SIZE", "1024"))
+MODEL_PATTERN_COMBINE_MIN = int(os.getenv("MODEL_PATTERN_COMBINE_MIN", "32"))
+
+# Each backend is polled on its own schedule; interval is randomized by +-HEALTH_POLL_JITTER
+HEALTH_POLL_JITTER = 0.1
 
 # New constant for invalid status (timeout / unreachable)
 INVALID_STATUS_VAL = -1
 
+# Admission queue when every backend for a model is at request-max (0 wait disables queueing)
+ADMISSION_MAX_WAIT_SEC = float(os.getenv("ADMISSION_MAX_WAIT_SEC", "60"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_RETRY_AFTER_SEC = int(os.getenv("ADMISSION_RETRY_AFTER_SEC", "5"))
+
+# Access statistics window for /access-log-stats and the monitor
+ACCESS_LOG_RETENTION_HOURS = float(os.getenv("ACCESS_LOG_RETENTION_HOURS", "1"))
+
+# Durable request log (JSONL, one line per proxied request); empty path disables it
+REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH", os.path.join("logs", "requests.jsonl"))
+REQUEST_LOG_MAX_BYTES = int(os.getenv("REQUEST_LOG_MAX_BYTES", str(100 * 1024 * 1024)))
+REQUEST_LOG_KEEP_DAYS = int(os.getenv("REQUEST_LOG_KEEP_DAYS", "35"))
+REQUEST_LOG_QUEUE_SIZE = int(os.getenv("REQUEST_LOG_QUEUE_SIZE", "10000"))
+# Print each backend/instance selection to stdout (the request log records it either way)
+LOG_BACKEND_SELECTION = os.getenv("LOG_BACKEND_SELECTION", "0") == "1"
+
+# Config hot reload: server-list.json is checked for changes this often (0 disables the watcher)
+CONFIG_WATCH_INTERVAL_SEC = float(os.getenv("CONFIG_WATCH_INTERVAL_SEC", "2"))
+# POST /admin/reload requires "Authorization: Bearer <ADMIN_TOKEN>"; unset = loopback clients only
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Monitor state feed: retained deltas for catch-up, and coalescing window before pushing a batch
+STATE_FEED_HISTORY = int(os.getenv("STATE_FEED_HISTORY", "4096"))
+STATE_FEED_BATCH_SEC = 0.2
+STATE_FEED_KEEPALIVE_SEC = 15.0
+
+# Streaming telemetry: EWMA smoothing factor and histogram upper bounds (seconds)
+STREAM_TELEMETRY_EWMA_ALPHA = float(os.getenv("STREAM_TELEMETRY_EWMA_ALPHA", "0.2"))
+STREAM_TTFT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STREAM_GAP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
 # Requests timeouts
 CONNECT_TIMEOUT_SEC = 5
 UPSTREAM_CONNECT_TIMEOUT_SEC = 300
 HEALTH_READ_TIMEOUT_SEC = 2
 
+# Upstream connection pools (per backend base URL)
+UPSTREAM_POOL_MAXSIZE = int(os.getenv("UPSTREAM_POOL_MAXSIZE", "64"))
+# Keep below llama-server's keep-alive timeout (5s) so pooled sockets are not reused after the server closed them
+UPSTREAM_POOL_IDLE_TIMEOUT_SEC = float(os.getenv("UPSTREAM_POOL_IDLE_TIMEOUT_SEC", "4"))
+UPSTREAM_DNS_CACHE_TTL_SEC = float(os.getenv("UPSTREAM_DNS_CACHE_TTL_SEC", "300"))
+
+# Failover to the next candidate when the upstream connection fails (retries per request),
+# bounded overall to a share of recent traffic so a failing cluster does not amplify its load
+FAILOVER_MAX_RETRIES = int(os.getenv("FAILOVER_MAX_RETRIES", "2"))
+FAILOVER_RETRY_BUDGET_RATIO = float(os.getenv("FAILOVER_RETRY_BUDGET_RATIO", "0.2"))
+FAILOVER_RETRY_BUDGET_MIN_PER_SEC = 1.0
+FAILOVER_RETRY_BUDGET_BURST = 50.0
+
+# Hedged requests (opt-in): when a short call on HEDGE_PATHS is slower than the path's recent
+# p95, send a duplicate to a second backend serving the model and relay whichever answers first
+HEDGE_ENABLED = os.getenv("HEDGE_REQUESTS", "0") == "1"
+HEDGE_PATHS = tuple(
+    p.strip().rstrip("/")
+    for p in os.getenv("HEDGE_PATHS", "/v1/embeddings,/embeddings,/tokenize,/detokenize").split(",")
+    if p.strip()
+)
+HEDGE_BUDGET_PERCENT = float(os.getenv("HEDGE_BUDGET_PERCENT", "10"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "5"))
+HEDGE_SAMPLE_WINDOW = 256
+HEDGE_MIN_SAMPLES = 20
+HEDGE_BUDGET_BURST = 10.0
+HEDGE_MAX_WORKERS = 256
+
+# Exact-match response cache (opt-in) for deterministic chat and text completions (temperature 0 or a fixed seed)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESPONSE_CACHE_TTL_SEC = float(os.getenv("RESPONSE_CACHE_TTL_SEC", "3600"))
+# Optional second tier on disk (files are memory-mapped on read); empty keeps the cache in memory only
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "")
+RESPONSE_CACHE_DISK_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_DISK_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+
+# Single-flight coalescing (opt-in): identical deterministic completions that arrive while one
+# is in flight share its upstream response instead of taking their own slot and generation
+COALESCE_ENABLED = os.getenv("COALESCE_REQUESTS", "0") == "1"
+
+# Micro-batching (opt-in) of small /v1/embeddings calls: requests for the same target and parameters
+# arriving within the window are sent upstream as one call with the combined `input` list
+EMBED_BATCH_ENABLED = os.getenv("EMBED_BATCHING", "0") == "1"
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_BATCH_MAX_INPUTS = int(os.getenv("EMBED_BATCH_MAX_INPUTS", "64"))
+EMBED_BATCH_MAX_WORKERS = 32
+
+# Scatter-gather (opt-in): split large embedding/rerank inputs into shards sent in parallel to every
+# healthy backend serving the model with a free slot; results are reassembled in order
+SCATTER_ENABLED = os.getenv("SCATTER_GATHER", "0") == "1"
+SCATTER_MIN_INPUTS = int(os.getenv("SCATTER_MIN_INPUTS", "256"))
+SCATTER_MIN_SHARD_INPUTS = int(os.getenv("SCATTER_MIN_SHARD_INPUTS", "32"))
+SCATTER_MAX_WORKERS = 64
+
 # ------------------------------
 # Helper: interpret llmhealth text
 # ------------------------------
@@ -204,55 +364,306 @@ def _interpret_llmhealth_text(text: str) -> int:
     # Unknown values are considered busy
     return 1
 
+# ------------------------------
+# Model Route Index (memoized MODEL_PATTERN_LIST lookup)
+# ------------------------------
+
+
+class ModelRoute:
+    """Result of matching a model name: pattern, eligible server names and their strategy"""
+
+    __slots__ = ("pattern", "servers", "strategy")
+
+    def __init__(self, pattern: str, servers: List[str], strategy: "SelectionStrategy") -> None:
+        self.pattern = pattern
+        self.servers = servers
+        self.strategy = strategy
+
+
+class ModelRouteIndex:
+    """Memoize model name -> ModelRoute over MODEL_PATTERN_LIST.
+
+    Clients send a small, repeating set of model names, so results are kept in a bounded
+    LRU. With many patterns, misses use one combined alternation (first pattern wins, as
+    with the sequential scan). rebuild() is called on every config load and drops the memo.
+    """
+
+    # Numbered backreferences would break once patterns are renumbered inside one regex
+    _BACKREF_RE = re.compile(r"\\[1-9]")
+
+    def __init__(self, max_entries: int = MODEL_ROUTE_CACHE_SIZE) -> None:
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Optional[ModelRoute]]" = OrderedDict()
+        self._generation = 0
+        # (pattern_list, routes, combined_regex or None, {marker_group_index: pattern_index}) swapped as one object
+        self._compiled: Tuple[
+            List[Tuple[Pattern[str], List[str], str]], List[ModelRoute], Optional[Pattern[str]], Dict[int, int]
+        ] = ([], [], None, {})
+
+    def rebuild(
+        self,
+        pattern_list: List[Tuple[Pattern[str], List[str], str]],
+        strategies: Optional[Dict[str, "SelectionStrategy"]] = None,
+    ) -> None:
+        routes = [
+            ModelRoute(p, names, (strategies or {}).get(p) or _create_selection_strategy(None))
+            for _, names, p in pattern_list
+        ]
+        combined: Optional[Pattern[str]] = None
+        markers: Dict[int, int] = {}
+        if 0 < MODEL_PATTERN_COMBINE_MIN <= len(pattern_list) and not any(
+            self._BACKREF_RE.search(p) for _, _, p in pattern_list
+        ):
+            # Each branch ends with an empty marker group; match.lastindex names the branch.
+            # (Named groups per branch would disable sre's branch prefix optimization.)
+            branches: List[str] = []
+            group_count = 0
+            for i, (compiled_pattern, _, pattern_str) in enumerate(pattern_list):
+                branches.append(f"(?:{pattern_str})()")
+                group_count += compiled_pattern.groups + 1
+                markers[group_count] = i
+            try:
+                combined = re.compile("|".join(branches))
+            except re.error:
+                # e.g. inline global flags or duplicate group names: keep sequential matching
+                combined = None
+        with self._lock:
+            self._compiled = (list(pattern_list), routes, combined, markers)
+            self._cache.clear()
+            self._generation += 1
+
+    def lookup(self, model: str) -> List[str]:
+        route = self.route(model)
+        return route.servers if route else []
+
+    def route(self, model: str) -> Optional[ModelRoute]:
+        with self._lock:
+            if model in self._cache:
+                self._cache.move_to_end(model)
+                return self._cache[model]
+            generation = self._generation
+            compiled = self._compiled
+        result = self._match(model, *compiled)
+        with self._lock:
+            if generation == self._generation:
+                self._cache[model] = result
+                if len(self._cache) > self._max_entries:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _match(
+        self,
+        model: str,
+        pattern_list: List[Tuple[Pattern[str], List[str], str]],
+        routes: List[ModelRoute],
+        combined: Optional[Pattern[str]],
+        markers: Dict[int, int],
+    ) -> Optional[ModelRoute]:
+        if combined is not None:
+            m = combined.fullmatch(model)
+            if not m or m.lastindex not in markers:
+                return None
+            return routes[markers[m.lastindex]]
+        for i, (compiled_pattern, _, _) in enumerate(pattern_list):
+            try:
+                if compiled_pattern.fullmatch(model):
+                    return routes[i]
+            except Exception:
+                continue
+        return None
+
+
+# Global instance
+MODEL_ROUTES = ModelRouteIndex()
+
+
+# ------------------------------
+# Load-Balancing Strategies
+# ------------------------------
+
+
+def _backend_load(cfg: "ServerConfig") -> float:
+    """Outstanding requests relative to capacity (request-max, else weight); unhealthy sorts last"""
+    status = BACKEND_MONITOR.get_conservative_status(cfg.health_base)
+    if status == "invalid":
+        return float("inf")
+    inflight = INFLIGHT_TRACKER.get_total_for_backend(cfg.model_base)
+    load = inflight / float(cfg.request_max or cfg.weight)
+    # Prefer idle GPUs among equally loaded servers
+    return load + (0.5 if status == "busy" else 0.0)
+
+
+class SelectionStrategy:
+    """Order candidate servers for BackendSelector; the first eligible one in this order wins.
+
+    "config-order" (default) keeps the order written in server-list.json.
+    """
+
+    name = "config-order"
+
+    def order(self, servers: List[str]) -> List[str]:
+        return servers
+
+
+class WeightedRoundRobinStrategy(SelectionStrategy):
+    """Smooth weighted round-robin over "weight" of each server; rotates the starting server"""
+
+    name = "weighted-round-robin"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._current: Dict[str, int] = {}
+
+    def order(self, servers: List[str]) -> List[str]:
+        weights = {}
+        for n in servers:
+            cfg = SERVER_REGISTRY.get_server(n)
+            if cfg:
+                weights[n] = cfg.weight
+        if not weights:
+            return servers
+        with self._lock:
+            total = 0
+            best = None
+            for n, w in weights.items():
+                cur = self._current.get(n, 0) + w
+                self._current[n] = cur
+                total += w
+                if best is None or cur > self._current[best]:
+                    best = n
+            self._current[best] -= total
+        return [best] + [n for n in servers if n != best]
+
+
+class LeastOutstandingStrategy(SelectionStrategy):
+    """Fewest in-flight requests (relative to request-max / weight) first; ties keep config order"""
+
+    name = "least-outstanding"
+
+    def order(self, servers: List[str]) -> List[str]:
+        def key(n: str) -> float:
+            cfg = SERVER_REGISTRY.get_server(n)
+            return _backend_load(cfg) if cfg else float("inf")
+
+        return sorted(servers, key=key)
+
+
+class PowerOfTwoStrategy(SelectionStrategy):
+    """Sample two servers at random and try the less loaded one first"""
+
+    name = "power-of-two"
+
+    def order(self, servers: List[str]) -> List[str]:
+        if len(servers) < 2:
+            return servers
+        a, b = random.sample(servers, 2)
+        cfg_a, cfg_b = SERVER_REGISTRY.get_server(a), SERVER_REGISTRY.get_server(b)
+        load_a = _backend_load(cfg_a) if cfg_a else float("inf")
+        load_b = _backend_load(cfg_b) if cfg_b else float("inf")
+        first, second = (a, b) if load_a <= load_b else (b, a)
+        return [first, second] + [n for n in servers if n != first and n != second]
+
+
+SELECTION_STRATEGIES = {
+    cls.name: cls
+    for cls in (SelectionStrategy, WeightedRoundRobinStrategy, LeastOutstandingStrategy, PowerOfTwoStrategy)
+}
+
+
+def _create_selection_strategy(name: Optional[str]) -> SelectionStrategy:
+    """New strategy instance (strategies may keep per-pattern state such as round-robin position)"""
+    # Unknown names are reported by config validation
+    return SELECTION_STRATEGIES.get(name or "config-order", SelectionStrategy)()
+
+
 # ------------------------------
 # Lightweight Server Registry (compatibility)
 # ------------------------------
 
 
-@dataclass
+@dataclass(frozen=True)
 class ServerConfig:
+    """Immutable server definition; built once per config load and shared by all lookups"""
     name: str
     addr: str
     health_port: int
     model_port: int
     request_max: Optional[int] = None
+    health_timeout: Optional[float] = None
+    weight: int = 1
+    health_base: str = field(init=False)
+    model_base: str = field(init=False)
 
-    @property
-    def health_base(self) -> str:
-        return f"{self.addr.rstrip('/') }:{self.health_port}"
+    def __post_init__(self) -> None:
+        # Interned so index lookups and comparisons with stored backend keys are cheap
+        object.__setattr__(self, "health_base", sys.intern(f"{self.addr.rstrip('/')}:{self.health_port}"))
+        object.__setattr__(self, "model_base", sys.intern(f"{self.addr.rstrip('/')}:{self.model_port}"))
 
-    @property
-    def model_base(self) -> str:
-        return f"{self.addr.rstrip('/') }:{self.model_port}"
+
+@dataclass(frozen=True)
+class _RegistryIndex:
+    servers: Dict[str, ServerConfig]
+    by_model_base: Dict[str, ServerConfig]
+    by_health_base: Dict[str, ServerConfig]
+    health_bases: Tuple[str, ...]
+    model_bases: Tuple[str, ...]
 
 
 class ServerRegistry:
-    """Wrapper over existing global SERVER_CONFIGS / MODEL_PATTERN_LIST for newer classes"""
+    """Indexed view of SERVER_CONFIGS / MODEL_PATTERN_LIST.
 
-    @staticmethod
-    def get_server(name: str) -> Optional[ServerConfig]:
-        cfg = SERVER_CONFIGS.get(name)
-        if not cfg:
-            return None
-        return ServerConfig(
-            name, 
-            cfg["addr"], 
-            cfg["health-port"], 
-            cfg["model-port"],
-            cfg.get("request-max")
+    ServerConfig objects and the name / model_base / health_base indexes are built once
+    in rebuild() (on config load) and swapped in as a single object, so lookups are O(1)
+    dict hits without per-request allocation.
+    """
+
+    def __init__(self) -> None:
+        self._index = _RegistryIndex({}, {}, {}, (), ())
+
+    def rebuild(self, server_configs: Dict[str, Dict[str, Any]]) -> None:
+        servers: Dict[str, ServerConfig] = {}
+        for name, cfg in server_configs.items():
+            servers[name] = ServerConfig(
+                sys.intern(name),
+                cfg["addr"],
+                cfg["health-port"],
+                cfg["model-port"],
+                cfg.get("request-max"),
+                cfg.get("health-timeout"),
+                cfg.get("weight", 1),
+            )
+        by_model_base: Dict[str, ServerConfig] = {}
+        by_health_base: Dict[str, ServerConfig] = {}
+        for srv in servers.values():
+            # First definition wins when several names share a base URL
+            by_model_base.setdefault(srv.model_base, srv)
+            by_health_base.setdefault(srv.health_base, srv)
+        self._index = _RegistryIndex(
+            servers,
+            by_model_base,
+            by_health_base,
+            tuple(srv.health_base for srv in servers.values()),
+            tuple(srv.model_base for srv in servers.values()),
         )
 
-    @staticmethod
-    def server_names() -> List[str]:
-        return list(SERVER_CONFIGS.keys())
+    def get_server(self, name: str) -> Optional[ServerConfig]:
+        return self._index.servers.get(name)
 
-    @staticmethod
-    def health_bases() -> List[str]:
-        return [_get_health_base_url(n) for n in SERVER_CONFIGS.keys() if _get_health_base_url(n)]
+    def server_by_model_base(self, base: str) -> Optional[ServerConfig]:
+        return self._index.by_model_base.get(base)
 
-    @staticmethod
-    def model_bases() -> List[str]:
-        return [_get_model_base_url(n) for n in SERVER_CONFIGS.keys() if _get_model_base_url(n)]
+    def server_by_health_base(self, base: str) -> Optional[ServerConfig]:
+        return self._index.by_health_base.get(base)
+
+    def server_names(self) -> List[str]:
+        return list(self._index.servers.keys())
+
+    def health_bases(self) -> List[str]:
+        return list(self._index.health_bases)
+
+    def model_bases(self) -> List[str]:
+        return list(self._index.model_bases)
 
     @property
     def fallback_backend(self) -> Optional[str]:
@@ -266,9 +677,9 @@ class ServerRegistry:
     def model_patterns(self) -> List[Tuple[Pattern[str], List[str], str]]:
         return list(MODEL_PATTERN_LIST)
 
-    @staticmethod
-    def modelurl_by_health_base(base: str) -> Optional[str]:
-        return _get_modelurl_by_health_base(base)
+    def modelurl_by_health_base(self, base: str) -> Optional[str]:
+        srv = self.server_by_health_base(base)
+        return srv.model_base if srv else None
 
 
 # global instance
@@ -285,12 +696,291 @@ app = Flask(__name__)
 # ------------------------------
 
 
-def _get_client_ip() -> str:
-    """Return client IP considering X-Forwarded-For"""
-    xff = request.headers.get("X-Forwarded-For")
+def _client_ip_from(headers: Any, remote_addr: Optional[str]) -> str:
+    """Return client IP from request headers/peer address considering X-Forwarded-For"""
+    xff = headers.get("X-Forwarded-For")
     if xff:
         return xff.split(",")[0].strip()
-    return request.remote_addr or "unknown"
+    return remote_addr or "unknown"
+
+
+def _get_client_ip() -> str:
+    """Return client IP considering X-Forwarded-For"""
+    return _client_ip_from(request.headers, request.remote_addr)
+
+# ------------------------------
+# Upstream Connection Pools
+# ------------------------------
+
+
+class DnsCache:
+    """Resolve backend host names once per UPSTREAM_DNS_CACHE_TTL_SEC"""
+
+    def __init__(self, ttl_seconds: float = UPSTREAM_DNS_CACHE_TTL_SEC) -> None:
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, int], Tuple[List[str], float]] = {}
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Return the cached addresses of host in resolver order ([host] when resolution fails
+        or caching is disabled)"""
+        if self._ttl <= 0:
+            return [host]
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 raise the proper resolution error
+            return [host]
+        addrs = list(dict.fromkeys(info[4][0] for info in infos)) or [host]
+        with self._lock:
+            self._cache[key] = (addrs, now + self._ttl)
+        return addrs
+
+    def prefer(self, host: str, port: int, addr: str) -> None:
+        """Move an address that accepted a connection to the front (e.g. IPv4 after a refused ::1)"""
+        with self._lock:
+            entry = self._cache.get((host, port))
+            if entry and addr in entry[0]:
+                self._cache[(host, port)] = ([addr] + [a for a in entry[0] if a != addr], entry[1])
+
+
+DNS_CACHE = DnsCache()
+
+
+class _CachedDnsConnectionMixin:
+    """Connect to each cached address of the host in turn, as socket.create_connection does"""
+
+    def _new_conn(self) -> socket.socket:
+        host, port = self.host, self.port  # type: ignore[attr-defined]
+        addrs = DNS_CACHE.resolve(host, port)
+        for i, addr in enumerate(addrs):
+            # urllib3 connects to _dns_host; TLS SNI / Host header still use self.host
+            self._dns_host = addr
+            try:
+                sock = super()._new_conn()  # type: ignore[misc]
+            except (NewConnectionError, ConnectTimeoutError):
+                if i < len(addrs) - 1:
+                    continue
+                raise
+            if i:
+                DNS_CACHE.prefer(host, port, addr)
+            break
+        return sock
+
+
+class _CachedDnsHTTPConnection(_CachedDnsConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CachedDnsHTTPSConnection(_CachedDnsConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _IdleExpiringPoolMixin:
+    """Drop pooled connections that sat idle longer than UPSTREAM_POOL_IDLE_TIMEOUT_SEC"""
+
+    idle_closed = 0
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        released_at = getattr(conn, "_lb_released_at", None)
+        if (
+            released_at is not None
+            and getattr(conn, "sock", None) is not None
+            and time.monotonic() - released_at > UPSTREAM_POOL_IDLE_TIMEOUT_SEC
+        ):
+            conn.close()
+            self.idle_closed += 1
+        return conn
+
+    def _put_conn(self, conn: Any) -> None:
+        if conn is not None:
+            conn._lb_released_at = time.monotonic()
+        super()._put_conn(conn)  # type: ignore[misc]
+
+
+class _PooledHTTPConnectionPool(_IdleExpiringPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _CachedDnsHTTPConnection
+
+
+class _PooledHTTPSConnectionPool(_IdleExpiringPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _CachedDnsHTTPSConnection
+
+
+class UpstreamPoolManager:
+    """Keep one keep-alive requests.Session per backend base URL (model_base / health_base)"""
+
+    def __init__(self, pool_maxsize: int = UPSTREAM_POOL_MAXSIZE) -> None:
+        self._pool_maxsize = max(1, pool_maxsize)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        # Counters reported by the asyncio engine's connector: {base: [hits, misses]}
+        self._async_counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+    # ---------- public helpers ----------
+    def session(self, base: str) -> requests.Session:
+        key = base.rstrip("/")
+        sess = self._sessions.get(key)
+        if sess is not None:
+            return sess
+        with self._lock:
+            sess = self._sessions.get(key)
+            if sess is None:
+                sess = self._new_session()
+                self._sessions[key] = sess
+            return sess
+
+    def retain(self, bases: "set[str]") -> None:
+        """Close sessions of base URLs that are no longer configured (config reload)"""
+        keep = {b.rstrip("/") for b in bases}
+        with self._lock:
+            removed = [self._sessions.pop(b) for b in list(self._sessions) if b not in keep]
+            for b in [b for b in self._async_counts if b not in keep]:
+                del self._async_counts[b]
+        for sess in removed:
+            # Streams still using a pooled connection finish; the connection is discarded on release
+            sess.close()
+
+    def record_async(self, base: str, reused: bool) -> None:
+        with self._lock:
+            self._async_counts[base.rstrip("/")][0 if reused else 1] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Pool hit/miss counters per base URL (hit = request served on a reused connection)"""
+        with self._lock:
+            sessions = dict(self._sessions)
+            async_counts = {k: list(v) for k, v in self._async_counts.items()}
+        result: Dict[str, Dict[str, int]] = {}
+        for base, sess in sessions.items():
+            requests_total = misses = idle_closed = 0
+            adapter = sess.get_adapter(base + "/")
+            pools = adapter.poolmanager.pools
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                requests_total += pool.num_requests
+                misses += pool.num_connections
+                idle_closed += getattr(pool, "idle_closed", 0)
+            result[base] = {
+                "requests": requests_total,
+                "hits": max(0, requests_total - misses),
+                "misses": misses,
+                "idle_closed": idle_closed,
+            }
+        for base, (hits, misses) in async_counts.items():
+            entry = result.setdefault(base, {"requests": 0, "hits": 0, "misses": 0, "idle_closed": 0})
+            entry["requests"] += hits + misses
+            entry["hits"] += hits
+            entry["misses"] += misses
+        return result
+
+    # ---------- internal ----------
+    def _new_session(self) -> requests.Session:
+        sess = requests.Session()
+        # Session is shared by all clients: never carry cookies between them
+        sess.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize, pool_block=False)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            "http": _PooledHTTPConnectionPool,
+            "https": _PooledHTTPSConnectionPool,
+        }
+        sess.mount("http://", adapter)
+        sess.mount("https://", adapter)
+        return sess
+
+
+# Instance creation
+UPSTREAM_POOLS = UpstreamPoolManager()
+
+
+# ------------------------------
+# State Feed (versioned monitor state, pushed over SSE)
+# ------------------------------
+
+
+class StateFeed:
+    """Monitor-facing state with a version number and a bounded history of changes.
+
+    Owners publish (section, key, value) when something changes; value None deletes
+    the key. Each real change bumps the version and is kept in a ring buffer, so a
+    client that knows version N receives only what changed after N (or the full state
+    when N has fallen out of the history). Listeners are woken, never called with data.
+    """
+
+    SECTIONS = ("local", "backends", "inflight", "sticky")
+
+    def __init__(self, history: int = STATE_FEED_HISTORY) -> None:
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {s: {} for s in self.SECTIONS}
+        self._changes: Deque[Tuple[int, str, str, Any]] = deque(maxlen=max(1, history))
+        self._version = 0
+        self._listeners: List[Any] = []
+
+    # ---------- public helpers ----------
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, section: str, key: str, value: Any) -> None:
+        with self._lock:
+            current = self._state[section]
+            if value is None:
+                if key not in current:
+                    return
+                del current[key]
+            else:
+                if current.get(key) == value:
+                    return
+                current[key] = value
+            self._version += 1
+            self._changes.append((self._version, section, key, value))
+            listeners = self._listeners
+        for wake in listeners:
+            try:
+                wake()
+            except Exception:
+                pass
+
+    def changes_since(self, since: int) -> Tuple[int, Optional[List[Dict[str, Any]]]]:
+        """(version, changes after `since`), or (version, None) when a full snapshot is needed"""
+        with self._lock:
+            version = self._version
+            if since == version:
+                return version, []
+            if since <= 0 or since > version or not self._changes or self._changes[0][0] > since + 1:
+                return version, None
+            # Latest value per key only
+            latest: Dict[Tuple[str, str], Any] = {}
+            for v, section, key, value in reversed(self._changes):
+                if v <= since:
+                    break
+                latest.setdefault((section, key), value)
+        return version, [{"s": section, "k": key, "d": value} for (section, key), value in latest.items()]
+
+    def snapshot(self) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            return self._version, {s: dict(d) for s, d in self._state.items()}
+
+    def subscribe(self, wake: Any) -> None:
+        with self._lock:
+            # Copy-on-write: publish() iterates without holding the lock
+            self._listeners = self._listeners + [wake]
+
+    def unsubscribe(self, wake: Any) -> None:
+        with self._lock:
+            self._listeners = [w for w in self._listeners if w is not wake]
+
+
+# Global instance
+STATE_FEED = StateFeed()
+
 
 # ------------------------------
 # Local GPU Utilization Monitor (Refactored)
@@ -320,6 +1010,8 @@ class LocalGpuMonitor:
     def _append(self, value: float) -> None:
         with self._lock:
             self._window.append(value)
+            max_util = max(self._window)
+        STATE_FEED.publish("local", "local", {"status": "busy" if max_util >= 50.0 else "idle", "gpu_util_max5s": max_util})
 
     def _sample_loop(self) -> None:
         """Class method implementation of traditional _sample_local_gpu_loop"""
@@ -422,6 +1114,9 @@ class BackendHealthMonitor:
         self._lock = threading.Lock()
         self._last_metrics: Dict[str, Dict[str, Any]] = {}
         self._thread: Optional[threading.Thread] = None
+        # Per-backend poller threads: {health_base: (thread, stop_event)}
+        self._pollers: Dict[str, Tuple[threading.Thread, threading.Event]] = {}
+        self._pollers_lock = threading.Lock()
 
     # ---------- public helpers ----------
     def start(self) -> None:
@@ -433,23 +1128,30 @@ class BackendHealthMonitor:
     def get_conservative_status(self, base: str) -> str:
         """Return idle/busy/invalid on the safe side based on observations from recent WINDOW_SECONDS"""
         with self._lock:
-            window = self._windows.get(base)
-            if not window or len(window) == 0:
-                return "busy"
-            if INVALID_STATUS_VAL in window:
-                return "invalid"
-            return "busy" if max(window) >= 1 else "idle"
+            return self._conservative_locked(base)
 
     def snapshot_metrics(self, bases: List[str]) -> Dict[str, Dict[str, Any]]:
         with self._lock:
             return {b: self._last_metrics.get(b) for b in bases}
 
+    def mark_suspect(self, base: str) -> None:
+        """Record an invalid sample now (the proxy could not connect) instead of waiting for the next poll"""
+        self._record(base, INVALID_STATUS_VAL, None, base.rstrip("/") + "/llmhealth")
+
     # ---------- internal ----------
+    def _conservative_locked(self, base: str) -> str:
+        window = self._windows.get(base)
+        if not window or len(window) == 0:
+            return "busy"
+        if INVALID_STATUS_VAL in window:
+            return "invalid"
+        return "busy" if max(window) >= 1 else "idle"
+
     def _record(self, base: str, status_val: int, util_val: Optional[float], url: str) -> None:
         with self._lock:
             self._windows[base].append(status_val)
             now_utc = datetime.now(timezone.utc)
-            self._last_metrics[base] = {
+            last = self._last_metrics[base] = {
                 "status": (
                     "invalid" if status_val == INVALID_STATUS_VAL else ("idle" if status_val == 0 else "busy")
                 ),
@@ -457,37 +1159,70 @@ class BackendHealthMonitor:
                 "updated_at": now_utc.isoformat().replace("+00:00", "Z"),
                 "url": url,
             }
+            state = self._conservative_locked(base)
+        STATE_FEED.publish("backends", base, {"status": state, "last": last})
+
+    def reconcile(self) -> None:
+        """Keep exactly one poller thread per configured health base"""
+        with self._pollers_lock:
+            health_bases = set(_get_health_base_urls())
+            for base in health_bases:
+                poller = self._pollers.get(base)
+                if poller and poller[0].is_alive():
+                    continue
+                stop = threading.Event()
+                t = threading.Thread(
+                    target=self._poll_backend_loop, args=(base, stop), name=f"server-poller:{base}", daemon=True
+                )
+                self._pollers[base] = (t, stop)
+                t.start()
+            for base in [b for b in self._pollers if b not in health_bases]:
+                _, stop = self._pollers.pop(base)
+                stop.set()
+                with self._lock:
+                    self._windows.pop(base, None)
+                    self._last_metrics.pop(base, None)
+                STATE_FEED.publish("backends", base, None)
 
     def _poll_loop(self) -> None:
+        """Supervisor: restart dead pollers and follow config changes"""
         while True:
-            health_bases = _get_health_base_urls()
-            if not health_bases:
-                time.sleep(SAMPLE_INTERVAL_SEC)
-                continue
+            self.reconcile()
+            time.sleep(SAMPLE_INTERVAL_SEC)
 
-            started = time.time()
-            for base in health_bases:
-                try:
-                    url = base.rstrip("/") + "/llmhealth"
-                    resp = requests.get(url, timeout=(CONNECT_TIMEOUT_SEC, HEALTH_READ_TIMEOUT_SEC))
-                    util_val: Optional[float] = None
-                    if resp.headers.get("content-type", "").startswith("application/json"):
-                        data = resp.json()
-                        s = data.get("status") if isinstance(data, dict) else None
-                        status_val = _interpret_llmhealth_text(s) if isinstance(s, str) else _interpret_llmhealth_text(resp.text)
-                        if isinstance(data, dict):
-                            util_candidate = data.get("gpu_util_max5s")
-                            if isinstance(util_candidate, (int, float)):
-                                util_val = float(util_candidate)
-                    else:
-                        status_val = _interpret_llmhealth_text(resp.text)
-                except Exception:
-                    status_val = INVALID_STATUS_VAL
-                    util_val = None
-                self._record(base, status_val, util_val, url)
-
-            elapsed = time.time() - started
-            time.sleep(max(0.0, SAMPLE_INTERVAL_SEC - elapsed))
+    def _poll_backend_loop(self, base: str, stop: threading.Event) -> None:
+        """Sample one backend on its own schedule so a slow host never delays the others"""
+        # Spread first polls over one interval to avoid synchronized bursts
+        if stop.wait(random.uniform(0.0, SAMPLE_INTERVAL_SEC)):
+            return
+        url = base.rstrip("/") + "/llmhealth"
+        while not stop.is_set():
+            started = time.monotonic()
+            status_val, util_val = self._poll_once(base, url)
+            if stop.is_set():
+                return
+            self._record(base, status_val, util_val, url)
+            interval = SAMPLE_INTERVAL_SEC * random.uniform(1.0 - HEALTH_POLL_JITTER, 1.0 + HEALTH_POLL_JITTER)
+            stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _poll_once(self, base: str, url: str) -> Tuple[int, Optional[float]]:
+        util_val: Optional[float] = None
+        try:
+            resp = UPSTREAM_POOLS.session(base).get(url, timeout=_get_health_timeouts(base))
+            if resp.headers.get("content-type", "").startswith("application/json"):
+                data = resp.json()
+                s = data.get("status") if isinstance(data, dict) else None
+                status_val = _interpret_llmhealth_text(s) if isinstance(s, str) else _interpret_llmhealth_text(resp.text)
+                if isinstance(data, dict):
+                    util_candidate = data.get("gpu_util_max5s")
+                    if isinstance(util_candidate, (int, float)):
+                        util_val = float(util_candidate)
+            else:
+                status_val = _interpret_llmhealth_text(resp.text)
+        except Exception:
+            status_val = INVALID_STATUS_VAL
+            util_val = None
+        return status_val, util_val
 
 
 # Instance creation
@@ -500,42 +1235,122 @@ BACKEND_MONITOR = BackendHealthMonitor()
 
 
 class StickySessionManager:
-    """Maintain binding between IP(+model) and backend for a certain period"""
+    """Maintain binding between IP(+model) and backend for a certain period
+
+    Entries live in an OrderedDict keyed by (ident, model) and ordered by last update.
+    With one TTL for all entries that order is both the expiry queue and the LRU order,
+    so expiry and eviction pop from the front. A secondary index on (model, backend)
+    keeps "one client per model x backend" enforcement O(1).
+    """
 
-    def __init__(self, ttl_seconds: int = STICKY_TTL_SECONDS) -> None:
+    def __init__(self, ttl_seconds: int = STICKY_TTL_SECONDS, max_entries: int = STICKY_MAX_ENTRIES) -> None:
         self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
         self._lock = threading.Lock()
-        self._map: Dict[str, Tuple[str, datetime]] = {}
+        # (ident, model) -> (backend, updated_at_monotonic, updated_at_utc)
+        self._map: "OrderedDict[Tuple[str, Optional[str]], Tuple[str, float, datetime]]" = OrderedDict()
+        # (model, backend) -> (ident, model) currently pinned there
+        self._by_model_backend: Dict[Tuple[Optional[str], str], Tuple[str, Optional[str]]] = {}
+        self._thread: Optional[threading.Thread] = None
 
     # ---------- helpers ----------
+    def start(self) -> None:
+        """Expire entries from one background thread, so the state feed sees removals as deltas"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._expiry_loop, name="sticky-expiry", daemon=True)
+        self._thread.start()
+
     def get_backend(self, ip: str, model: Optional[str] = None) -> Optional[str]:
-        now = datetime.now(timezone.utc)
-        key = f"{ip}|{model}" if model else ip
+        key = (ip, model)
+        now = time.monotonic()
         with self._lock:
             entry = self._map.get(key)
-        if not entry:
-            return None
-        backend, last_time = entry
-        if now - last_time > timedelta(seconds=self._ttl):
-            self._map.pop(key, None)
-            return None
-        return backend
+            if not entry:
+                return None
+            if now - entry[1] > self._ttl:
+                self._remove_locked(key)
+                return None
+            return entry[0]
 
     def update_backend(self, ip: str, backend: str, model: Optional[str] = None) -> None:
-        key = f"{ip}|{model}" if model else ip
+        key = (ip, model)
+        now = time.monotonic()
         with self._lock:
             # Remove if same backend exists for same model
-            keys_to_delete = [k for k, v in self._map.items() if k.split("|", 1)[1] == model and v[0] == backend]
-            for k in keys_to_delete:
-                self._map.pop(k, None)
-            self._map[key] = (backend, datetime.now(timezone.utc))
+            other = self._by_model_backend.get((model, backend))
+            if other is not None and other != key:
+                self._remove_locked(other)
+            # Drop this client's index entry for a previous backend
+            self._remove_locked(key)
+            updated_at = datetime.now(timezone.utc)
+            self._map[key] = (backend, now, updated_at)
+            self._by_model_backend[(model, backend)] = key
+            STATE_FEED.publish("sticky", self._feed_key(key), self._entry(key, backend, updated_at))
+            self._expire_locked(now)
+            while len(self._map) > self._max_entries:
+                self._remove_locked(next(iter(self._map)))
 
     def cleanup(self) -> None:
-        now = datetime.now(timezone.utc)
         with self._lock:
-            expired = [k for k, v in self._map.items() if now - v[1] > timedelta(seconds=self._ttl)]
-            for k in expired:
-                self._map.pop(k, None)
+            self._expire_locked(time.monotonic())
+
+    def retain_backends(self, backends: "set[str]") -> None:
+        """Drop entries pointing at backends that are no longer configured (config reload)"""
+        with self._lock:
+            for key in [k for k, entry in self._map.items() if entry[0] not in backends]:
+                self._remove_locked(key)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._map)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Live entries for monitoring (oldest update first)"""
+        with self._lock:
+            self._expire_locked(time.monotonic())
+            return [self._entry(key, backend, updated_at) for key, (backend, _, updated_at) in self._map.items()]
+
+    # ---------- internal ----------
+    def _expiry_loop(self) -> None:
+        while True:
+            with self._lock:
+                oldest = next(iter(self._map.values()), None)
+            # The front entry expires first and only ever moves later: sleep until then
+            due = self._ttl if oldest is None else oldest[1] + self._ttl - time.monotonic()
+            time.sleep(max(0.05, min(due, 60.0)))
+            self.cleanup()
+
+    @staticmethod
+    def _feed_key(key: Tuple[str, Optional[str]]) -> str:
+        ident, model = key
+        return f"{ident}|{model}" if model else ident
+
+    @staticmethod
+    def _entry(key: Tuple[str, Optional[str]], backend: str, updated_at: datetime) -> Dict[str, Any]:
+        ident, model = key
+        return {
+            "key": f"{ident}|{model}" if model else ident,
+            "ip": ident,
+            "model": model,
+            "backend": backend,
+            "updated_at": updated_at.isoformat().replace("+00:00", "Z"),
+        }
+
+    def _remove_locked(self, key: Tuple[str, Optional[str]]) -> None:
+        entry = self._map.pop(key, None)
+        if entry is None:
+            return
+        if self._by_model_backend.get((key[1], entry[0])) == key:
+            del self._by_model_backend[(key[1], entry[0])]
+        STATE_FEED.publish("sticky", self._feed_key(key), None)
+
+    def _expire_locked(self, now: float) -> None:
+        while self._map:
+            key, entry = next(iter(self._map.items()))
+            if now - entry[1] <= self._ttl:
+                break
+            self._remove_locked(key)
 
 
 # Instance creation
@@ -543,91 +1358,350 @@ STICKY_MANAGER = StickySessionManager()
 
 
 # ------------------------------
-# Access Log Manager (New)
+# Conversation Prefix Affinity
 # ------------------------------
 
-@dataclass
-class AccessLogEntry:
-    """Access log entry for completions requests"""
-    ip: str
-    model: str
-    timestamp: datetime
-    username: Optional[str] = None
 
-class AccessLogManager:
-    """Manage access logs for completions requests with 1-hour retention"""
-    
-    def __init__(self, retention_hours: int = 1) -> None:
-        self._retention_hours = retention_hours
+class PrefixAffinityIndex:
+    """Remember which backend/instance last served each conversation prefix.
+
+    llama-server reuses its prompt cache when a request starts with the tokens it just
+    processed, so routing by message prefix (rather than by IP/username) keeps agent
+    sessions on a warm cache. Prefixes are fingerprinted with a rolling hash over the
+    model name and each message, giving one digest per message boundary.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = PREFIX_AFFINITY_TTL_SECONDS,
+        max_entries: int = PREFIX_AFFINITY_MAX_ENTRIES,
+    ) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
         self._lock = threading.Lock()
-        self._logs: Deque[AccessLogEntry] = deque()
-    
-    def log_access(self, ip: str, model: str, username: Optional[str] = None) -> None:
-        """Log a completions request access"""
+        # digest -> (backend, instance, updated_at_monotonic); ordered by last update
+        self._map: "OrderedDict[bytes, Tuple[str, str, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    # ---------- helpers ----------
+    @staticmethod
+    def fingerprint(model: str, messages: Any) -> List[bytes]:
+        """Digest of model + messages[:i+1] for every i (shortest prefix first)"""
+        if not isinstance(messages, list) or not messages:
+            return []
+        h = hashlib.blake2b(model.encode("utf-8"), digest_size=16)
+        digests: List[bytes] = []
+        for msg in messages:
+            h.update(b"\x1e")
+            h.update(json.dumps(msg, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            digests.append(h.copy().digest())
+        return digests
+
+    def lookup(self, digests: List[bytes]) -> List[Tuple[str, str]]:
+        """Return (backend, instance) candidates, longest matching prefix first"""
+        now = time.monotonic()
+        found: List[Tuple[str, str]] = []
         with self._lock:
-            entry = AccessLogEntry(
-                ip=ip,
-                model=model,
-                timestamp=datetime.now(timezone.utc),
-                username=username
-            )
-            self._logs.append(entry)
-            self._cleanup_old_logs()
-    
-    def _cleanup_old_logs(self) -> None:
-        """Remove logs older than retention period"""
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self._retention_hours)
-        while self._logs and self._logs[0].timestamp < cutoff_time:
-            self._logs.popleft()
-    
-    def get_recent_logs(self) -> List[AccessLogEntry]:
-        """Get all logs within retention period"""
+            for digest in reversed(digests):
+                entry = self._map.get(digest)
+                if entry and now - entry[2] <= self._ttl and (entry[0], entry[1]) not in found:
+                    found.append((entry[0], entry[1]))
+            if found:
+                self._hits += 1
+            else:
+                self._misses += 1
+        return found
+
+    def record(self, digests: List[bytes], backend: str, instance: str) -> None:
+        if not digests:
+            return
+        now = time.monotonic()
         with self._lock:
-            self._cleanup_old_logs()
-            return list(self._logs)
-    
+            for digest in digests:
+                self._map[digest] = (backend, instance, now)
+                self._map.move_to_end(digest)
+            while self._map:
+                digest, entry = next(iter(self._map.items()))
+                if len(self._map) <= self._max_entries and now - entry[2] <= self._ttl:
+                    break
+                del self._map[digest]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": PREFIX_AFFINITY_ENABLED,
+                "entries": len(self._map),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# Instance creation
+PREFIX_AFFINITY = PrefixAffinityIndex()
+
+
+# ------------------------------
+# Access Log Manager (New)
+# ------------------------------
+
+class _AccessMinute:
+    """Access counts of one wall-clock minute"""
+
+    __slots__ = ("minute", "first_ts", "total", "ips", "models", "usernames")
+
+    def __init__(self, minute: int, ts: float) -> None:
+        self.minute = minute
+        self.first_ts = ts
+        self.total = 0
+        self.ips: Dict[str, int] = {}
+        self.models: Dict[str, int] = {}
+        self.usernames: Dict[str, int] = {}
+
+
+def _count_add(counts: Dict[str, int], key: str, n: int) -> None:
+    v = counts.get(key, 0) + n
+    if v > 0:
+        counts[key] = v
+    else:
+        counts.pop(key, None)
+
+
+class AccessLogManager:
+    """Access statistics for completions requests, kept as per-minute buckets.
+
+    Buckets and the running per-IP/model/username totals are updated on insert and
+    on expiry, so get_stats() is O(buckets + distinct keys), not O(requests).
+    Expiry is per whole minute.
+    """
+
+    def __init__(self, retention_hours: float = ACCESS_LOG_RETENTION_HOURS) -> None:
+        self._retention_hours = retention_hours
+        self._retention_minutes = max(1, int(retention_hours * 60))
+        self._lock = threading.Lock()
+        self._buckets: Deque[_AccessMinute] = deque()
+        self._total = 0
+        self._ip_counts: Dict[str, int] = {}
+        self._model_counts: Dict[str, int] = {}
+        self._username_counts: Dict[str, int] = {}
+        self._newest_ts: Optional[float] = None
+
+    def log_access(self, ip: str, model: str, username: Optional[str] = None) -> None:
+        """Log a completions request access"""
+        now = time.time()
+        minute = int(now // 60)
+        # Few distinct values repeat at high rates: share one string object each
+        ip = sys.intern(ip)
+        model = sys.intern(model)
+        with self._lock:
+            self._expire_locked(minute)
+            bucket = self._buckets[-1] if self._buckets else None
+            if bucket is None or bucket.minute != minute:
+                bucket = _AccessMinute(minute, now)
+                self._buckets.append(bucket)
+            bucket.total += 1
+            _count_add(bucket.ips, ip, 1)
+            _count_add(bucket.models, model, 1)
+            self._total += 1
+            _count_add(self._ip_counts, ip, 1)
+            _count_add(self._model_counts, model, 1)
+            if username:
+                username = sys.intern(username)
+                _count_add(bucket.usernames, username, 1)
+                _count_add(self._username_counts, username, 1)
+            self._newest_ts = now
+
     def get_stats(self) -> Dict[str, Any]:
         """Get access statistics for monitoring"""
-        logs = self.get_recent_logs()
-        now = datetime.now(timezone.utc)
-        
-        # Count by IP
-        ip_counts = defaultdict(int)
-        # Count by model
-        model_counts = defaultdict(int)
-        # Count by username
-        username_counts = defaultdict(int)
-        # Time-based data for charts
-        time_series = defaultdict(int)
-        
-        for log in logs:
-            ip_counts[log.ip] += 1
-            model_counts[log.model] += 1
-            if log.username:
-                username_counts[log.username] += 1
-            
-            # Group by 1-minute intervals for time series
-            ts = log.timestamp
-            interval = ts.replace(second=0, microsecond=0)
-            time_series[interval.isoformat()] += 1
-        
-        return {
-            "total_requests": len(logs),
-            "unique_ips": len(ip_counts),
-            "unique_models": len(model_counts),
-            "unique_usernames": len(username_counts),
-            "ip_counts": dict(ip_counts),
-            "model_counts": dict(model_counts),
-            "username_counts": dict(username_counts),
-            "time_series": dict(time_series),
-            "retention_hours": self._retention_hours,
-            "oldest_log": logs[0].timestamp.isoformat() if logs else None,
-            "newest_log": logs[-1].timestamp.isoformat() if logs else None,
-        }
+        with self._lock:
+            self._expire_locked(int(time.time() // 60))
+            # Group by 1-minute intervals for time series (UTC ISO keys)
+            time_series = {
+                datetime.fromtimestamp(b.minute * 60, timezone.utc).isoformat(): b.total for b in self._buckets
+            }
+            oldest_ts = self._buckets[0].first_ts if self._buckets else None
+            newest_ts = self._newest_ts if self._buckets else None
+            return {
+                "total_requests": self._total,
+                "unique_ips": len(self._ip_counts),
+                "unique_models": len(self._model_counts),
+                "unique_usernames": len(self._username_counts),
+                "ip_counts": dict(self._ip_counts),
+                "model_counts": dict(self._model_counts),
+                "username_counts": dict(self._username_counts),
+                "time_series": time_series,
+                "retention_hours": self._retention_hours,
+                "oldest_log": datetime.fromtimestamp(oldest_ts, timezone.utc).isoformat() if oldest_ts else None,
+                "newest_log": datetime.fromtimestamp(newest_ts, timezone.utc).isoformat() if newest_ts else None,
+            }
+
+    # ---------- internal ----------
+    def _expire_locked(self, current_minute: int) -> None:
+        """Drop buckets older than the retention period and subtract them from the totals"""
+        cutoff = current_minute - self._retention_minutes
+        while self._buckets and self._buckets[0].minute < cutoff:
+            bucket = self._buckets.popleft()
+            self._total -= bucket.total
+            for key, n in bucket.ips.items():
+                _count_add(self._ip_counts, key, -n)
+            for key, n in bucket.models.items():
+                _count_add(self._model_counts, key, -n)
+            for key, n in bucket.usernames.items():
+                _count_add(self._username_counts, key, -n)
 
 # Global instance
 ACCESS_LOG_MANAGER = AccessLogManager()
 
+# ------------------------------
+# Request Log (durable JSONL with rotation)
+# ------------------------------
+
+
+class RequestLogWriter:
+    """Append-only JSONL request log written by one background thread.
+
+    log() only appends a tuple to a bounded queue and never blocks; when the writer
+    falls behind, records are dropped and counted. The file rotates when it exceeds
+    REQUEST_LOG_MAX_BYTES or the UTC day changes; rotated files older than
+    REQUEST_LOG_KEEP_DAYS are deleted.
+    """
+
+    # Fields of a queued record, in order
+    FIELDS = (
+        "ts", "client", "ip", "method", "path", "requested_model", "selected_model",
+        "backend", "status", "bytes", "duration_ms",
+    )
+
+    def __init__(
+        self,
+        path: str = REQUEST_LOG_PATH,
+        max_bytes: int = REQUEST_LOG_MAX_BYTES,
+        keep_days: int = REQUEST_LOG_KEEP_DAYS,
+        queue_size: int = REQUEST_LOG_QUEUE_SIZE,
+    ) -> None:
+        self._path = path
+        self._max_bytes = max_bytes
+        self._keep_days = keep_days
+        self._queue: "queue.Queue[Tuple[Any, ...]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._file: Any = None
+        self._day = ""
+        self.written = 0
+
+    # ---------- public helpers ----------
+    def start(self) -> None:
+        if not self._path or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+
+    def log(
+        self,
+        client: str,
+        ip: str,
+        method: str,
+        path: str,
+        requested_model: Optional[str],
+        selected_model: Optional[str],
+        backend: str,
+        status: int,
+        nbytes: int,
+        duration: Optional[float],
+    ) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait(
+                (time.time(), client, ip, method, path, requested_model, selected_model, backend, status, nbytes, duration)
+            )
+        except queue.Full:
+            METRIC_REQUEST_LOG_DROPPED.labels().inc()
+
+    # ---------- internal ----------
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is queued and write it with one flush
+            try:
+                while len(batch) < 1000:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"[WARN] request log write failed: {e}", file=sys.stderr)
+                self._close()
+                time.sleep(1.0)
+
+    def _write(self, batch: List[Tuple[Any, ...]]) -> None:
+        lines = []
+        for rec in batch:
+            ts, *rest = rec
+            duration = rest[-1]
+            if duration is not None:
+                # Queued at completion: report when the request arrived
+                ts -= duration
+            values = [
+                datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+                *rest[:-1],
+                round(duration * 1000, 1) if duration is not None else None,
+            ]
+            lines.append(json.dumps(dict(zip(self.FIELDS, values)), ensure_ascii=False))
+        self._rotate_if_needed(datetime.fromtimestamp(batch[-1][0], timezone.utc).strftime("%Y%m%d"))
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        self.written += len(lines)
+
+    def _rotate_if_needed(self, day: str) -> None:
+        if self._file is not None and day == self._day and self._file.tell() < self._max_bytes:
+            return
+        self._close()
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._path) and os.path.getsize(self._path) > 0:
+            mtime_day = datetime.fromtimestamp(os.path.getmtime(self._path), timezone.utc).strftime("%Y%m%d")
+            if mtime_day != day or os.path.getsize(self._path) >= self._max_bytes:
+                root, ext = os.path.splitext(self._path)
+                stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+                target = f"{root}-{stamp}{ext}"
+                n = 1
+                while os.path.exists(target):
+                    target = f"{root}-{stamp}-{n}{ext}"
+                    n += 1
+                os.replace(self._path, target)
+                self._prune(root, ext)
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._day = day
+
+    def _prune(self, root: str, ext: str) -> None:
+        if self._keep_days <= 0:
+            return
+        directory = os.path.dirname(root) or "."
+        prefix = os.path.basename(root) + "-"
+        cutoff = time.time() - self._keep_days * 86400
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(ext):
+                full = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(full) < cutoff:
+                        os.remove(full)
+                except OSError:
+                    pass
+
+    def _close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+
+# Global instance
+REQUEST_LOG = RequestLogWriter()
+
 # ------------------------------
 # In-flight Tracker (Refactored)
 # ------------------------------
@@ -669,16 +1743,26 @@ class InFlightTracker:
             return
         with self._lock:
             self._backend_counts[backend][model] = int(self._backend_counts[backend].get(model, 0)) + 1
+            # Published under the lock so concurrent updates reach the feed in order
+            STATE_FEED.publish("inflight", backend, dict(self._backend_counts[backend]))
 
     def dec(self, backend: str, model: str) -> None:
         if not backend or not model:
             return
         with self._lock:
             cur = int(self._backend_counts[backend].get(model, 0))
-        if cur <= 1:
+            if cur <= 1:
                 self._backend_counts[backend].pop(model, None)
-        else:
+            else:
                 self._backend_counts[backend][model] = cur - 1
+            STATE_FEED.publish("inflight", backend, dict(self._backend_counts[backend]) or None)
+        # A slot was freed: hand it to the oldest queued request
+        ADMISSION_QUEUE.dispatch()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Consistent copy of {backend: {model: count}}"""
+        with self._lock:
+            return {b: dict(models) for b, models in self._backend_counts.items() if models}
 
 
 # Instance creation
@@ -686,68 +1770,167 @@ INFLIGHT_TRACKER = InFlightTracker()
 
 
 # ------------------------------
-# Model Manager (cache & instance utilities)
+# Model Catalog (background-refreshed /v1/models per backend)
 # ------------------------------
 
-# Default TTL for models cache (seconds)
+# Refresh interval for each backend's model list (seconds)
 MODELS_CACHE_TTL = 10
+# Keep serving the last good list this long while a backend fails to answer
+MODELS_STALE_MAX_SECONDS = 60
+
+
+def _parse_model_ids(data: Any) -> List[str]:
+    """Extract model ids from common /v1/models response shapes"""
+    items: Any = None
+    if isinstance(data, dict):
+        items = data.get("data")
+    elif isinstance(data, list):
+        items = data
+    ids: List[str] = []
+    if isinstance(items, list):
+        for item in items:
+            if isinstance(item, str):
+                ids.append(item)
+            elif isinstance(item, dict):
+                mid = item.get("id") or item.get("name")
+                if isinstance(mid, str):
+                    ids.append(mid)
+    return ids
+
+
+class ModelCatalog:
+    """Single cache of model lists per backend.
+
+    Lists are refreshed by a background thread (stale-while-revalidate); readers never
+    wait on the network. Concurrent misses for one backend are merged into one fetch,
+    and the merged /v1/models response is rebuilt after every refresh.
+    """
 
-
-class ModelManager:
-    """Handle model list cache retrieval and instance count calculation"""
-
-    def __init__(self, ttl_seconds: int = MODELS_CACHE_TTL) -> None:
-        self._ttl = ttl_seconds
+    def __init__(self, refresh_seconds: int = MODELS_CACHE_TTL) -> None:
+        self._refresh_seconds = refresh_seconds
         self._lock = threading.Lock()
-        self._cache: Dict[str, Tuple[set, datetime]] = {}
+        # {backend: (models, fetched_at_monotonic)} - fetched_at is of the last successful fetch
+        self._models: Dict[str, Tuple[frozenset, float]] = {}
+        self._pending: set = set()
+        self._merged: Dict[str, Any] = {"object": "list", "data": []}
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="model-catalog")
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- public helpers ----------
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, name="model-catalog", daemon=True)
+        self._thread.start()
 
-    def available_models(self, backend: Optional[str]) -> set:
+    def models(self, backend: Optional[str]) -> frozenset:
+        """Return cached model set of backend (possibly stale); never blocks on a fetch"""
         if not backend:
             backend = SERVER_REGISTRY.fallback_backend or next(iter(SERVER_REGISTRY.model_bases()), None)
         if not backend:
-            return set()
+            return frozenset()
+        with self._lock:
+            entry = self._models.get(backend)
+        if entry is None or time.monotonic() - entry[1] >= self._refresh_seconds:
+            self.refresh_async(backend)
+        return entry[0] if entry else frozenset()
 
-        now = datetime.now(timezone.utc)
+    def merged_payload(self) -> Dict[str, Any]:
+        """Precomputed /v1/models response across all backends"""
         with self._lock:
-            if backend in self._cache:
-                models_set, expires_at = self._cache[backend]
-                if expires_at > now:
-                    return set(models_set)
+            return self._merged
 
-        # Fetch from backend
-        models_set: set = set()
+    def reconcile(self) -> None:
+        """Forget removed backends and fetch lists for new ones at once (config reload)"""
+        current = _get_model_base_urls()
+        with self._lock:
+            for backend in [b for b in self._models if b not in current]:
+                del self._models[backend]
+            self._rebuild_merged_locked()
+            missing = [b for b in current if b not in self._models]
+        for backend in missing:
+            self.refresh_async(backend)
+
+    def refresh_async(self, backend: str) -> None:
+        with self._lock:
+            if backend in self._pending:
+                return
+            self._pending.add(backend)
+        try:
+            self._executor.submit(self._refresh, backend)
+        except RuntimeError:
+            # Executor shut down (interpreter exit)
+            with self._lock:
+                self._pending.discard(backend)
+
+    # ---------- internal ----------
+    def _refresh_loop(self) -> None:
+        while True:
+            for backend in _get_model_base_urls():
+                self.refresh_async(backend)
+            time.sleep(self._refresh_seconds)
+
+    def _refresh(self, backend: str) -> None:
+        try:
+            models_set = self._fetch(backend)
+            now = time.monotonic()
+            with self._lock:
+                if models_set is not None:
+                    self._models[backend] = (models_set, now)
+                else:
+                    entry = self._models.get(backend)
+                    if entry is None or now - entry[1] > MODELS_STALE_MAX_SECONDS:
+                        # Nothing usable: publish empty set (fetched_at stays old so it is retried)
+                        self._models[backend] = (frozenset(), entry[1] if entry else now - self._refresh_seconds)
+                self._rebuild_merged_locked()
+        finally:
+            with self._lock:
+                self._pending.discard(backend)
+
+    def _fetch(self, backend: str) -> Optional[frozenset]:
         url = backend.rstrip("/") + "/v1/models"
+        started = time.monotonic()
         try:
-            resp = requests.get(url, timeout=(CONNECT_TIMEOUT_SEC, HEALTH_READ_TIMEOUT_SEC))
+            resp = UPSTREAM_POOLS.session(backend).get(url, timeout=(CONNECT_TIMEOUT_SEC, HEALTH_READ_TIMEOUT_SEC))
             data: Any = None
             if resp.headers.get("content-type", "").startswith("application/json"):
                 data = resp.json()
-            ids: List[str] = []
-            if isinstance(data, dict):
-                dl = data.get("data")
-                if isinstance(dl, list):
-                    for item in dl:
-                        if isinstance(item, str):
-                            ids.append(item)
-                        elif isinstance(item, dict):
-                            mid = item.get("id") or item.get("name")
-                            if isinstance(mid, str):
-                                ids.append(mid)
-            elif isinstance(data, list):
-                for item in data:
-                    if isinstance(item, str):
-                        ids.append(item)
-                    elif isinstance(item, dict):
-                        mid = item.get("id") or item.get("name")
-                        if isinstance(mid, str):
-                            ids.append(mid)
-            models_set = set(ids)
+            result = frozenset(_parse_model_ids(data))
+            METRIC_CATALOG_FETCH_SECONDS.labels(backend, "ok").observe(time.monotonic() - started)
+            return result
         except Exception:
-            models_set = set()
+            METRIC_CATALOG_FETCH_SECONDS.labels(backend, "error").observe(time.monotonic() - started)
+            return None
 
-        with self._lock:
-            self._cache[backend] = (set(models_set), now + timedelta(seconds=self._ttl))
-        return models_set
+    def _rebuild_merged_locked(self) -> None:
+        current = set(_get_model_base_urls())
+        all_models: set = set()
+        for backend, (models_set, _) in self._models.items():
+            if backend in current:
+                all_models.update(models_set)
+        # Filter models with hyphen numbers
+        # Pattern: model name-number (e.g., model-2, model-3, model-10)
+        filtered_models = sorted(m for m in all_models if not re.match(r'^.+-\d+$', m))
+        self._merged = {
+            "object": "list",
+            "data": [{"id": model, "object": "model"} for model in filtered_models]
+        }
+
+
+# Global instance
+MODEL_CATALOG = ModelCatalog()
+
+
+# ------------------------------
+# Model Manager (instance utilities)
+# ------------------------------
+
+
+class ModelManager:
+    """Handle model list lookup and instance count calculation"""
+
+    def available_models(self, backend: Optional[str]) -> frozenset:
+        return MODEL_CATALOG.models(backend)
 
     # -------- instance helpers --------
     def count_instances(self, backend: str, model: str) -> int:
@@ -788,45 +1971,83 @@ MODEL_MANAGER = ModelManager()
 class BackendSelector:
     """Select optimal backend and instance name from model name and IP"""
 
-    def select(self, ip: str, model: str) -> Tuple[Optional[str], Optional[str]]:
+    def select(
+        self, ip: str, model: str, prefix_digests: Optional[List[bytes]] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
         """Return value: (backend_base_url, selected_model_name)"""
-        backends_for_model = _get_model_backends_for_model(model)
-        if not backends_for_model:
-            return FALLBACK_BACKEND, model
-
-        # Resolve server names to model base URLs, preserve order
-        model_bases = [SERVER_CONFIGS[n]["addr"] + ":" + str(SERVER_CONFIGS[n]["model-port"]) for n in backends_for_model if n in SERVER_CONFIGS]
-        if not model_bases:
-            return FALLBACK_BACKEND, model
+        choice = self.select_admissible(ip, model, prefix_digests)
+        if choice is not None:
+            return choice
+        # Every candidate is at request-max: legacy behaviour is the first configured server
+        for n in _get_model_backends_for_model(model):
+            cfg = SERVER_REGISTRY.get_server(n)
+            if cfg:
+                return cfg.model_base, model
+        return FALLBACK_BACKEND, model
+
+    def select_admissible(
+        self,
+        ip: str,
+        model: str,
+        prefix_digests: Optional[List[bytes]] = None,
+        exclude: "frozenset[str]" = frozenset(),
+    ) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Like select(), but return None when every usable candidate is at its request-max.
+
+        exclude: model base URLs already tried for this request (failover); the backend
+        is None when no candidate is left.
+        """
+        fallback = FALLBACK_BACKEND if FALLBACK_BACKEND not in exclude else None
+        route = _get_model_route_for_model(model)
+        if not route or not route.servers:
+            return fallback, model
+        backends_for_model = route.servers
+
+        # First configured server is the last resort, preserve order
+        first_cfg: Optional[ServerConfig] = None
+        for n in backends_for_model:
+            cfg = SERVER_REGISTRY.get_server(n)
+            if cfg and cfg.model_base not in exclude:
+                first_cfg = cfg
+                break
+        if not first_cfg:
+            return fallback, model
+
+        # Conversation prefix affinity: backend/instance that served the longest matching prefix
+        if prefix_digests:
+            for backend, instance in PREFIX_AFFINITY.lookup(prefix_digests):
+                cfg = SERVER_REGISTRY.server_by_model_base(backend)
+                if not cfg or cfg.name not in backends_for_model or backend in exclude:
+                    continue
+                if BACKEND_MONITOR.get_conservative_status(cfg.health_base) == "invalid":
+                    continue
+                if instance != model and instance not in MODEL_MANAGER.available_models(backend):
+                    continue
+                if INFLIGHT_TRACKER.can_accept_request(backend, instance, cfg.request_max):
+                    return backend, instance
 
         # Sticky first
         sticky = STICKY_MANAGER.get_backend(ip, model=model)
-        if sticky:
-            # sticky is model URL. Convert to health URL for status check
-            sticky_health = sticky.rsplit(":", 1)[0] + ":" + str(SERVER_CONFIGS.get(sticky.rsplit(":",1)[0].split("//")[-1], {}).get("health-port", ""))
-            status = BACKEND_MONITOR.get_conservative_status(sticky_health)
-            if status != "invalid":
-                # Also check request-max of sticky backend
-                sticky_server_name = None
-                for name, config in SERVER_CONFIGS.items():
-                    if config.get("addr") + ":" + str(config.get("model-port")) == sticky:
-                        sticky_server_name = name
-                        break
-                if sticky_server_name:
-                    sticky_cfg = SERVER_REGISTRY.get_server(sticky_server_name)
-                    if sticky_cfg and INFLIGHT_TRACKER.can_accept_request(sticky, model, sticky_cfg.request_max):
-                        return sticky, model  # Adopt sticky backend as it is valid
-
-        # Iterate servers in configured order and return at first match (original behavior)
-        for name in backends_for_model:
-            # Remove "-low", "-medium", "-high" from end of model name
-            modelWithoutSuffix = model
-            for suffix in ["-low", "-medium", "-high"]:
-                if modelWithoutSuffix.endswith(suffix):
-                    modelWithoutSuffix = modelWithoutSuffix[: -len(suffix)]
-                    break
+        if sticky and sticky not in exclude:
+            # sticky is model URL. Resolve its server to check health and request-max
+            sticky_cfg = SERVER_REGISTRY.server_by_model_base(sticky)
+            if sticky_cfg and BACKEND_MONITOR.get_conservative_status(sticky_cfg.health_base) != "invalid":
+                if INFLIGHT_TRACKER.can_accept_request(sticky, model, sticky_cfg.request_max):
+                    return sticky, model  # Adopt sticky backend as it is valid
+
+        # Remove "-low", "-medium", "-high" from end of model name
+        modelWithoutSuffix = model
+        for suffix in ("-low", "-medium", "-high"):
+            if modelWithoutSuffix.endswith(suffix):
+                modelWithoutSuffix = modelWithoutSuffix[: -len(suffix)]
+                break
+
+        # Iterate servers in the pattern's strategy order (config order by default) and return at first match
+        first_with_capacity: Optional[str] = None
+        limited = False
+        for name in route.strategy.order(backends_for_model):
             cfg = SERVER_REGISTRY.get_server(name)
-            if not cfg:
+            if not cfg or cfg.model_base in exclude:
                 continue
             hbase = cfg.health_base
             mbase = cfg.model_base
@@ -837,11 +2058,14 @@ class BackendSelector:
 
             # Check request-max limit
             if not INFLIGHT_TRACKER.can_accept_request(mbase, modelWithoutSuffix, cfg.request_max):
+                limited = True
                 continue
 
             # Model instance count
             if MODEL_MANAGER.count_instances(mbase, modelWithoutSuffix) == 0:
                 continue
+            if first_with_capacity is None:
+                first_with_capacity = mbase
 
             total_inflight, idle_instances = MODEL_MANAGER.instances_inflight_status(mbase, modelWithoutSuffix)
 
@@ -857,8 +2081,12 @@ class BackendSelector:
             if status == "idle":
                 return mbase, model
 
-        # fallback: first backend
-        return model_bases[0], model
+        # fallback: first backend that still has capacity (busy but below request-max)
+        if first_with_capacity is not None:
+            return first_with_capacity, model
+        if limited:
+            return None
+        return first_cfg.model_base, model
 
 
 # Global instance
@@ -866,18 +2094,181 @@ BACKEND_SELECTOR = BackendSelector()
 
 
 # ------------------------------
-# Models List Cache (/v1/models)
+# Admission Queue (request-max back-pressure)
 # ------------------------------
 
-# Default TTL for models cache (seconds)
-MODELS_CACHE_TTL_SECONDS = 10
-_models_cache_lock = threading.Lock()
-# Backend-specific cache: {backend: (models_set, expires_at)}
-_models_cache: Dict[str, Tuple[set, datetime]] = {}
+
+class AdmissionRejected(Exception):
+    """Request could not get a backend slot (queue full or deadline passed)"""
+
+    def __init__(
+        self, status: int, message: str, retry_after: int = ADMISSION_RETRY_AFTER_SEC, model: str = ""
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.model = model
+
+
+class AdmissionTicket:
+    """A request waiting in AdmissionQueue; result is set once a slot was reserved for it"""
+
+    __slots__ = ("model", "select", "deadline", "result", "notify")
+
+    def __init__(self, model: str, select: Any, deadline: float) -> None:
+        self.model = model
+        self.select = select
+        self.deadline = deadline
+        self.result: Optional[Tuple[Optional[str], Optional[str]]] = None
+        self.notify: Any = None
+
+
+class AdmissionQueue:
+    """Per-model FIFO of requests arriving while every candidate backend is at request-max.
+
+    Selection and the in-flight increment happen under one lock, so two requests never
+    take the same last slot. When InFlightTracker.dec frees a slot, dispatch() admits the
+    head of each model queue in arrival order. Requests that cannot queue (bound reached)
+    or wait past their deadline are rejected with AdmissionRejected (429 / 503).
+    """
+
+    def __init__(self, max_wait_seconds: float = ADMISSION_MAX_WAIT_SEC, max_queue: int = ADMISSION_MAX_QUEUE) -> None:
+        self._max_wait = max_wait_seconds
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[AdmissionTicket]] = {}
+
+    # ---------- public helpers ----------
+    def admit(self, model: str, select: Any) -> Any:
+        """Reserve a slot now and return (backend, instance), or return an AdmissionTicket to wait on.
+
+        select() must return (backend, instance) or None when every candidate is saturated.
+        """
+        with self._lock:
+            queue = self._queues.get(model)
+            if not queue:
+                choice = select()
+                if choice is not None:
+                    self._reserve_locked(choice)
+                    return choice
+            if self._max_wait <= 0:
+                raise AdmissionRejected(503, "All backends for this model are at request-max", model=model)
+            if queue and len(queue) >= self._max_queue:
+                raise AdmissionRejected(429, "Too many requests queued for this model", model=model)
+            ticket = AdmissionTicket(model, select, time.monotonic() + self._max_wait)
+            self._queues.setdefault(model, deque()).append(ticket)
+            return ticket
+
+    def reserve(self, select: Any) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Reserve a slot only if one is free right now, ahead of the queue (failover of an admitted request)"""
+        with self._lock:
+            choice = select()
+            if choice is not None:
+                self._reserve_locked(choice)
+            return choice
+
+    def dispatch(self) -> None:
+        """Admit queued requests (FIFO per model) while their selection finds capacity"""
+        if not self._queues:
+            return
+        admitted: List[AdmissionTicket] = []
+        with self._lock:
+            for model in list(self._queues.keys()):
+                queue = self._queues[model]
+                while queue:
+                    head = queue[0]
+                    choice = head.select()
+                    if choice is None:
+                        break
+                    queue.popleft()
+                    self._reserve_locked(choice)
+                    head.result = choice
+                    admitted.append(head)
+                if not queue:
+                    del self._queues[model]
+        for ticket in admitted:
+            if ticket.notify:
+                ticket.notify()
+
+    def wait(self, ticket: AdmissionTicket) -> Tuple[Optional[str], Optional[str]]:
+        """Block the calling thread until the ticket is admitted (raises AdmissionRejected on deadline)"""
+        event = threading.Event()
+        ticket.notify = event.set
+        while ticket.result is None:
+            remaining = ticket.deadline - time.monotonic()
+            if remaining <= 0:
+                return self._expire(ticket)
+            # Wake up periodically too: health/model-list changes can open capacity without a dec
+            event.wait(min(1.0, remaining))
+            event.clear()
+            self.dispatch()
+        return ticket.result
+
+    async def wait_async(self, ticket: AdmissionTicket) -> Tuple[Optional[str], Optional[str]]:
+        """Coroutine variant of wait() for the asyncio engine"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        try:
+            while ticket.result is None:
+                remaining = ticket.deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._expire(ticket)
+                fut = loop.create_future()
+                ticket.notify = lambda: loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(None))
+                if ticket.result is not None:
+                    break
+                try:
+                    await asyncio.wait_for(fut, timeout=min(1.0, remaining))
+                except asyncio.TimeoutError:
+                    self.dispatch()
+            return ticket.result
+        except asyncio.CancelledError:
+            # Client went away while queued
+            self.cancel(ticket)
+            raise
+
+    def cancel(self, ticket: AdmissionTicket) -> None:
+        """Leave the queue; release the slot if it had already been reserved"""
+        with self._lock:
+            queue = self._queues.get(ticket.model)
+            if queue and ticket in queue:
+                queue.remove(ticket)
+                if not queue:
+                    del self._queues[ticket.model]
+            result = ticket.result
+        if result is not None and result[0] and result[1]:
+            INFLIGHT_TRACKER.dec(result[0], result[1])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {model: len(queue) for model, queue in self._queues.items()}
+
+    # ---------- internal ----------
+    def _reserve_locked(self, choice: Tuple[Optional[str], Optional[str]]) -> None:
+        backend, instance = choice
+        if backend and instance:
+            INFLIGHT_TRACKER.inc(backend, instance)
+
+    def _expire(self, ticket: AdmissionTicket) -> Tuple[Optional[str], Optional[str]]:
+        with self._lock:
+            queue = self._queues.get(ticket.model)
+            if ticket.result is None:
+                if queue and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[ticket.model]
+                raise AdmissionRejected(503, "Timed out waiting for a backend slot", model=ticket.model)
+            # Admitted at the last moment
+            return ticket.result
+
+
+# Global instance
+ADMISSION_QUEUE = AdmissionQueue()
 
 
-def _get_available_models_set(backend: Optional[str] = None) -> set:
-    """Get available model set from specified backend
+def _get_available_models_set(backend: Optional[str] = None) -> frozenset:
+    """Get available model set from specified backend (served from MODEL_CATALOG, never blocks)
     
     Args:
         backend: Backend base URL. Uses fallback backend if None
@@ -885,62 +2276,7 @@ def _get_available_models_set(backend: Optional[str] = None) -> set:
     Returns:
         Set of model names
     """
-    global _models_cache
-    now = datetime.now(timezone.utc)
-    
-    # Use fallback if backend is not specified
-    if not backend:
-        backend = FALLBACK_BACKEND or next(iter(_get_model_base_urls()), None)
-    
-    if not backend:
-        return set()
-    
-    # Check cache
-    with _models_cache_lock:
-        if backend in _models_cache:
-            models_set, expires_at = _models_cache[backend]
-            if expires_at > now:
-                return set(models_set)
-    
-    # Fetch if cache is invalid or does not exist
-    models_set: set = set()
-    url = backend.rstrip("/") + "/v1/models"
-    try:
-        resp = requests.get(url, timeout=(CONNECT_TIMEOUT_SEC, HEALTH_READ_TIMEOUT_SEC))
-        data: Any = None
-        if resp.headers.get("content-type", "").startswith("application/json"):
-            try:
-                data = resp.json()
-            except Exception:
-                data = None
-        # Parse common shapes
-        ids: List[str] = []
-        if isinstance(data, dict):
-            dl = data.get("data")
-            if isinstance(dl, list):
-                for item in dl:
-                    if isinstance(item, str):
-                        ids.append(item)
-                    elif isinstance(item, dict):
-                        mid = item.get("id") or item.get("name")
-                        if isinstance(mid, str):
-                            ids.append(mid)
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, str):
-                    ids.append(item)
-                elif isinstance(item, dict):
-                    mid = item.get("id") or item.get("name")
-                    if isinstance(mid, str):
-                        ids.append(mid)
-        models_set = set(ids)
-    except Exception:
-        models_set = set()
-
-    # Update cache
-    with _models_cache_lock:
-        _models_cache[backend] = (set(models_set), now + timedelta(seconds=MODELS_CACHE_TTL_SECONDS))
-        return set(models_set)
+    return MODEL_CATALOG.models(backend)
 
 
 def _extract_username_from_system_messages(messages: Any) -> Optional[str]:
@@ -1046,62 +2382,1778 @@ def _get_model_instances_inflight_status(backend: str, model: str) -> Tuple[int,
     return total_inflight, idle_instances
 
 
-def select_backend_for_model_request(ip: str, model: str) -> Tuple[Optional[str], Optional[str]]:
-    return BACKEND_SELECTOR.select(ip, model)
+def select_backend_for_model_request(
+    ip: str, model: str, prefix_digests: Optional[List[bytes]] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    return BACKEND_SELECTOR.select(ip, model, prefix_digests)
 
 
 # ------------------------------
-# Proxy Utilities
+# Streaming Telemetry (TTFT / inter-chunk gaps / tokens per second)
 # ------------------------------
 
-HOP_BY_HOP_HEADERS = {
-    "connection",
-    "keep-alive",
-    "proxy-authenticate",
-    "proxy-authorization",
-    "te",
-    "trailers",
-    "transfer-encoding",
-    "upgrade",
-}
+# Last usage counters in a response (final SSE chunk or the JSON body)
+_USAGE_PROMPT_RE = re.compile(rb'"prompt_tokens"\s*:\s*(\d+)')
+_USAGE_COMPLETION_RE = re.compile(rb'"completion_tokens"\s*:\s*(\d+)')
 
 
-def _filter_request_headers(headers: Dict[str, str]) -> Dict[str, str]:
-    return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() != "host"}
+class _LatencyStats:
+    """Per backend x instance aggregates (guarded by StreamTelemetry._lock)"""
 
+    __slots__ = (
+        "requests", "errors", "aborted", "prompt_tokens", "completion_tokens",
+        "ttft_ewma", "gap_ewma", "duration_ewma", "tps_ewma", "ttft_hist", "gap_hist",
+    )
 
-def _filtered_response_headers(resp: requests.Response) -> Dict[str, str]:
-    excluded = HOP_BY_HOP_HEADERS | {"content-length"}
-    return {k: v for k, v in resp.headers.items() if k.lower() not in excluded}
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.aborted = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.ttft_ewma: Optional[float] = None
+        self.gap_ewma: Optional[float] = None
+        self.duration_ewma: Optional[float] = None
+        self.tps_ewma: Optional[float] = None
+        self.ttft_hist = [0] * (len(STREAM_TTFT_BUCKETS) + 1)
+        self.gap_hist = [0] * (len(STREAM_GAP_BUCKETS) + 1)
+
+
+def _ewma(prev: Optional[float], value: float) -> float:
+    if prev is None:
+        return value
+    return prev + STREAM_TELEMETRY_EWMA_ALPHA * (value - prev)
+
+
+class StreamObserver:
+    """Watches one upstream response as it is relayed; never touches the bytes it forwards.
+
+    Per-chunk work is a clock read and a histogram bucket increment on local state;
+    StreamTelemetry's lock is taken once, in finish().
+    """
 
+    __slots__ = (
+        "backend", "instance", "status", "started", "first_at", "last_at",
+        "gap_sum", "gap_count", "gap_hist", "tail", "finished",
+    )
 
-def _build_target_url(base: str) -> str:
-    base = base.rstrip("/")
-    path = request.full_path if request.query_string else request.path
-    if path.startswith("/"):
-        return base + path
-    return base + "/" + path
+    # Enough to hold the final usage chunk (and llama-server's timings) of a stream
+    TAIL_BYTES = 4096
+
+    def __init__(self, backend: str, instance: str) -> None:
+        self.backend = backend
+        self.instance = instance
+        self.status = 0
+        self.started = time.monotonic()
+        self.first_at: Optional[float] = None
+        self.last_at = 0.0
+        self.gap_sum = 0.0
+        self.gap_count = 0
+        self.gap_hist = [0] * (len(STREAM_GAP_BUCKETS) + 1)
+        self.tail = b""
+        self.finished = False
+
+    def chunk(self, data: bytes) -> None:
+        now = time.monotonic()
+        if self.first_at is None:
+            self.first_at = now
+        else:
+            gap = now - self.last_at
+            self.gap_sum += gap
+            self.gap_count += 1
+            self.gap_hist[bisect.bisect_left(STREAM_GAP_BUCKETS, gap)] += 1
+        self.last_at = now
+        if len(data) >= self.TAIL_BYTES:
+            self.tail = data[-self.TAIL_BYTES:]
+        else:
+            self.tail = (self.tail + data)[-self.TAIL_BYTES:]
+
+    def finish(self, completed: bool) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        STREAM_TELEMETRY.record(self, completed)
+
+    def usage(self) -> Tuple[Optional[int], Optional[int]]:
+        prompt = _USAGE_PROMPT_RE.findall(self.tail)
+        completion = _USAGE_COMPLETION_RE.findall(self.tail)
+        return (
+            int(prompt[-1]) if prompt else None,
+            int(completion[-1]) if completion else None,
+        )
+
+
+class StreamTelemetry:
+    """Aggregates StreamObserver results per backend x instance for /llmhealth-snapshot"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _LatencyStats] = {}
+
+    # ---------- public helpers ----------
+    def observe(self, backend: str, instance: str) -> StreamObserver:
+        return StreamObserver(backend, instance)
+
+    def record(self, obs: StreamObserver, completed: bool) -> None:
+        prompt_tokens, completion_tokens = obs.usage() if completed else (None, None)
+        with self._lock:
+            st = self._stats.get((obs.backend, obs.instance))
+            if st is None:
+                st = self._stats[(obs.backend, obs.instance)] = _LatencyStats()
+            st.requests += 1
+            if obs.status >= 400 or obs.first_at is None:
+                st.errors += 1
+                return
+            if not completed:
+                # Client went away mid-stream: duration and token rate would be misleading
+                st.aborted += 1
+                return
+            ttft = obs.first_at - obs.started
+            st.ttft_ewma = _ewma(st.ttft_ewma, ttft)
+            st.ttft_hist[bisect.bisect_left(STREAM_TTFT_BUCKETS, ttft)] += 1
+            st.duration_ewma = _ewma(st.duration_ewma, obs.last_at - obs.started)
+            if obs.gap_count:
+                st.gap_ewma = _ewma(st.gap_ewma, obs.gap_sum / obs.gap_count)
+                for i, n in enumerate(obs.gap_hist):
+                    st.gap_hist[i] += n
+            if prompt_tokens:
+                st.prompt_tokens += prompt_tokens
+            if completion_tokens:
+                st.completion_tokens += completion_tokens
+                generating = obs.last_at - obs.first_at
+                if generating > 0 and completion_tokens > 1:
+                    st.tps_ewma = _ewma(st.tps_ewma, (completion_tokens - 1) / generating)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        def _hist(bounds: Tuple[float, ...], counts: List[int]) -> Dict[str, int]:
+            labels = [str(b) for b in bounds] + ["+Inf"]
+            return dict(zip(labels, counts))
+
+        def _r(v: Optional[float]) -> Optional[float]:
+            return round(v, 4) if v is not None else None
+
+        with self._lock:
+            items = list(self._stats.items())
+            return [
+                {
+                    "backend": backend,
+                    "instance": instance,
+                    "requests": st.requests,
+                    "errors": st.errors,
+                    "aborted": st.aborted,
+                    "ttft_ewma_sec": _r(st.ttft_ewma),
+                    "inter_chunk_ewma_sec": _r(st.gap_ewma),
+                    "duration_ewma_sec": _r(st.duration_ewma),
+                    "tokens_per_sec_ewma": _r(st.tps_ewma),
+                    "prompt_tokens": st.prompt_tokens,
+                    "completion_tokens": st.completion_tokens,
+                    "ttft_histogram": _hist(STREAM_TTFT_BUCKETS, st.ttft_hist),
+                    "inter_chunk_histogram": _hist(STREAM_GAP_BUCKETS, st.gap_hist),
+                }
+                for (backend, instance), st in sorted(items, key=lambda kv: kv[0])
+            ]
+
+
+# Global instance
+STREAM_TELEMETRY = StreamTelemetry()
+
+
+# ------------------------------
+# Metrics (Prometheus text exposition)
+# ------------------------------
+
+# Upper bounds (seconds) of proxied request durations (long generations included)
+REQUEST_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CATALOG_FETCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = []
+    for n, v in zip(names, values):
+        v = v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{n}="{v}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class MetricFamily:
+    """Counter or histogram with label children; labels() binds a child once and reuses it.
+
+    Children have their own lock, so updates for different label sets never contend.
+    Hot paths may keep the returned child instead of calling labels() per request.
+    """
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = _HistogramChild(self.buckets) if self.kind == "histogram" else _CounterChild()
+                    self._children[values] = child
+        return child
+
+    def remove(self, *values: str) -> None:
+        with self._lock:
+            self._children.pop(values, None)
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            if self.kind == "histogram":
+                with child._lock:
+                    counts = list(child.counts)
+                    total = child.sum
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = 'le="' + _format_value(bound) + '"'
+                    out.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+                labels = _format_labels(self.labelnames, values)
+                out.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                out.append(f"{self.name}_count{labels} {cumulative}")
+            else:
+                out.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+
+
+class MetricsRegistry:
+    """Owns metric families and scrape-time gauges; render() produces the /metrics body"""
+
+    def __init__(self) -> None:
+        self._families: List[MetricFamily] = []
+        # (name, help, labelnames, collect) where collect() -> [(label_values, value)]
+        self._gauges: List[Tuple[str, str, Tuple[str, ...], Any]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> MetricFamily:
+        family = MetricFamily(name, help_text, "counter", labelnames)
+        self._families.append(family)
+        return family
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]) -> MetricFamily:
+        family = MetricFamily(name, help_text, "histogram", labelnames, buckets)
+        self._families.append(family)
+        return family
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...], collect: Any) -> None:
+        """Gauge read from existing state at scrape time (no cost on the request path)"""
+        self._gauges.append((name, help_text, labelnames, collect))
+
+    def render(self) -> str:
+        out: List[str] = []
+        for family in self._families:
+            family.render(out)
+        for name, help_text, labelnames, collect in self._gauges:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} gauge")
+            try:
+                samples = collect()
+            except Exception:
+                continue
+            for values, value in samples:
+                out.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return "\n".join(out) + "\n"
+
+
+# Global instance
+METRICS = MetricsRegistry()
+
+METRIC_REQUESTS = METRICS.counter(
+    "llama_balancer_requests_total", "Proxied requests by model instance, backend and status code",
+    ("model", "backend", "status"),
+)
+METRIC_REQUEST_SECONDS = METRICS.histogram(
+    "llama_balancer_request_duration_seconds", "Time from request arrival to end of the relayed response",
+    ("model", "backend", "status"), REQUEST_DURATION_BUCKETS,
+)
+METRIC_UPSTREAM_CONNECT_ERRORS = METRICS.counter(
+    "llama_balancer_upstream_connect_errors_total", "Upstream requests that failed before a response", ("backend",),
+)
+METRIC_UPSTREAM_FAILOVERS = METRICS.counter(
+    "llama_balancer_upstream_failovers_total", "Requests retried on another backend after a connection failure",
+    ("backend",),
+)
+METRIC_HEDGES = METRICS.counter(
+    "llama_balancer_hedged_requests_total", "Duplicate requests sent to a second backend, by whether they answered first",
+    ("path", "outcome"),
+)
+METRIC_RESPONSE_CACHE = METRICS.counter(
+    "llama_balancer_response_cache_requests_total", "Cacheable completions by cache result", ("result",),
+)
+METRIC_COALESCED = METRICS.counter(
+    "llama_balancer_coalesced_requests_total",
+    "Deterministic completions by coalescing role (leader sent upstream, follower shared its response)",
+    ("role",),
+)
+METRIC_EMBED_BATCHING = METRICS.counter(
+    "llama_balancer_embedding_batch_requests_total",
+    "Embedding requests seen by the batcher (batched, sent alone, or sent alone after a failed batch)",
+    ("result",),
+)
+METRIC_SCATTER_SHARDS = METRICS.counter(
+    "llama_balancer_scatter_shards_total", "Shards of split embedding/rerank requests by backend and result",
+    ("backend", "result"),
+)
+METRIC_REQUEST_LOG_DROPPED = METRICS.counter(
+    "llama_balancer_request_log_dropped_total", "Request log records dropped because the writer fell behind",
+)
+METRIC_CATALOG_FETCH_SECONDS = METRICS.histogram(
+    "llama_balancer_model_catalog_fetch_seconds", "Background /v1/models fetch latency per backend",
+    ("backend", "result"), CATALOG_FETCH_BUCKETS,
+)
+
+
+def _record_request_metrics(model: str, backend: str, status: int, duration: Optional[float]) -> None:
+    key = (model, backend, str(status))
+    METRIC_REQUESTS.labels(*key).inc()
+    if duration is not None:
+        METRIC_REQUEST_SECONDS.labels(*key).observe(duration)
+
+
+def _collect_inflight() -> List[Tuple[Tuple[str, ...], float]]:
+    return [
+        ((backend, model), n)
+        for backend, models in INFLIGHT_TRACKER.snapshot().items()
+        for model, n in models.items()
+    ]
+
+
+def _collect_backend_state() -> List[Tuple[Tuple[str, ...], float]]:
+    samples = []
+    for base in SERVER_REGISTRY.health_bases():
+        current = BACKEND_MONITOR.get_conservative_status(base)
+        for state in ("idle", "busy", "invalid"):
+            samples.append(((base, state), 1 if current == state else 0))
+    return samples
+
+
+METRICS.gauge("llama_balancer_inflight_requests", "In-flight requests per backend and model instance",
+              ("backend", "model"), _collect_inflight)
+METRICS.gauge("llama_balancer_backend_state", "Conservative health state per health base (1 = current state)",
+              ("health_base", "state"), _collect_backend_state)
+METRICS.gauge("llama_balancer_sticky_sessions", "Sticky session entries", (),
+              lambda: [((), STICKY_MANAGER.size())])
+METRICS.gauge("llama_balancer_response_cache_bytes", "Bytes held by the response cache per tier", ("tier",),
+              lambda: [((tier,), n) for tier, n in RESPONSE_CACHE.size_bytes().items()])
+METRICS.gauge("llama_balancer_admission_queue_depth", "Requests waiting for a request-max slot", ("model",),
+              lambda: [((model,), n) for model, n in ADMISSION_QUEUE.stats().items()])
+
+
+# ------------------------------
+# Request Body Codec
+# ------------------------------
+
+
+def _load_orjson() -> Any:
+    """orjson is optional; the stdlib json module is used when it is not installed"""
+    try:
+        import orjson  # type: ignore
+        return orjson
+    except Exception:
+        return None
+
+
+_ORJSON = _load_orjson()
+
+# Top-level scan of a JSON object: string tokens (keys and values) and brackets
+_JSON_TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_JSON_COLON_RE = re.compile(rb"\s*:\s*")
+# Any JSON string that decodes to "model", spelled with or without \u escapes
+_JSON_MODEL_KEY_RE = re.compile(
+    rb'"(?:m|\\u006[dD])(?:o|\\u006[fF])(?:d|\\u0064)(?:e|\\u0065)(?:l|\\u006[cC])"'
+)
+
+
+def _json_loads(raw: bytes) -> Any:
+    if _ORJSON is not None:
+        try:
+            return _ORJSON.loads(raw)
+        except Exception:
+            # e.g. NaN/Infinity or huge integers, which only the stdlib accepts
+            pass
+    return json.loads(raw)
+
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    if _ORJSON is not None:
+        try:
+            return _ORJSON.dumps(obj)
+        except Exception:
+            pass
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _canonical_json_bytes(obj: Any) -> bytes:
+    """Key-sorted, whitespace-free encoding: equal documents give equal bytes"""
+    if _ORJSON is not None:
+        try:
+            return _ORJSON.dumps(obj, option=_ORJSON.OPT_SORT_KEYS)
+        except Exception:
+            pass
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _rewrite_json_model(raw: bytes, model: str, current: Optional[str] = None) -> Optional[bytes]:
+    """Replace the top-level "model" string of a JSON object in place on the raw bytes.
+
+    Only the spliced value is new; everything else (messages, base64 images) is copied
+    once, never decoded or re-encoded. Returns None when the key is missing, escaped or
+    duplicated, or its value is not `current`, so the caller falls back to re-serializing
+    the parsed body.
+    """
+    # ASCII letters are only \u006x-escaped on purpose; such a key may be the real top-level one
+    if b"\\u006" in raw and any(m.group() != b'"model"' for m in _JSON_MODEL_KEY_RE.finditer(raw)):
+        return None
+    span = _find_unique_model_value(raw)
+    if span is None:
+        span = _scan_top_level_model_value(raw)
+    if span is None:
+        return None
+    if current is not None:
+        try:
+            if json.loads(raw[span[0]:span[1]]) != current:
+                return None
+        except ValueError:
+            return None
+    view = memoryview(raw)
+    return b"".join((view[: span[0]], json.dumps(model, ensure_ascii=False).encode("utf-8"), view[span[1]:]))
+
+
+def _model_value_span(raw: bytes, key_end: int) -> Optional[Tuple[int, int]]:
+    """Span of the string value following a "model" key, or None if the token is not a key"""
+    colon = _JSON_COLON_RE.match(raw, key_end)
+    if colon is None:
+        return None
+    value = _JSON_TOKEN_RE.match(raw, colon.end())
+    if value is None or value.group()[:1] != b'"':
+        return None
+    return value.span()
+
+
+def _find_unique_model_value(raw: bytes) -> Optional[Tuple[int, int]]:
+    """Fast path: quotes inside JSON strings are escaped, so a single unescaped "model" token
+    in the whole body must be the top-level key the parser already found."""
+    pos = raw.find(b'"model"')
+    if pos < 0 or raw.find(b'"model"', pos + 7) >= 0:
+        return None
+    backslashes = 0
+    while pos - backslashes > 0 and raw[pos - backslashes - 1] == 0x5C:
+        backslashes += 1
+    if backslashes % 2:
+        return None
+    return _model_value_span(raw, pos + 7)
+
+
+def _scan_top_level_model_value(raw: bytes) -> Optional[Tuple[int, int]]:
+    """Slow path: tokenize the body, tracking depth, when "model" occurs more than once"""
+    depth = 0
+    span: Optional[Tuple[int, int]] = None
+    for m in _JSON_TOKEN_RE.finditer(raw):
+        tok = m.group()
+        first = tok[:1]
+        if first == b'"':
+            if depth == 1 and tok == b'"model"':
+                if _JSON_COLON_RE.match(raw, m.end()) is None:
+                    continue  # a value that happens to be "model"
+                value = _model_value_span(raw, m.end())
+                if span is not None or value is None:
+                    return None
+                span = value
+        elif first in b"{[":
+            depth += 1
+        else:
+            depth -= 1
+    return span
+
+
+# ------------------------------
+# Proxy Utilities
+# ------------------------------
+
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+def _filter_request_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() != "host"}
+
+
+def _filter_response_headers(headers: Any) -> Dict[str, str]:
+    excluded = HOP_BY_HOP_HEADERS | {"content-length"}
+    return {k: v for k, v in headers.items() if k.lower() not in excluded}
+
+
+def _filtered_response_headers(resp: requests.Response) -> Dict[str, str]:
+    return _filter_response_headers(resp.headers)
+
+
+def _join_target_url(base: str, path: str) -> str:
+    base = base.rstrip("/")
+    if path.startswith("/"):
+        return base + path
+    return base + "/" + path
+
+
+def _build_target_url(base: str) -> str:
+    path = request.full_path if request.query_string else request.path
+    return _join_target_url(base, path)
+
+
+# Upper bound for one socket read while relaying text/event-stream bodies
+SSE_READ_SIZE = 64 * 1024
+
+# A partial event larger than this is forwarded without waiting for its blank line
+SSE_MAX_PENDING_BYTES = 1024 * 1024
+
+_SSE_SEPARATORS = (b"\n\n", b"\r\n\r\n", b"\r\r")
+
+
+def _is_event_stream(headers: Any) -> bool:
+    return (headers.get("Content-Type") or "").lower().startswith("text/event-stream")
+
+
+def _event_stream_response_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Ask reverse proxies (nginx etc.) and caches not to hold back relayed events"""
+    headers["X-Accel-Buffering"] = "no"
+    if not any(k.lower() == "cache-control" for k in headers):
+        headers["Cache-Control"] = "no-cache"
+    return headers
+
+
+class SSEEventFramer:
+    """Re-frame a relayed text/event-stream so only complete events are sent on.
+
+    Socket reads may split an event or carry several; everything up to the last
+    blank line is released at once and the partial tail waits in one reusable
+    buffer. A read that ends exactly on an event boundary (the usual case for
+    token streams) is passed through without copying.
+    """
+
+    __slots__ = ("_pending",)
+
+    def __init__(self) -> None:
+        self._pending = bytearray()
+
+    def feed(self, chunk: bytes) -> bytes:
+        pending = self._pending
+        if not pending and chunk.endswith(_SSE_SEPARATORS):
+            return chunk
+        start = max(0, len(pending) - 3)
+        pending += chunk
+        end = 0
+        for sep in _SSE_SEPARATORS:
+            i = pending.rfind(sep, start)
+            if i >= 0:
+                end = max(end, i + len(sep))
+        if end == 0:
+            if len(pending) < SSE_MAX_PENDING_BYTES:
+                return b""
+            end = len(pending)
+        with memoryview(pending) as view:
+            out = bytes(view[:end])
+        del pending[:end]
+        return out
+
+    def flush(self) -> bytes:
+        out = bytes(self._pending)
+        self._pending.clear()
+        return out
+
+
+def _iter_event_stream(resp: requests.Response) -> Iterable[bytes]:
+    """Yield complete SSE events as soon as they arrive (no fixed-size read-ahead)"""
+    framer = SSEEventFramer()
+    raw = resp.raw
+    read1 = getattr(raw, "read1", None)
+    if read1 is not None:
+        chunks: Iterable[bytes] = iter(lambda: read1(SSE_READ_SIZE), b"")
+    else:
+        # Older urllib3: chunked bodies are still yielded one HTTP chunk at a time
+        chunks = raw.stream(SSE_READ_SIZE, decode_content=True)
+    for chunk in chunks:
+        out = framer.feed(chunk)
+        if out:
+            yield out
+    tail = framer.flush()
+    if tail:
+        yield tail
+
+
+def _stream_upstream_response(resp: requests.Response, on_complete, on_chunk=None) -> Iterable[bytes]:
+    """Relay the upstream body; on_complete(completed) runs once, also on client disconnect"""
+    completed = False
+    if _is_event_stream(resp.headers):
+        body = _iter_event_stream(resp)
+    else:
+        body = resp.iter_content(chunk_size=8192)
+    try:
+        for chunk in body:
+            if chunk:
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                yield chunk
+        completed = True
+    except GeneratorExit:
+        try:
+            resp.close()
+        finally:
+            raise
+    except Exception:
+        # Ensure upstream closed
+        resp.close()
+        raise
+    finally:
+        try:
+            on_complete(completed)
+        except Exception:
+            pass
+
+
+# ------------------------------
+# Upstream Failover
+# ------------------------------
+
+# Methods that may be repeated even if the failed attempt could have reached the backend
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RetryBudget:
+    """Token bucket bounding extra upstream attempts (failover retries, hedges) to a share of traffic.
+
+    Every request deposits `ratio` tokens and every extra attempt spends one; `min_per_sec`
+    tokens trickle in regardless so a quiet balancer can still fail over.
+    """
+
+    def __init__(
+        self,
+        ratio: float = FAILOVER_RETRY_BUDGET_RATIO,
+        min_per_sec: float = FAILOVER_RETRY_BUDGET_MIN_PER_SEC,
+        burst: float = FAILOVER_RETRY_BUDGET_BURST,
+    ) -> None:
+        self._ratio = ratio
+        self._min_per_sec = min_per_sec
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + self._ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._min_per_sec)
+            self._updated = now
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+# Global instance
+RETRY_BUDGET = RetryBudget()
+
+
+def _requests_never_sent(exc: BaseException) -> bool:
+    """True when a requests error shows the connection was never established"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+# ------------------------------
+# Request Hedging
+# ------------------------------
+
+
+class HedgeController:
+    """Opt-in hedging of short idempotent calls (embeddings, tokenize, ...).
+
+    Tail latency of these calls is set by a backend stalled behind a long generation.
+    When the selected backend has not answered after the path's recent p95 latency, the
+    request is duplicated to a second backend that serves the model; the first good answer
+    is relayed and the other attempt is dropped (cancelled on the asyncio engine). Hedges
+    spend a shared budget of HEDGE_BUDGET_PERCENT of hedgeable requests.
+    """
+
+    def __init__(self, paths: Tuple[str, ...] = HEDGE_PATHS, window: int = HEDGE_SAMPLE_WINDOW) -> None:
+        self._paths = frozenset(paths)
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._p95: Dict[str, float] = {}
+        self._recorded = 0
+        self._budget = RetryBudget(ratio=HEDGE_BUDGET_PERCENT / 100.0, min_per_sec=0.0, burst=HEDGE_BUDGET_BURST)
+
+    # ---------- public helpers ----------
+    @staticmethod
+    def path_of(plan: "ProxyPlan") -> str:
+        return plan.full_path.split("?", 1)[0].rstrip("/")
+
+    def applies(self, plan: "ProxyPlan") -> bool:
+        """True for hedgeable requests (also fills plan.requested_model from the body)"""
+        if not HEDGE_ENABLED or plan.method != "POST" or self.path_of(plan) not in self._paths:
+            return False
+        if not plan.requested_model:
+            try:
+                body = _json_loads(plan.raw_body or b"")
+            except Exception:
+                return False
+            model = body.get("model") if isinstance(body, dict) else None
+            if not isinstance(model, str) or not model:
+                return False
+            plan.requested_model = model
+        self._budget.deposit()
+        return True
+
+    def delay(self, plan: "ProxyPlan") -> Optional[float]:
+        """Seconds to wait before hedging; None until the path has enough latency samples"""
+        with self._lock:
+            p95 = self._p95.get(self.path_of(plan))
+        return None if p95 is None else max(p95, HEDGE_MIN_DELAY_MS / 1000.0)
+
+    def record(self, plan: "ProxyPlan", seconds: float) -> None:
+        path = self.path_of(plan)
+        with self._lock:
+            samples = self._samples.get(path)
+            if samples is None:
+                samples = self._samples[path] = deque(maxlen=self._window)
+            samples.append(seconds)
+            self._recorded += 1
+            if len(samples) >= HEDGE_MIN_SAMPLES and (path not in self._p95 or self._recorded % 16 == 0):
+                ordered = sorted(samples)
+                self._p95[path] = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def pick_backend(self, plan: "ProxyPlan") -> Optional[Tuple[str, str]]:
+        """(backend, model name to send) of a second backend for the plan's model with a free slot,
+        or None (also when the budget is spent). Instance names (model-2, ...) are per server, so
+        the hedge always names the requested model."""
+        model = plan.requested_model or ""
+        route = _get_model_route_for_model(model)
+        names = route.servers if route and route.servers else SERVER_REGISTRY.server_names()
+        for name in names:
+            cfg = SERVER_REGISTRY.get_server(name)
+            if not cfg or cfg.model_base == plan.backend:
+                continue
+            if BACKEND_MONITOR.get_conservative_status(cfg.health_base) == "invalid":
+                continue
+            if model not in MODEL_MANAGER.available_models(cfg.model_base):
+                continue
+            if not INFLIGHT_TRACKER.can_accept_request(cfg.model_base, model, cfg.request_max):
+                continue
+            if not self._budget.try_spend():
+                return None
+            return cfg.model_base, model
+        return None
+
+    def outcome(self, plan: "ProxyPlan", hedge_won: bool) -> None:
+        METRIC_HEDGES.labels(self.path_of(plan), "won" if hedge_won else "lost").inc()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {path: round(v * 1000.0, 1) for path, v in self._p95.items()}
+
+
+# Global instance
+HEDGER = HedgeController()
+
+
+# ------------------------------
+# Response Cache
+# ------------------------------
+
+
+def _request_credentials(headers: Dict[str, str]) -> str:
+    """The caller's Authorization header ("" when absent)"""
+    return next((v for k, v in headers.items() if k.lower() == "authorization"), "")
+
+
+def _deterministic_request_key(path: str, body: Any, credentials: str = "") -> Optional[bytes]:
+    """Identity of a deterministic request (temperature 0 or a fixed seed), or None when its
+    answer may differ between calls. Used by the response cache and request coalescing.
+
+    `credentials` scopes the key to one caller, so an answer obtained with one API key is
+    never handed to a request made without it.
+    """
+    if not isinstance(body, dict):
+        return None
+    temperature = body.get("temperature")
+    seed = body.get("seed")
+    deterministic = (
+        isinstance(temperature, (int, float)) and not isinstance(temperature, bool) and temperature == 0
+    ) or (isinstance(seed, int) and not isinstance(seed, bool) and seed >= 0)
+    if not deterministic:
+        return None
+    h = hashlib.sha256(path.encode("utf-8"))
+    h.update(b"\0")
+    h.update(hashlib.sha256(credentials.encode("utf-8")).digest())
+    h.update(_canonical_json_bytes(body))
+    return h.digest()
+
+
+class CachedResponse:
+    """A complete upstream answer: JSON body or the recorded SSE stream"""
+
+    __slots__ = ("status", "content_type", "body", "expires")
+
+    def __init__(self, status: int, content_type: str, body: bytes, expires: float) -> None:
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.expires = expires
+
+    @property
+    def is_stream(self) -> bool:
+        return self.content_type.lower().startswith("text/event-stream")
+
+
+class ResponseCache:
+    """Exact-match cache of deterministic chat and text completions (opt-in, RESPONSE_CACHE=1).
+
+    Keyed on a hash of the canonical request body after ApplyCustomCompletions, so
+    byte-identical eval/CI prompts with temperature 0 or a fixed seed skip the GPU.
+    The memory tier is an LRU bounded by bytes. With RESPONSE_CACHE_DIR set, entries
+    are also written to disk by a background thread; a memory miss reads the file
+    through mmap and promotes it. Disk entries survive restarts.
+    """
+
+    _HEADER_END = b"\n"
+
+    def __init__(
+        self,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SEC,
+        disk_dir: str = RESPONSE_CACHE_DIR,
+        disk_max_bytes: int = RESPONSE_CACHE_DISK_MAX_BYTES,
+    ) -> None:
+        self._max_bytes = max_bytes
+        # One response may use at most 1/8 of the memory tier
+        self.max_entry_bytes = max_bytes // 8
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._disk_dir = disk_dir
+        self._disk_max_bytes = disk_max_bytes
+        self._disk: "OrderedDict[bytes, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_queue: "queue.Queue[Tuple[bytes, CachedResponse]]" = queue.Queue(maxsize=1024)
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- public helpers ----------
+    @property
+    def enabled(self) -> bool:
+        return RESPONSE_CACHE_ENABLED and self._max_bytes > 0
+
+    @property
+    def reads_disk(self) -> bool:
+        """get() may block on file I/O (a disk tier is configured)"""
+        return self.enabled and bool(self._disk_dir)
+
+    def start(self) -> None:
+        if not self.enabled or not self._disk_dir or (self._thread and self._thread.is_alive()):
+            return
+        os.makedirs(self._disk_dir, exist_ok=True)
+        self._load_disk_index()
+        self._thread = threading.Thread(target=self._disk_loop, name="response-cache-disk", daemon=True)
+        self._thread.start()
+
+    def get(self, key: bytes) -> Optional[CachedResponse]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > now:
+                    self._entries.move_to_end(key)
+                    METRIC_RESPONSE_CACHE.labels("hit").inc()
+                    return entry
+                self._drop_locked(key)
+            on_disk = key in self._disk
+        entry = self._read_disk(key, now) if on_disk else None
+        METRIC_RESPONSE_CACHE.labels("hit" if entry is not None else "miss").inc()
+        if entry is not None:
+            with self._lock:
+                self._insert_locked(key, entry)
+        return entry
+
+    def put(self, key: bytes, status: int, content_type: str, body: bytes) -> None:
+        if len(body) > self.max_entry_bytes:
+            return
+        expires = time.time() + self._ttl if self._ttl > 0 else float("inf")
+        entry = CachedResponse(status, content_type, body, expires)
+        with self._lock:
+            self._insert_locked(key, entry)
+        if self._thread is not None:
+            try:
+                self._disk_queue.put_nowait((key, entry))
+            except queue.Full:
+                pass
+
+    def size_bytes(self) -> Dict[str, int]:
+        with self._lock:
+            sizes = {"memory": self._bytes}
+            if self._disk_dir:
+                sizes["disk"] = self._disk_bytes
+            return sizes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # ---------- internal ----------
+    def _insert_locked(self, key: bytes, entry: CachedResponse) -> None:
+        self._drop_locked(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        while self._bytes > self._max_bytes and self._entries:
+            self._drop_locked(next(iter(self._entries)))
+
+    def _drop_locked(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def _disk_path(self, key: bytes) -> str:
+        return os.path.join(self._disk_dir, key.hex() + ".bin")
+
+    def _read_disk(self, key: bytes, now: float) -> Optional[CachedResponse]:
+        import mmap
+
+        try:
+            with open(self._disk_path(key), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.find(self._HEADER_END)
+                meta = json.loads(mm[:end])
+                if meta["expires"] <= now:
+                    raise ValueError("expired")
+                entry = CachedResponse(meta["status"], meta["content_type"], mm[end + 1:], meta["expires"])
+        except Exception:
+            self._forget_disk(key, remove=True)
+            return None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        return entry
+
+    def _write_disk(self, key: bytes, entry: CachedResponse) -> None:
+        expires = entry.expires if entry.expires != float("inf") else 1e18
+        meta = json.dumps({"status": entry.status, "content_type": entry.content_type, "expires": expires})
+        path = self._disk_path(key)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(meta.encode("utf-8") + self._HEADER_END)
+            f.write(entry.body)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        evict: List[bytes] = []
+        with self._lock:
+            self._disk_bytes += size - self._disk.pop(key, 0)
+            self._disk[key] = size
+            while self._disk_bytes > self._disk_max_bytes and len(self._disk) > 1:
+                old, old_size = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(self._disk_path(old))
+            except OSError:
+                pass
+
+    def _forget_disk(self, key: bytes, remove: bool = False) -> None:
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+        if remove:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def _load_disk_index(self) -> None:
+        """Index files left by a previous run, oldest access first"""
+        found: List[Tuple[float, bytes, int]] = []
+        for name in os.listdir(self._disk_dir):
+            if not name.endswith(".bin"):
+                continue
+            try:
+                key = bytes.fromhex(name[:-4])
+                st = os.stat(os.path.join(self._disk_dir, name))
+            except (ValueError, OSError):
+                continue
+            found.append((st.st_mtime, key, st.st_size))
+        with self._lock:
+            for _, key, size in sorted(found):
+                self._disk[key] = size
+                self._disk_bytes += size
+
+    def _disk_loop(self) -> None:
+        while True:
+            key, entry = self._disk_queue.get()
+            try:
+                self._write_disk(key, entry)
+            except Exception as exc:
+                print(f"[WARN] response cache write failed: {exc}", file=sys.stderr)
+
+
+# Global instance
+RESPONSE_CACHE = ResponseCache()
+
+
+# ------------------------------
+# Request Coalescing
+# ------------------------------
+
+
+class Flight:
+    """One upstream response shared by identical concurrent requests.
+
+    The leader's upstream body is pumped into `chunks` independently of any client; every
+    client (leader included) replays it from the start and then follows live chunks, so a
+    reader that disconnects never cuts the stream short for the others. Readers block on
+    `wait()` (threads) or register a wake callback and poll `read()` (event loop).
+    """
+
+    def __init__(self, key: bytes) -> None:
+        self.key = key
+        self.cond = threading.Condition()
+        self.chunks: List[bytes] = []
+        self.status = 0
+        self.headers: Dict[str, str] = {}
+        self.started = False
+        self.failed = False
+        self.done = False
+        self.completed = False
+        self.readers = 0
+        self._had_readers = False
+        self._wakes: List[Any] = []
+
+    # ---------- public helpers ----------
+    def start(self, status: int, headers: Dict[str, str]) -> None:
+        with self.cond:
+            self.status = status
+            self.headers = headers
+            self.started = True
+        self._notify()
+
+    def push(self, chunk: bytes) -> None:
+        with self.cond:
+            self.chunks.append(chunk)
+        self._notify()
+
+    def close(self, completed: bool) -> None:
+        with self.cond:
+            self.done = True
+            self.completed = completed
+        self._notify()
+
+    def fail(self) -> None:
+        """The leader got no upstream response: waiting followers route on their own"""
+        with self.cond:
+            if self.started:
+                return
+            self.failed = True
+            self.done = True
+        self._notify()
+
+    def subscribe(self, wake: Any = None) -> None:
+        with self.cond:
+            self.readers += 1
+            self._had_readers = True
+            if wake is not None:
+                self._wakes.append(wake)
+
+    def unsubscribe(self, wake: Any = None) -> None:
+        with self.cond:
+            self.readers -= 1
+            if wake is not None and wake in self._wakes:
+                self._wakes.remove(wake)
+
+    @property
+    def abandoned(self) -> bool:
+        """Every reader went away: the pump may stop reading upstream"""
+        return self._had_readers and self.readers <= 0
+
+    def wait_started(self) -> bool:
+        """Block until the leader has a response (True) or gave up (False)"""
+        with self.cond:
+            while not self.started and not self.failed:
+                self.cond.wait()
+            return self.started
+
+    def read(self, index: int) -> Tuple[List[bytes], bool]:
+        """Chunks from `index` on, and whether they end the stream"""
+        with self.cond:
+            return self.chunks[index:], self.done
+
+    def wait(self, index: int, timeout: float = 1.0) -> Tuple[List[bytes], bool]:
+        with self.cond:
+            if index >= len(self.chunks) and not self.done:
+                self.cond.wait(timeout)
+            return self.chunks[index:], self.done
+
+    # ---------- internal ----------
+    def _notify(self) -> None:
+        with self.cond:
+            self.cond.notify_all()
+            wakes = list(self._wakes)
+        for wake in wakes:
+            try:
+                wake()
+            except Exception:
+                pass
+
+
+class RequestCoalescer:
+    """Single-flight registry of in-flight deterministic requests (opt-in, COALESCE_REQUESTS=1).
+
+    Keyed like the response cache. The first request for a key leads and goes upstream
+    with its own slot; requests arriving before it finishes attach as followers, take no
+    slot and receive a copy of its response.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[bytes, Flight] = {}
+
+    # ---------- public helpers ----------
+    @property
+    def enabled(self) -> bool:
+        return COALESCE_ENABLED
+
+    def attach(self, key: bytes) -> Tuple[Flight, bool]:
+        """Return (flight, is_leader) for a request with this key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not flight.done:
+                METRIC_COALESCED.labels("follower").inc()
+                return flight, False
+            flight = Flight(key)
+            self._flights[key] = flight
+        METRIC_COALESCED.labels("leader").inc()
+        return flight, True
+
+    def release(self, flight: Flight) -> None:
+        """Stop attaching new requests to `flight`"""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            flights = list(self._flights.values())
+        return {"flights": len(flights), "readers": sum(max(0, f.readers) for f in flights)}
+
+
+# Global instance
+COALESCER = RequestCoalescer()
+
+
+# ------------------------------
+# Embedding Batching
+# ------------------------------
+
+
+def _embedding_inputs(body: Any) -> Optional[List[str]]:
+    """The `input` strings of an embeddings body, or None when it is not a plain string batch"""
+    inputs = body.get("input") if isinstance(body, dict) else None
+    if isinstance(inputs, str):
+        return [inputs]
+    if isinstance(inputs, list) and inputs and all(isinstance(x, str) for x in inputs):
+        return inputs
+    return None
+
+
+def _apportion(value: int, weights: List[int]) -> List[int]:
+    """Largest-remainder split of `value` by weight. Every part with a non-zero weight gets
+    at least 1 when `value` allows it; the shares always sum to `value`."""
+    total = sum(weights)
+    if not total:
+        weights, total = [1] * len(weights), len(weights)
+    shares = [value * w // total for w in weights]
+    by_remainder = sorted(range(len(weights)), key=lambda i: (-(value * weights[i] % total), i))
+    for i in by_remainder[:value - sum(shares)]:
+        shares[i] += 1
+    if value >= sum(1 for w in weights if w):
+        for i, w in enumerate(weights):
+            if w and not shares[i]:
+                # Some other part holds at least 2 here; take one from the largest
+                largest = max(range(len(shares)), key=shares.__getitem__)
+                shares[largest] -= 1
+                shares[i] = 1
+    return shares
+
+
+def _split_usage(usage: Any, weights: List[int]) -> List[Any]:
+    """Apportion an upstream `usage` object over parts by weight; totals are preserved"""
+    if not isinstance(usage, dict):
+        return [usage] * len(weights)
+    parts: List[Dict[str, Any]] = [dict(usage) for _ in weights]
+    for name, value in usage.items():
+        if not isinstance(value, int) or isinstance(value, bool):
+            continue
+        for part, share in zip(parts, _apportion(value, weights)):
+            part[name] = share
+    return parts
+
+
+class _EmbeddingBatch:
+    __slots__ = ("backend", "instance", "target_url", "headers", "data", "params", "deadline", "inputs", "members")
+
+    def __init__(self, plan: "ProxyPlan", params: Dict[str, Any], deadline: float) -> None:
+        self.backend = plan.backend
+        self.instance = plan.selected_model
+        self.target_url = plan.target_url
+        # The first member's own body, sent as is when nobody joins it
+        self.data = plan.data
+        self.headers = {k: v for k, v in plan.headers.items() if k.lower() != "content-length"}
+        self.params = params
+        self.deadline = deadline
+        self.inputs: List[str] = []
+        # (offset into inputs, count, weight, future)
+        self.members: List[Tuple[int, int, int, Future]] = []
+
+
+class EmbeddingBatcher:
+    """Opt-in micro-batching of small /v1/embeddings calls across clients (EMBED_BATCHING=1).
+
+    Requests routed to the same target with the same parameters (model, encoding_format, ...)
+    that arrive within EMBED_BATCH_WINDOW_MS are merged into one upstream call with the
+    combined `input` list, up to EMBED_BATCH_MAX_INPUTS. The response's `data` is split back
+    by index and `usage` is apportioned by input length. A request left alone in its window
+    is sent unchanged; one whose batch fails upstream goes through the regular path.
+
+    Members lend their request-max slot to the batcher on joining and the batch holds a
+    single slot for its upstream call, so a batch is not capped at the backend's request-max.
+    """
+
+    PATHS = frozenset(("/v1/embeddings",))
+
+    def __init__(self, window_ms: float = EMBED_BATCH_WINDOW_MS, max_inputs: int = EMBED_BATCH_MAX_INPUTS) -> None:
+        self._window = window_ms / 1000.0
+        self._max_inputs = max_inputs
+        self._cond = threading.Condition()
+        self._batches: Dict[Tuple[str, bytes, str], _EmbeddingBatch] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---------- public helpers ----------
+    @property
+    def enabled(self) -> bool:
+        return EMBED_BATCH_ENABLED and self._max_inputs > 1
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._executor = ThreadPoolExecutor(max_workers=EMBED_BATCH_MAX_WORKERS, thread_name_prefix="embed-batch")
+        self._thread = threading.Thread(target=self._loop, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def applies(self, plan: "ProxyPlan") -> bool:
+        return (
+            self.enabled
+            and self._executor is not None
+            and plan.method == "POST"
+            and bool(plan.target_url)
+            and HedgeController.path_of(plan) in self.PATHS
+        )
+
+    def submit(self, plan: "ProxyPlan") -> Optional[Future]:
+        """Queue the request into a batch. The future resolves to (status, content_type, body),
+        or None when the caller should send the request itself; None here means not batchable."""
+        try:
+            body = _json_loads(plan.data or b"")
+        except Exception:
+            return None
+        inputs = _embedding_inputs(body)
+        if inputs is None or len(inputs) >= self._max_inputs:
+            return None
+        params = {k: v for k, v in body.items() if k != "input"}
+        key = (plan.target_url, _canonical_json_bytes(params), _request_credentials(plan.headers))
+        future: Future = Future()
+        with self._cond:
+            batch = self._batches.get(key)
+            if batch is not None and len(batch.inputs) + len(inputs) > self._max_inputs:
+                self._dispatch_locked(key)
+                batch = None
+            if batch is None:
+                batch = self._batches[key] = _EmbeddingBatch(plan, params, time.monotonic() + self._window)
+                self._cond.notify()
+            batch.members.append((len(batch.inputs), len(inputs), sum(len(x) for x in inputs), future))
+            batch.inputs.extend(inputs)
+            if len(batch.inputs) >= self._max_inputs:
+                self._dispatch_locked(key)
+        plan.lend_slot()
+        return future
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(b.members) for b in self._batches.values())
+
+    # ---------- internal ----------
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                for key in [k for k, b in self._batches.items() if b.deadline <= now]:
+                    self._dispatch_locked(key)
+                deadline = min((b.deadline for b in self._batches.values()), default=None)
+                self._cond.wait(None if deadline is None else max(0.0, deadline - now))
+
+    def _dispatch_locked(self, key: Tuple[str, bytes, str]) -> None:
+        batch = self._batches.pop(key)
+        assert self._executor is not None
+        self._executor.submit(self._send, batch)
+
+    def _send(self, batch: _EmbeddingBatch) -> None:
+        # The members' slots were lent on joining: the batch holds one for its upstream call
+        INFLIGHT_TRACKER.inc(batch.backend, batch.instance)
+        try:
+            results = self._call(batch)
+        finally:
+            INFLIGHT_TRACKER.dec(batch.backend, batch.instance)
+        single = len(batch.members) == 1
+        for result, (_, _, _, future) in zip(results, batch.members):
+            METRIC_EMBED_BATCHING.labels(
+                "fallback" if result is None else "single" if single else "batched"
+            ).inc()
+            future.set_result(result)
+
+    def _call(self, batch: _EmbeddingBatch) -> List[Any]:
+        """One upstream call for the batch: a (status, content_type, body) per member, None where
+        the member must be sent on its own"""
+        results: List[Any] = [None] * len(batch.members)
+        try:
+            if len(batch.members) == 1:
+                # Nobody joined: relay the answer to the unchanged request
+                resp = UPSTREAM_POOLS.session(batch.backend).post(
+                    batch.target_url,
+                    headers=batch.headers,
+                    data=batch.data,
+                    allow_redirects=False,
+                    timeout=(UPSTREAM_CONNECT_TIMEOUT_SEC, None),
+                )
+                return [(resp.status_code, resp.headers.get("Content-Type", "application/json"), resp.content)]
+            body = dict(batch.params)
+            body["input"] = batch.inputs
+            resp = UPSTREAM_POOLS.session(batch.backend).post(
+                batch.target_url,
+                headers=batch.headers,
+                data=_json_dumps_bytes(body),
+                allow_redirects=False,
+                timeout=(UPSTREAM_CONNECT_TIMEOUT_SEC, None),
+            )
+            payload = _json_loads(resp.content) if resp.status_code == 200 else None
+            data = payload.get("data") if isinstance(payload, dict) else None
+            if isinstance(data, list) and len(data) == len(batch.inputs):
+                ordered = sorted(data, key=lambda d: d.get("index", 0) if isinstance(d, dict) else 0)
+                usages = _split_usage(payload.get("usage"), [m[2] for m in batch.members])
+                for i, (offset, count, _, _) in enumerate(batch.members):
+                    items = []
+                    for j, item in enumerate(ordered[offset:offset + count]):
+                        item = dict(item)
+                        item["index"] = j
+                        items.append(item)
+                    part = dict(payload)
+                    part["data"] = items
+                    if usages[i] is not None:
+                        part["usage"] = usages[i]
+                    results[i] = (200, "application/json", _json_dumps_bytes(part))
+            else:
+                print(f"[WARN] embedding batch of {len(batch.inputs)} inputs to {batch.backend} "
+                      f"failed ({resp.status_code}); sending requests one by one", file=sys.stderr)
+        except Exception as exc:
+            print(f"[WARN] embedding batch to {batch.backend} failed: {exc}; sending requests one by one", file=sys.stderr)
+        return results
+
+
+# Global instance
+EMBED_BATCHER = EmbeddingBatcher()
+
+
+# ------------------------------
+# Scatter-Gather
+# ------------------------------
+
+
+def _sum_usage(usages: List[Any]) -> Any:
+    """Add up the integer fields of per-shard `usage` objects"""
+    total: Dict[str, Any] = {}
+    for usage in usages:
+        if not isinstance(usage, dict):
+            continue
+        for name, value in usage.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                total[name] = total.get(name, 0) + value
+            else:
+                total.setdefault(name, value)
+    return total or None
+
+
+class ScatterGather:
+    """Opt-in splitting of large embedding and rerank requests across backends (SCATTER_GATHER=1).
+
+    A request with at least SCATTER_MIN_INPUTS items (`input` for embeddings, `documents`
+    for rerank) is cut into contiguous shards, one per healthy backend serving the model
+    that has a free request-max slot, sized by the servers' weights. Shards run in
+    parallel, each holding a slot on its backend; the results are re-indexed, put back
+    in input order and their `usage` summed. If fewer than two backends qualify, or any
+    shard fails, the request takes the regular single-backend path.
+    """
+
+    # path -> name of the list that is split
+    PATHS = {
+        "/v1/embeddings": "input",
+        "/v1/rerank": "documents",
+        "/v1/reranking": "documents",
+        "/rerank": "documents",
+        "/reranking": "documents",
+    }
+
+    def __init__(self, min_inputs: int = SCATTER_MIN_INPUTS, min_shard: int = SCATTER_MIN_SHARD_INPUTS) -> None:
+        self._min_inputs = max(2, min_inputs)
+        self._min_shard = max(1, min_shard)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # ---------- public helpers ----------
+    @property
+    def enabled(self) -> bool:
+        return SCATTER_ENABLED
+
+    def applies(self, plan: "ProxyPlan") -> bool:
+        return self.enabled and plan.method == "POST" and HedgeController.path_of(plan) in self.PATHS
+
+    def submit(self, plan: "ProxyPlan") -> Optional[Future]:
+        """Start the shards; the future resolves to (status, content_type, body), or None when the
+        caller should send the request itself. Returns None when the request is not split."""
+        field_name = self.PATHS[HedgeController.path_of(plan)]
+        try:
+            body = _json_loads(plan.data or b"")
+        except Exception:
+            return None
+        items = body.get(field_name) if isinstance(body, dict) else None
+        model = plan.requested_model or (body.get("model") if isinstance(body, dict) else None)
+        if not isinstance(items, list) or len(items) < self._min_inputs or not isinstance(model, str) or not model:
+            return None
+        if field_name == "input" and not all(
+            isinstance(x, str) or (isinstance(x, list) and all(isinstance(t, int) for t in x)) for x in items
+        ):
+            # A flat list of token ids is one pre-tokenized prompt, not a batch of inputs
+            return None
+        targets = self._reserve_targets(plan, model, max(1, len(items) // self._min_shard))
+        if len(targets) < 2:
+            for base, reserved, _ in targets:
+                if reserved:
+                    INFLIGHT_TRACKER.dec(base, model)
+            return None
+        shards = []
+        total_weight = sum(w for _, _, w in targets)
+        offset = 0
+        for i, (base, reserved, weight) in enumerate(targets):
+            if i == len(targets) - 1:
+                count = len(items) - offset
+            else:
+                # Every later shard keeps at least one item
+                count = max(1, min(len(items) * weight // total_weight, len(items) - offset - (len(targets) - 1 - i)))
+            shard = dict(body)
+            shard[field_name] = items[offset:offset + count]
+            if base != plan.backend:
+                # Instance names (model-2, ...) are per server; other servers get the requested name
+                shard["model"] = model
+            shards.append((base, reserved, offset, shard))
+            offset += count
+        executor = self._get_executor()
+        headers = {k: v for k, v in plan.headers.items() if k.lower() != "content-length"}
+        futures = [executor.submit(self._send_shard, plan, model, headers, *shard) for shard in shards]
+        result: Future = Future()
+        done = [0]
+
+        def _collect(_: Future) -> None:
+            with self._lock:
+                done[0] += 1
+                if done[0] < len(futures):
+                    return
+            try:
+                result.set_result(self._merge(body, field_name, [f.result() for f in futures]))
+            except Exception as exc:
+                print(f"[WARN] scatter-gather of {plan.full_path} failed: {exc}; sending it to one backend",
+                      file=sys.stderr)
+                result.set_result(None)
+
+        for f in futures:
+            f.add_done_callback(_collect)
+        return result
+
+    # ---------- internal ----------
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=SCATTER_MAX_WORKERS, thread_name_prefix="scatter")
+            return self._executor
+
+    def _reserve_targets(self, plan: "ProxyPlan", model: str, limit: int) -> List[Tuple[str, bool, int]]:
+        """(model base, slot reserved here, weight) of each backend that takes a shard"""
+        route = _get_model_route_for_model(model)
+        names = route.servers if route and route.servers else SERVER_REGISTRY.server_names()
+        # The request's own backend first: its admitted slot must not sit idle through the scatter
+        names = sorted(names, key=lambda n: getattr(SERVER_REGISTRY.get_server(n), "model_base", None) != plan.backend)
+        targets: List[Tuple[str, bool, int]] = []
+        for name in names:
+            if len(targets) >= limit:
+                break
+            cfg = SERVER_REGISTRY.get_server(name)
+            if not cfg or any(t[0] == cfg.model_base for t in targets):
+                continue
+            if cfg.model_base == plan.backend and plan.selected_model:
+                # The request's own slot covers this backend's shard
+                targets.append((cfg.model_base, False, max(1, cfg.weight)))
+                continue
+            if BACKEND_MONITOR.get_conservative_status(cfg.health_base) == "invalid":
+                continue
+            if model not in MODEL_MANAGER.available_models(cfg.model_base):
+                continue
+            choice = ADMISSION_QUEUE.reserve(
+                lambda cfg=cfg: (cfg.model_base, model)
+                if INFLIGHT_TRACKER.can_accept_request(cfg.model_base, model, cfg.request_max) else None
+            )
+            if choice is not None:
+                targets.append((cfg.model_base, True, max(1, cfg.weight)))
+        return targets
+
+    def _send_shard(
+        self,
+        plan: "ProxyPlan",
+        model: str,
+        headers: Dict[str, str],
+        base: str,
+        reserved: bool,
+        offset: int,
+        shard: Dict[str, Any],
+    ) -> Tuple[int, Dict[str, Any]]:
+        try:
+            resp = UPSTREAM_POOLS.session(base).post(
+                _join_target_url(base, plan.full_path),
+                headers=headers,
+                data=_json_dumps_bytes(shard),
+                allow_redirects=False,
+                timeout=(UPSTREAM_CONNECT_TIMEOUT_SEC, None),
+            )
+            if resp.status_code != 200:
+                raise ValueError(f"{base} answered {resp.status_code}")
+            payload = _json_loads(resp.content)
+            if not isinstance(payload, dict):
+                raise ValueError(f"{base} sent a non-object body")
+            METRIC_SCATTER_SHARDS.labels(base, "ok").inc()
+            return offset, payload
+        except Exception:
+            METRIC_SCATTER_SHARDS.labels(base, "error").inc()
+            raise
+        finally:
+            if reserved:
+                INFLIGHT_TRACKER.dec(base, model)
+
+    @staticmethod
+    def _merge(
+        body: Dict[str, Any], field_name: str, parts: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[int, str, bytes]:
+        merged = dict(parts[0][1])
+        key = "data" if field_name == "input" else "results"
+        items: List[Any] = []
+        ranked = False
+        for offset, payload in parts:
+            shard_items = payload.get(key)
+            if not isinstance(shard_items, list):
+                raise ValueError(f"shard response without `{key}`")
+            indices = [item.get("index", 0) for item in shard_items]
+            ranked = ranked or indices != sorted(indices)
+            for item in shard_items:
+                item = dict(item)
+                item["index"] = item.get("index", 0) + offset
+                items.append(item)
+        top_n = body.get("top_n")
+        if key == "results" and (ranked or isinstance(top_n, int)):
+            # Rerank answers ranked by score: rank the union, then apply top_n to it
+            items.sort(key=lambda r: r.get("relevance_score", 0.0), reverse=True)
+            if isinstance(top_n, int) and not isinstance(top_n, bool) and top_n >= 0:
+                items = items[:top_n]
+        else:
+            items.sort(key=lambda r: r["index"])
+        merged[key] = items
+        usage = _sum_usage([payload.get("usage") for _, payload in parts])
+        if usage is not None:
+            merged["usage"] = usage
+        return 200, "application/json", _json_dumps_bytes(merged)
+
+
+# Global instance
+SCATTER = ScatterGather()
+
+
+# ------------------------------
+# Config Hot Reload
+# ------------------------------
+
+
+class ConfigReloader:
+    """Reload server-list.json without restarting (file watch or POST /admin/reload).
+
+    The new file is fully parsed and validated before anything is swapped; a broken
+    edit is reported and the running config stays. In-flight counts and sticky
+    entries are keyed by backend URL, so servers that remain keep them. Requests
+    already streaming from a removed server finish normally.
+    """
+
+    def __init__(self, path: str = SERVER_LIST_JSON, interval: float = CONFIG_WATCH_INTERVAL_SEC) -> None:
+        self._path = path
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._signature = self._file_signature()
+        self.generation = 0
+
+    # ---------- public helpers ----------
+    def start(self) -> None:
+        if self._interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._watch_loop, name="config-watch", daemon=True)
+        self._thread.start()
+
+    def reload(self, source: str = "admin") -> Dict[str, Any]:
+        with self._lock:
+            self._signature = self._file_signature()
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                return self._rejected(source, [f"cannot read {self._path}: {e}"])
+            parsed, errors = _parse_server_list(data)
+            if not errors and not parsed.get("server_configs"):
+                errors = ["no servers defined"]
+            if errors:
+                return self._rejected(source, errors)
+
+            old_names = set(SERVER_REGISTRY.server_names())
+            _apply_server_list(parsed)
+            self._reconcile()
+            self.generation += 1
+            new_names = SERVER_REGISTRY.server_names()
+            result = {
+                "ok": True,
+                "generation": self.generation,
+                "servers": new_names,
+                "patterns": len(MODEL_PATTERN_LIST),
+                "added": sorted(set(new_names) - old_names),
+                "removed": sorted(old_names - set(new_names)),
+            }
+        print(
+            f"[INFO] reloaded {self._path} ({source}): {len(new_names)} servers, "
+            f"added {result['added']}, removed {result['removed']}"
+        )
+        return result
+
+    # ---------- internal ----------
+    def _rejected(self, source: str, errors: List[str]) -> Dict[str, Any]:
+        for err in errors:
+            print(f"[WARN] reload of {self._path} ({source}) rejected: {err}", file=sys.stderr)
+        return {"ok": False, "generation": self.generation, "errors": errors}
+
+    def _reconcile(self) -> None:
+        model_bases = set(SERVER_REGISTRY.model_bases())
+        STICKY_MANAGER.retain_backends(model_bases)
+        # Stop pollers of removed servers before their sessions are closed
+        BACKEND_MONITOR.reconcile()
+        UPSTREAM_POOLS.retain(model_bases | set(SERVER_REGISTRY.health_bases()))
+        MODEL_CATALOG.reconcile()
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
 
+    def _watch_loop(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            signature = self._file_signature()
+            if signature is not None and signature != self._signature:
+                # Editors may write in several steps; wait for the file to settle
+                time.sleep(min(0.5, self._interval))
+                if self._file_signature() == signature:
+                    self.reload("file watch")
+
+
+# Global instance
+CONFIG_RELOADER = ConfigReloader()
 
-def _stream_upstream_response(resp: requests.Response, on_complete) -> Iterable[bytes]:
-    try:
-        for chunk in resp.iter_content(chunk_size=8192):
-            if chunk:
-                yield chunk
-    except GeneratorExit:
-        try:
-            resp.close()
-        finally:
-            raise
-    except Exception:
-        # Ensure upstream closed
-        resp.close()
-        raise
-    finally:
-        try:
-            on_complete()
-        except Exception:
-            pass
+
+def _admin_allowed(headers: Any, remote_addr: Optional[str]) -> bool:
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(headers.get("Authorization", ""), f"Bearer {ADMIN_TOKEN}")
+    # Peer address only: X-Forwarded-For is client-controlled
+    return remote_addr in ("127.0.0.1", "::1", "::ffff:127.0.0.1")
 
 
 # ------------------------------
@@ -1113,16 +4165,20 @@ def favicon():
     # Not proxied, return empty response (204 No Content)
     return Response(status=204)
 
-@app.route("/llmhealth", methods=["GET"])  # Not proxied
-def llmhealth() -> Response:
+def _build_llmhealth_payload() -> Dict[str, Any]:
     max_util = LOCAL_GPU_MONITOR.get_max()
     status = "busy" if max_util >= 50.0 else "idle"
 
-    return jsonify({
+    return {
         "status": status,
         "gpu_util_max5s": max_util,
         "window_seconds": WINDOW_SECONDS,
-    })
+    }
+
+
+@app.route("/llmhealth", methods=["GET"])  # Not proxied
+def llmhealth() -> Response:
+    return jsonify(_build_llmhealth_payload())
 
 
 @app.route("/access-log-stats", methods=["GET"])  # Access log statistics
@@ -1131,8 +4187,7 @@ def access_log_stats() -> Response:
     stats = ACCESS_LOG_MANAGER.get_stats()
     return jsonify(stats)
 
-@app.route("/llmhealth-snapshot", methods=["GET"])  # JSON for monitor
-def llmhealth_snapshot() -> Response:
+def _build_snapshot_payload() -> Dict[str, Any]:
     # Build local summary
     local_max = LOCAL_GPU_MONITOR.get_max()
     local_status = "busy" if local_max >= 50.0 else "idle"
@@ -1140,6 +4195,7 @@ def llmhealth_snapshot() -> Response:
     health_bases = SERVER_REGISTRY.health_bases()
     metrics_snapshot = BACKEND_MONITOR.snapshot_metrics(health_bases)
     
+    inflight = INFLIGHT_TRACKER.snapshot()
     backends = []
     for base in health_bases:
         m = metrics_snapshot.get(base)
@@ -1147,16 +4203,13 @@ def llmhealth_snapshot() -> Response:
         
         # Get inflight information (using modelurl)
         modelurl = SERVER_REGISTRY.modelurl_by_health_base(base)
-        backend_inflight = INFLIGHT_TRACKER._backend_counts.get(modelurl, {}) if modelurl else {}
+        backend_inflight = inflight.get(modelurl, {}) if modelurl else {}
         total_inflight = sum(backend_inflight.values())
         model_inflight = dict(backend_inflight)
         
         # Get request_max information
-        request_max = None
-        for name, config in SERVER_CONFIGS.items():
-            if config.get("addr") + ":" + str(config.get("health-port")) == base:
-                request_max = config.get("request-max")
-                break
+        srv = SERVER_REGISTRY.server_by_health_base(base)
+        request_max = srv.request_max if srv else None
         
         backends.append({
             "base": base,
@@ -1177,27 +4230,19 @@ def llmhealth_snapshot() -> Response:
             }
             if srv.request_max is not None:
                 server_info["request_max"] = srv.request_max
+            if srv.weight != 1:
+                server_info["weight"] = srv.weight
             servers_view[name] = server_info
     # Also return model-specific structure (for simple display)
     models_view = {}
     for compiled_pattern, server_names, pattern_str in SERVER_REGISTRY.model_patterns:
         models_view[pattern_str] = list(server_names)
+    model_strategies = {p: st.name for p, st in MODEL_PATTERN_STRATEGIES.items()}
 
     # Create sticky details snapshot (lock protected)
-    STICKY_MANAGER.cleanup()
-    with STICKY_MANAGER._lock:
-        sticky_items = [
-            {
-                "key": k,
-                "ip": (k.split("|")[0] if "|" in k else k),
-                "model": (k.split("|", 1)[1] if "|" in k else None),
-                "backend": v[0],
-                "updated_at": v[1].isoformat().replace("+00:00", "Z"),
-            }
-            for k, v in STICKY_MANAGER._map.items()
-        ]
+    sticky_items = STICKY_MANAGER.snapshot()
 
-    return jsonify({
+    return {
         "local": {
             "status": local_status,
             "gpu_util_max5s": local_max,
@@ -1206,45 +4251,109 @@ def llmhealth_snapshot() -> Response:
         "backends": backends,
         "servers": servers_view,
         "models": models_view,
+        "model_strategies": model_strategies,
+        "upstream_pools": UPSTREAM_POOLS.stats(),
+        "prefix_affinity": PREFIX_AFFINITY.stats(),
+        "admission_queues": ADMISSION_QUEUE.stats(),
+        "stream_telemetry": STREAM_TELEMETRY.snapshot(),
+        "hedge_delay_ms": HEDGER.snapshot(),
+        "response_cache": RESPONSE_CACHE.stats(),
+        "coalescing": COALESCER.stats(),
+        "embedding_batch_pending": EMBED_BATCHER.pending(),
         "sticky_count": len(sticky_items),
         "sticky": sticky_items,
+        "feed_version": STATE_FEED.version,
         "now": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-    })
+    }
+
+
+def _parse_feed_since(value: Optional[str]) -> int:
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        return 0
+
+
+def _state_feed_message(since: int) -> Tuple[int, Optional[bytes]]:
+    """Next SSE message for a client at version `since`: full state, changes, or None if up to date"""
+    version, changes = STATE_FEED.changes_since(since)
+    if changes is None:
+        version, state = STATE_FEED.snapshot()
+        event, data = "snapshot", {"v": version, "state": state}
+    elif changes:
+        event, data = "delta", {"v": version, "changes": changes}
+    else:
+        return version, None
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return version, f"id: {version}\nevent: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+STATE_FEED_HEADERS = {
+    "Content-Type": "text/event-stream; charset=utf-8",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+@app.route("/llmhealth-events", methods=["GET"])  # SSE state feed for the monitor
+def llmhealth_events() -> Response:
+    since = _parse_feed_since(request.args.get("since") or request.headers.get("Last-Event-ID"))
+
+    def _events() -> Iterable[bytes]:
+        wake = threading.Event()
+        STATE_FEED.subscribe(wake.set)
+        try:
+            version = since
+            last_sent = 0.0
+            while True:
+                version, message = _state_feed_message(version)
+                now = time.monotonic()
+                if message is not None:
+                    yield message
+                    last_sent = now
+                elif now - last_sent >= STATE_FEED_KEEPALIVE_SEC:
+                    yield b": keepalive\n\n"
+                    last_sent = now
+                # Sleep until something changes or a keepalive is due; after a wake-up, let a burst
+                # of changes accumulate
+                if wake.wait(max(0.0, last_sent + STATE_FEED_KEEPALIVE_SEC - time.monotonic())):
+                    time.sleep(STATE_FEED_BATCH_SEC)
+                    wake.clear()
+        finally:
+            STATE_FEED.unsubscribe(wake.set)
+
+    return Response(stream_with_context(_events()), headers=STATE_FEED_HEADERS, direct_passthrough=True)
+
+
+@app.route("/llmhealth-snapshot", methods=["GET"])  # JSON for monitor
+def llmhealth_snapshot() -> Response:
+    return jsonify(_build_snapshot_payload())
+
+
+def _build_models_payload() -> Dict[str, Any]:
+    """Aggregate models from all backends and return filtered models excluding those with hyphen numbers"""
+    return MODEL_CATALOG.merged_payload()
 
 
 @app.route("/v1/models", methods=["GET"])
 def models() -> Response:
-    """Aggregate models from all backends and return filtered models excluding those with hyphen numbers"""
-    all_models = set()
-    
-    # Get model list from all backends
-    for server_name in SERVER_REGISTRY.server_names():
-        model_base = _get_model_base_url(server_name)
-        if model_base:
-            backend_models = _get_available_models_set(model_base)
-            all_models.update(backend_models)
-    
-    # Filter models with hyphen numbers
-    # Pattern: model name-number (e.g., model-2, model-3, model-10)
-    filtered_models = []
-    for model in all_models:
-        # Check hyphen number pattern
-        if re.match(r'^.+-\d+$', model):
-            continue  # Exclude models with hyphen numbers
-        filtered_models.append(model)
-    
-    # Sort and return
-    filtered_models.sort()
-    
-    return jsonify({
-        "object": "list",
-        "data": [{"id": model, "object": "model"} for model in filtered_models]
-    })
+    return jsonify(_build_models_payload())
 
 
-@app.route("/llmhealth-monitor", methods=["GET"])  # HTML monitor page
-def llmhealth_monitor() -> Response:
-    html = """
+@app.route("/admin/reload", methods=["POST"])  # Reload server-list.json
+def admin_reload() -> Response:
+    if not _admin_allowed(request.headers, request.remote_addr):
+        return jsonify({"error": "Forbidden"}), 403
+    result = CONFIG_RELOADER.reload("admin")
+    return jsonify(result), 200 if result["ok"] else 400
+
+
+@app.route("/metrics", methods=["GET"])  # Prometheus scrape target
+def metrics() -> Response:
+    return Response(METRICS.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+LLMHEALTH_MONITOR_HTML = """
 <!doctype html>
 <html lang=\"en\">
   <head>
@@ -1308,7 +4417,7 @@ def llmhealth_monitor() -> Response:
     
     <!-- Access Log Section -->
     <div>
-      <h3>Access Log (Last 1 Hour)</h3>
+      <h3>Access Log (Last <span id="access-retention">1 Hour</span>)</h3>
       <div class="stats-grid">
         <div class="stat-card">
           <div class="stat-value" id="total-requests">0</div>
@@ -1351,10 +4460,82 @@ def llmhealth_monitor() -> Response:
     </div>
     
     <script>
+      // Live state from /llmhealth-events (SSE); /llmhealth-snapshot supplies config and the no-SSE fallback
+      const feed = { local: {}, backends: {}, inflight: {}, sticky: {} };
+      let config = { bases: [], modelBase: {}, requestMax: {} };
+      let feedLive = false;
+      let renderPending = false;
+
       async function refresh(){
         try{
           const r = await fetch('/llmhealth-snapshot', { cache: 'no-store' });
           const j = await r.json();
+          const modelBase = {};
+          Object.values(j.servers || {}).forEach(s => { modelBase[s.health_base] = s.model_base; });
+          config = {
+            bases: (j.backends || []).map(b => b.base),
+            modelBase,
+            requestMax: Object.fromEntries((j.backends || []).map(b => [b.base, b.request_max])),
+          };
+          if (feedLive) scheduleRender(); else render(j);
+        }catch(e){
+          console.error(e);
+        }
+      }
+
+      function renderFromFeed(){
+        const bases = config.bases.length ? config.bases : Object.keys(feed.backends);
+        const backends = bases.map(base => {
+          const b = feed.backends[base] || {};
+          const counts = feed.inflight[config.modelBase[base]] || {};
+          return {
+            base,
+            status: b.status || 'busy',
+            last: b.last,
+            total_inflight: Object.values(counts).reduce((a, c) => a + c, 0),
+            model_inflight: counts,
+            request_max: config.requestMax[base],
+          };
+        });
+        const sticky = Object.values(feed.sticky).sort((a, b) => (a.updated_at < b.updated_at ? -1 : 1));
+        render({
+          now: new Date().toISOString(),
+          sticky_count: sticky.length,
+          local: feed.local.local || { status: 'idle', gpu_util_max5s: 0 },
+          backends,
+          sticky,
+        });
+      }
+
+      function scheduleRender(){
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => { renderPending = false; renderFromFeed(); });
+      }
+
+      function connectFeed(){
+        if (!window.EventSource) return;
+        // The browser resumes from Last-Event-ID after a reconnect, so only missed changes are sent
+        const es = new EventSource('/llmhealth-events');
+        es.addEventListener('snapshot', e => {
+          const m = JSON.parse(e.data);
+          Object.keys(feed).forEach(s => { feed[s] = m.state[s] || {}; });
+          feedLive = true;
+          scheduleRender();
+        });
+        es.addEventListener('delta', e => {
+          JSON.parse(e.data).changes.forEach(c => {
+            const section = feed[c.s] || (feed[c.s] = {});
+            if (c.d === null) delete section[c.k]; else section[c.k] = c.d;
+          });
+          feedLive = true;
+          scheduleRender();
+        });
+        es.onerror = () => { feedLive = false; };
+      }
+
+      function render(j){
+        try{
           document.getElementById('now').textContent = j.now;
           document.getElementById('sticky').textContent = 'sticky: ' + j.sticky_count;
           const ls = document.getElementById('local-status');
@@ -1411,6 +4592,9 @@ def llmhealth_monitor() -> Response:
           document.getElementById('unique-ips').textContent = stats.unique_ips || 0;
           document.getElementById('unique-models').textContent = stats.unique_models || 0;
           document.getElementById('unique-usernames').textContent = stats.unique_usernames || 0;
+          const hours = stats.retention_hours || 1;
+          document.getElementById('access-retention').textContent =
+            hours < 1 ? `${Math.round(hours * 60)} Minutes` : `${hours} Hour${hours === 1 ? '' : 's'}`;
           
           // Draw model chart
           drawBarChart('model-chart', stats.model_counts || {});
@@ -1497,13 +4681,20 @@ def llmhealth_monitor() -> Response:
       
       refresh();
       refreshAccessLogs();
-      setInterval(refresh, 5000);
+      connectFeed();
+      // Poll only while the feed is down; otherwise just pick up config changes
+      setInterval(() => { if (!feedLive) refresh(); }, 5000);
+      setInterval(refresh, 60000);
       setInterval(refreshAccessLogs, 10000);
     </script>
   </body>
 </html>
-    """
-    return Response(html, mimetype="text/html; charset=utf-8")
+"""
+
+
+@app.route("/llmhealth-monitor", methods=["GET"])  # HTML monitor page
+def llmhealth_monitor() -> Response:
+    return Response(LLMHEALTH_MONITOR_HTML, mimetype="text/html; charset=utf-8")
 
 
 def ApplyCustomClineGBNF(body: Dict[str, Any]):
@@ -1559,38 +4750,314 @@ def ApplyCustomCompletions(body: Dict[str, Any]) -> bool:
                 break
     return modified
 
-@app.route("/", defaults={"path": ""}, methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
-@app.route("/<path:path>", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
-def proxy(path: str) -> Response:
-    client_ip = _get_client_ip()
-    client_ident = client_ip  # Default is IP. Replace with username from system prompt if available
-    backend: Optional[str] = None
+
+@dataclass(frozen=True)
+class EndpointRoute:
+    """How a model-bearing endpoint is routed.
+
+    generates: token generation (stream telemetry; response cache / coalescing when cacheable).
+    messages: body key holding chat-style messages (username and prefix affinity), if any.
+    rewrites: apply ApplyCustomCompletions (chat only).
+    slot: counts against request-max (and may queue); False for cheap utility calls.
+    """
+    kind: str
+    generates: bool = False
+    cacheable: bool = False
+    messages: Optional[str] = None
+    rewrites: bool = False
+    slot: bool = True
+
+
+_CHAT_ROUTE = EndpointRoute("chat", generates=True, cacheable=True, messages="messages", rewrites=True)
+_COMPLETION_ROUTE = EndpointRoute("completion", generates=True, cacheable=True)
+_EMBEDDING_ROUTE = EndpointRoute("embedding")
+_RERANK_ROUTE = EndpointRoute("rerank")
+_UTILITY_ROUTE = EndpointRoute("utility", slot=False)
+
+# POST endpoints routed by the body's "model" (path without trailing slash); others go to the fallback
+ENDPOINT_ROUTES: Dict[str, EndpointRoute] = {
+    "/v1/chat/completions": _CHAT_ROUTE,
+    "/chat/completions": _CHAT_ROUTE,
+    "/v1/completions": _COMPLETION_ROUTE,
+    "/completions": _COMPLETION_ROUTE,
+    "/completion": _COMPLETION_ROUTE,
+    "/infill": _COMPLETION_ROUTE,
+    "/v1/responses": EndpointRoute("responses", generates=True, messages="input"),
+    "/v1/messages": EndpointRoute("messages", generates=True, messages="messages"),
+    "/v1/embeddings": _EMBEDDING_ROUTE,
+    "/embeddings": _EMBEDDING_ROUTE,
+    "/embedding": _EMBEDDING_ROUTE,
+    "/v1/rerank": _RERANK_ROUTE,
+    "/v1/reranking": _RERANK_ROUTE,
+    "/rerank": _RERANK_ROUTE,
+    "/reranking": _RERANK_ROUTE,
+    "/tokenize": _UTILITY_ROUTE,
+    "/detokenize": _UTILITY_ROUTE,
+    "/apply-template": _UTILITY_ROUTE,
+    "/v1/messages/count_tokens": _UTILITY_ROUTE,
+}
+
+
+@dataclass
+class ProxyPlan:
+    """Routing decision and upstream request for one proxied call (shared by both serving engines)
+
+    Model-routed requests hold their in-flight slot from admission on; when every backend
+    was saturated, `admission` is set and the engine waits on ADMISSION_QUEUE before assign().
+    """
+    method: str
+    full_path: str
+    headers: Dict[str, str]
+    raw_body: Optional[bytes]
+    client_ident: str
+    backend: str = ""
+    target_url: str = ""
+    data: Optional[bytes] = None
     selected_model: Optional[str] = None
+    endpoint: Optional[EndpointRoute] = None
+    prefix_digests: Optional[List[bytes]] = None
+    body: Any = None
+    # body_modified: structural edits (full re-encode); model_changed: only "model" differs from raw_body
+    body_modified: bool = False
+    model_changed: bool = False
+    # Slot handed to EmbeddingBatcher while the request waits in a batch
+    slot_lent: bool = False
+    admission: Optional[AdmissionTicket] = None
+    observer: Optional[StreamObserver] = None
+    started: float = field(default_factory=time.monotonic)
+    status: int = 0
+    client_ip: str = ""
+    requested_model: Optional[str] = None
+    bytes_out: int = 0
+    # Model base URLs that failed to connect for this request
+    tried: "frozenset[str]" = frozenset()
+    # Response cache: key of a cacheable miss (the relayed body is captured), or the entry of a hit
+    cache_key: Optional[bytes] = None
+    cached: Optional[CachedResponse] = None
+    content_type: str = ""
+    capture: Optional[List[bytes]] = None
+    captured: int = 0
+    # Request coalescing: the flight this request leads (sends upstream) or follows
+    flight: Optional[Flight] = None
+    leads_flight: bool = False
+
+    def assign(self, backend: str, instance: Optional[str]) -> None:
+        """Bind backend/instance and build the upstream request"""
+        self.backend = backend
+        self.admission = None
+        self.target_url = _join_target_url(backend, self.full_path)
+        if instance:
+            self.selected_model = instance
+            # Use selected instance if available
+            if isinstance(self.body, dict) and self.body.get("model") != instance:
+                self.body["model"] = instance
+                self.model_changed = True
+            if LOG_BACKEND_SELECTION:
+                print(f"[INFO] selected backend and model: {backend} | {instance}")
+        # Get request data (use updated body when model is changed)
+        if self.body_modified and self.body:
+            # Serialize updated body when it was edited beyond the model name
+            self.data = _json_dumps_bytes(self.body)
+        elif self.model_changed and self.raw_body:
+            # Only the model differs: splice it into the original bytes
+            self.data = (
+                _rewrite_json_model(self.raw_body, self.selected_model or "", self.requested_model)
+                or _json_dumps_bytes(self.body)
+            )
+        else:
+            # Use original request data in normal cases
+            self.data = self.raw_body if self.method in {"POST", "PUT", "PATCH"} else None
+
+    def observe(self) -> Optional[StreamObserver]:
+        """Start timing the upstream call (routed completions only); call right before sending"""
+        if self.endpoint is not None and self.endpoint.generates and self.selected_model:
+            self.observer = STREAM_TELEMETRY.observe(self.backend, self.selected_model)
+        return self.observer
+
+    def set_status(self, status: int, content_type: str = "") -> None:
+        self.status = status
+        self.content_type = content_type
+        if self.observer is not None:
+            self.observer.status = status
+        if self.cache_key is not None and status == 200:
+            self.capture = []
+
+    def on_chunk(self, chunk: bytes) -> None:
+        """Called for every relayed response chunk"""
+        self.bytes_out += len(chunk)
+        if self.observer is not None:
+            self.observer.chunk(chunk)
+        if self.capture is not None:
+            self.captured += len(chunk)
+            if self.captured > RESPONSE_CACHE.max_entry_bytes:
+                self.capture = None
+            else:
+                self.capture.append(chunk)
+
+    def on_connected(self) -> None:
+        if self.endpoint is not None and self.selected_model:
+            STICKY_MANAGER.update_backend(self.client_ident, self.backend, model=self.selected_model)
+            if self.prefix_digests:
+                PREFIX_AFFINITY.record(self.prefix_digests, self.backend, self.selected_model)
+
+    def abort(self) -> None:
+        # Upstream connection failed: release the slot without touching sticky state
+        self._release_attempt()
+        self._record(502)
+        self.release_flight()
+
+    def cancel(self) -> None:
+        """Client went away before a response was relayed: release the slot and the flight"""
+        try:
+            self.finish(False)
+        finally:
+            self.release_flight()
+
+    def release_flight(self) -> None:
+        """The leader ends without an upstream response: let its followers route on their own"""
+        if self.leads_flight and self.flight is not None and not self.flight.started:
+            COALESCER.release(self.flight)
+            self.flight.fail()
+
+    def adopt(self, backend: str, instance: Optional[str]) -> None:
+        """A hedge on another backend answered first: move the plan (and its slot) there"""
+        if backend == self.backend:
+            return
+        if self.selected_model and instance:
+            INFLIGHT_TRACKER.inc(backend, instance)
+            INFLIGHT_TRACKER.dec(self.backend, self.selected_model)
+            self.selected_model = instance
+        self.backend = backend
+
+    def data_for(self, instance: Optional[str]) -> Optional[bytes]:
+        """Upstream body naming `instance` as the model (a hedge on another backend)"""
+        current = self.body.get("model") if isinstance(self.body, dict) else None
+        if not instance or not self.data or not isinstance(current, str) or instance == current:
+            return self.data
+        body = dict(self.body)
+        body["model"] = instance
+        return _rewrite_json_model(self.data, instance, current) or _json_dumps_bytes(body)
+
+    def failover(self, never_sent: bool) -> bool:
+        """The upstream connection failed before a response: move to the next candidate in selection
+        order (marking the backend suspect when it could not be reached). Returns False when the
+        caller should abort() instead.
+
+        never_sent: the connection was never established, so even a non-idempotent request
+        cannot have reached the backend.
+        """
+        failed = SERVER_REGISTRY.server_by_model_base(self.backend)
+        if failed and never_sent:
+            # Only a failed connect shows the backend is unreachable; a reset pooled socket does not
+            BACKEND_MONITOR.mark_suspect(failed.health_base)
+        model = self.requested_model
+        if not model or len(self.tried) >= FAILOVER_MAX_RETRIES:
+            return False
+        if not never_sent and self.method not in IDEMPOTENT_METHODS:
+            return False
+        ident, digests, tried = self.client_ident, self.prefix_digests, self.tried | {self.backend}
+        choice = ADMISSION_QUEUE.reserve(lambda: BACKEND_SELECTOR.select_admissible(ident, model, digests, tried))
+        if choice is None or not choice[0]:
+            return False
+        if not RETRY_BUDGET.try_spend():
+            if choice[1]:
+                INFLIGHT_TRACKER.dec(choice[0], choice[1])
+            return False
+        print(f"[WARN] upstream connection to {self.backend} failed, retrying on {choice[0]}", file=sys.stderr)
+        METRIC_UPSTREAM_FAILOVERS.labels(self.backend).inc()
+        self._release_attempt()
+        self.tried = tried
+        self.assign(*choice)
+        return True
+
+    def finish(self, completed: bool = True) -> None:
+        """Response relayed (or client went away): release the slot and record the request"""
+        try:
+            if self.observer is not None:
+                self.observer.finish(completed)
+            if completed and self.capture is not None and self.cache_key is not None:
+                RESPONSE_CACHE.put(self.cache_key, self.status, self.content_type, b"".join(self.capture))
+            self.capture = None
+            self._record(self.status)
+            if self.selected_model and not self.slot_lent:
+                INFLIGHT_TRACKER.dec(self.backend, self.selected_model)
+        finally:
+            self.on_connected()
+
+    def lend_slot(self) -> None:
+        """The request joined an embedding batch, which carries it on the batch's own slot"""
+        if self.selected_model and not self.slot_lent:
+            self.slot_lent = True
+            INFLIGHT_TRACKER.dec(self.backend, self.selected_model)
+
+    def reclaim_slot(self) -> None:
+        """The batch could not answer: the request takes a slot again and is sent on its own"""
+        if self.slot_lent:
+            self.slot_lent = False
+            INFLIGHT_TRACKER.inc(self.backend, self.selected_model or "")
+
+    def _release_attempt(self) -> None:
+        if self.observer is not None:
+            self.observer.finish(False)
+            self.observer = None
+        METRIC_UPSTREAM_CONNECT_ERRORS.labels(self.backend).inc()
+        if self.selected_model:
+            INFLIGHT_TRACKER.dec(self.backend, self.selected_model)
+
+    def _record(self, status: int) -> None:
+        duration = time.monotonic() - self.started
+        _record_request_metrics(self.selected_model or "", self.backend, status, duration)
+        REQUEST_LOG.log(
+            self.client_ident, self.client_ip, self.method, self.full_path, self.requested_model,
+            self.selected_model, self.backend, status, self.bytes_out, duration,
+        )
+
+
+def _prepare_proxy_request(
+    method: str,
+    path: str,
+    full_path: str,
+    headers: Dict[str, str],
+    raw_body: Optional[bytes],
+    client_ip: str,
+) -> Optional[ProxyPlan]:
+    """Decide backend/instance and build the upstream request. Returns None when no backend is configured.
+
+    Raises AdmissionRejected when the model's wait queue is full.
+    """
+    plan = ProxyPlan(
+        method=method,
+        full_path=full_path,
+        headers=_filter_request_headers(dict(headers)),
+        raw_body=raw_body,
+        client_ident=client_ip,  # Default is IP. Replace with username from system prompt if available
+        client_ip=client_ip,
+    )
+    RETRY_BUDGET.deposit()
+    requested_model: Optional[str] = None
 
-    # Model-specific routing only for POST /v1/chat/completions
-    is_modified_body = False
-    is_completions = request.method == "POST" and request.path.rstrip("/") == "/v1/chat/completions"
-    if is_completions:
+    # Model-specific routing for the POST endpoints in ENDPOINT_ROUTES
+    endpoint = ENDPOINT_ROUTES.get(path.rstrip("/")) if method == "POST" else None
+    plan.endpoint = endpoint
+    if endpoint is not None:
         try:
-            body = request.get_json(silent=True) or {}
-            if ApplyCustomCompletions(body):
-                is_modified_body = True
+            body = _json_loads(raw_body or b"{}") or {}
+            plan.body = body
+            if endpoint.rewrites and isinstance(body, dict) and ApplyCustomCompletions(body):
+                plan.body_modified = True
             m = body.get("model") if isinstance(body, dict) else None
             # Extract username from system role
-            username = _extract_username_from_system_messages(body.get("messages")) if isinstance(body, dict) else None
+            messages = body.get(endpoint.messages) if endpoint.messages and isinstance(body, dict) else None
+            username = _extract_username_from_system_messages(messages) if messages else None
             if isinstance(username, str) and username:
-                client_ident = username
+                plan.client_ident = username
             if isinstance(m, str) and m:
-                selected_model = m
-                backend, selected_instance = select_backend_for_model_request(client_ident, m)
-                # Use selected instance if available
-                if selected_instance:
-                    selected_model = selected_instance
-                    body["model"] = selected_model
-                    is_modified_body = True
-                    print(f"[INFO] selected backend and model: {backend} | {selected_model}")
+                requested_model = m
+                plan.requested_model = m
+                if PREFIX_AFFINITY_ENABLED and messages:
+                    plan.prefix_digests = PrefixAffinityIndex.fingerprint(m, messages)
                 
-            # Log access for completions requests
+            # Log access for model-routed requests
             if isinstance(m, str) and m:
                 ACCESS_LOG_MANAGER.log_access(
                     ip=client_ip,
@@ -1598,70 +5065,823 @@ def proxy(path: str) -> Response:
                     username=username
                 )
         except Exception:
-            backend = backend
+            requested_model = None
+            plan.requested_model = None
+
+        # Deterministic request (temperature 0 / fixed seed): answer from the response cache when
+        # possible, otherwise share the upstream response of an identical request already in flight
+        key = None
+        if requested_model and endpoint.cacheable and (RESPONSE_CACHE.enabled or COALESCER.enabled):
+            # Scoped to the caller's credentials: neither tier may share an answer across API keys
+            key = _deterministic_request_key(path.rstrip("/"), plan.body, _request_credentials(plan.headers))
+        if key is not None and RESPONSE_CACHE.enabled:
+            plan.cached = RESPONSE_CACHE.get(key)
+            if plan.cached is not None:
+                plan.backend = "cache"
+                return plan
+            plan.cache_key = key
+        if key is not None and COALESCER.enabled:
+            plan.flight, plan.leads_flight = COALESCER.attach(key)
+            if not plan.leads_flight:
+                # Follower: no slot of its own; routed only if the leader gets no response
+                plan.cache_key = None
+                return plan
 
-    # Fallback for everything else
-    if not backend:
-        backend = FALLBACK_BACKEND
-    if not backend:
-        return jsonify({"error": "No backend configured"}), 503
+    try:
+        routed = _route_plan(plan)
+    except AdmissionRejected:
+        plan.release_flight()
+        raise
+    if routed is None:
+        plan.release_flight()
+    return routed
 
-    target_url = _build_target_url(backend)
-    upstream_headers = _filter_request_headers(dict(request.headers))
 
-    # Get request data (use updated body when model is changed)
-    if is_modified_body and 'body' in locals() and body:
-        # Serialize updated body when model is changed
-        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
-    else:
-        # Use original request data in normal cases
-        data = request.get_data() if request.method in {"POST", "PUT", "PATCH"} else None
+def _route_plan(plan: ProxyPlan) -> Optional[ProxyPlan]:
+    """Admit the request to a model instance (or queue it), else use the fallback backend.
 
-    # Proxy request to the selected backend with streaming
-    # Increment active count just before sending (per backend)
-    if selected_model and backend:
-        INFLIGHT_TRACKER.inc(backend, selected_model)
-    try:
-        upstream_resp = requests.request(
-            method=request.method,
-            url=target_url,
-            headers=upstream_headers,
-            data=data,
-            stream=True,
-            allow_redirects=False,
-            timeout=UPSTREAM_CONNECT_TIMEOUT_SEC,  # Only connect timeout; stream has no read timeout
+    Returns None when no backend is configured; raises AdmissionRejected when the queue is full.
+    """
+    requested_model = plan.requested_model
+    if requested_model and plan.endpoint is not None and not plan.endpoint.slot:
+        # Cheap utility call: route by model, but never count against request-max or queue
+        backend, _ = BACKEND_SELECTOR.select(plan.client_ident, requested_model)
+        if backend:
+            plan.assign(backend, None)
+            return plan
+    elif requested_model:
+        ident, digests = plan.client_ident, plan.prefix_digests
+        admitted = ADMISSION_QUEUE.admit(
+            requested_model,
+            lambda: BACKEND_SELECTOR.select_admissible(ident, requested_model, digests),
         )
-        
-        # Log response Content-Type (for debugging)
-        #content_type = upstream_resp.headers.get('content-type', '')
-        #if not content_type.startswith('application/json') and is_completions:
-        #    print(f"[WARN] Unexpected content-type for completions: {content_type}, URL: {target_url}", file=sys.stderr)
-            
+        if isinstance(admitted, AdmissionTicket):
+            plan.admission = admitted
+            return plan
+        backend, instance = admitted
+        if backend:
+            plan.assign(backend, instance)
+            return plan
+
+    # Fallback for everything else
+    if not FALLBACK_BACKEND:
+        return None
+    plan.assign(FALLBACK_BACKEND, None)
+    return plan
+
+
+def _cached_reply(plan: ProxyPlan) -> Tuple[bytes, int, Dict[str, str]]:
+    """Record a response-cache hit and return (body, status, headers) to send"""
+    entry = plan.cached
+    assert entry is not None
+    plan.set_status(entry.status, entry.content_type)
+    plan.on_chunk(entry.body)
+    plan.finish(True)
+    headers = {"Content-Type": entry.content_type, "X-Balancer-Cache": "hit"}
+    if entry.is_stream:
+        headers = _event_stream_response_headers(headers)
+    return entry.body, entry.status, headers
+
+
+def _pump_flight(flight: Flight, body: Any) -> None:
+    """Read the leader's upstream response into the flight until it ends or every reader left"""
+    completed = False
+    try:
+        for chunk in body:
+            flight.push(chunk)
+            if flight.abandoned:
+                break
+        else:
+            completed = True
     except Exception as exc:
-        # Return 502 when upstream connection fails
-        return jsonify({"error": "Upstream request failed", "details": str(exc)}), 502
+        print(f"[WARN] coalesced upstream stream failed: {exc}", file=sys.stderr)
+    finally:
+        body.close()
+        COALESCER.release(flight)
+        flight.close(completed)
 
 
-    if is_completions and selected_model and backend:
-        STICKY_MANAGER.update_backend(client_ident, backend, model=selected_model)
-        
-    def _on_complete() -> None:
+def _iter_flight(flight: Flight, plan: Optional[ProxyPlan] = None) -> Iterable[bytes]:
+    """Replay a flight to one subscribed client; a follower passes its plan to be recorded"""
+    index = 0
+    completed = False
+    try:
+        while True:
+            chunks, done = flight.wait(index)
+            index += len(chunks)
+            for chunk in chunks:
+                if plan is not None:
+                    plan.on_chunk(chunk)
+                yield chunk
+            if done:
+                completed = flight.completed
+                return
+    finally:
+        flight.unsubscribe()
+        if plan is not None:
+            plan.finish(completed)
+
+
+def _lead_flight(plan: ProxyPlan, body: Any, status: int, headers: Dict[str, str]) -> Response:
+    """Publish the leader's response and pump it in the background so any reader may leave"""
+    flight = plan.flight
+    assert flight is not None
+    flight.subscribe()
+    flight.start(status, headers)
+    threading.Thread(target=_pump_flight, args=(flight, body), name="coalesce-pump", daemon=True).start()
+    return Response(_iter_flight(flight), status=status, headers=headers, direct_passthrough=True)
+
+
+def _follow_flight(plan: ProxyPlan) -> Optional[Response]:
+    """Serve a follower from its leader's response; None when the leader got no response"""
+    flight = plan.flight
+    assert flight is not None
+    plan.flight = None
+    flight.subscribe()
+    if not flight.wait_started():
+        flight.unsubscribe()
+        return None
+    plan.backend = "coalesced"
+    plan.set_status(flight.status, flight.headers.get("Content-Type", ""))
+    return Response(_iter_flight(flight, plan), status=flight.status, headers=flight.headers, direct_passthrough=True)
+
+
+def _submit_offloaded(plan: ProxyPlan) -> Optional[Future]:
+    """Hand an embeddings/rerank call to scatter-gather or micro-batching; None keeps the regular path"""
+    if SCATTER.applies(plan):
+        future = SCATTER.submit(plan)
+        if future is not None:
+            return future
+    if EMBED_BATCHER.applies(plan):
+        return EMBED_BATCHER.submit(plan)
+    return None
+
+
+def _offloaded_reply(plan: ProxyPlan, reply: Tuple[int, str, bytes]) -> Tuple[bytes, int, Dict[str, str]]:
+    """Record a scattered or batched call answered by the balancer and return (body, status, headers)"""
+    status, content_type, body = reply
+    plan.set_status(status, content_type)
+    plan.on_chunk(body)
+    plan.finish(True)
+    return body, status, {"Content-Type": content_type}
+
+
+def _admission_rejected_payload(
+    exc: AdmissionRejected, method: str, full_path: str, client_ip: str
+) -> Tuple[Dict[str, Any], int, Dict[str, str]]:
+    _record_request_metrics(exc.model, "", exc.status, None)
+    REQUEST_LOG.log(client_ip, client_ip, method, full_path, exc.model or None, None, "", exc.status, 0, None)
+    return {"error": str(exc)}, exc.status, {"Retry-After": str(exc.retry_after)}
+
+
+# Worker threads for hedged calls (created on demand)
+HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+
+
+def _send_buffered(
+    plan: ProxyPlan, backend: str, instance: Optional[str] = None
+) -> Tuple[requests.Response, bytes, float]:
+    """One complete upstream attempt of a hedged call: (response, raw body, seconds)"""
+    started = time.monotonic()
+    data = plan.data if instance is None else plan.data_for(instance)
+    resp = UPSTREAM_POOLS.session(backend).request(
+        method=plan.method,
+        url=_join_target_url(backend, plan.full_path),
+        headers={k: v for k, v in plan.headers.items() if k.lower() != "content-length"},
+        data=data,
+        stream=True,
+        allow_redirects=False,
+        timeout=UPSTREAM_CONNECT_TIMEOUT_SEC,
+    )
+    try:
+        # Body as sent (still encoded), so it matches the relayed Content-Encoding header
+        body = resp.raw.read(decode_content=False)
+    except Exception:
+        resp.close()
+        raise
+    resp.raw.release_conn()
+    return resp, body, time.monotonic() - started
+
+
+def _send_hedge(plan: ProxyPlan, backend: str, instance: str) -> Tuple[requests.Response, bytes, float]:
+    """The duplicate attempt holds its own in-flight slot (under its instance) while it runs"""
+    try:
+        return _send_buffered(plan, backend, instance)
+    finally:
+        if plan.selected_model:
+            INFLIGHT_TRACKER.dec(backend, instance)
+
+
+def _proxy_hedged(plan: ProxyPlan) -> Response:
+    """Relay a hedgeable call; past the p95 delay (or on failure) race a duplicate on a second backend"""
+    primary = plan.backend
+    attempts = {HEDGE_EXECUTOR.submit(_send_buffered, plan, primary): (primary, plan.selected_model)}
+    launched = [primary]
+    delay = HEDGER.delay(plan)
+    hedge_at = None if delay is None else time.monotonic() + delay
+    hedged = False
+    error: Any = None
+    answers: Dict[str, Any] = {}
+    winner: Any = None
+    while attempts:
+        timeout = None if hedged or hedge_at is None else max(0.0, hedge_at - time.monotonic())
+        done, _ = wait_futures(list(attempts), timeout=timeout, return_when=FIRST_COMPLETED)
+        for fut in done:
+            backend, instance = attempts.pop(fut)
+            try:
+                resp, body, seconds = fut.result()
+            except Exception as exc:
+                error = exc
+                continue
+            answers[backend] = (backend, instance, resp, body)
+            # The primary's answer stands unless it is a 5xx; a hedge wins only with a success,
+            # so a fast 4xx from another backend (e.g. missing instance) never beats the primary
+            if resp.status_code < (500 if backend == primary else 300):
+                winner = answers[backend]
+                HEDGER.record(plan, seconds)
+                if len(launched) > 1:
+                    HEDGER.outcome(plan, backend != primary)
+                break
+        else:
+            if not hedged and (not done or not attempts):
+                # Primary is slow or already failed: duplicate it (the loser's answer is discarded)
+                hedged = True
+                picked = HEDGER.pick_backend(plan)
+                if picked:
+                    backend, instance = picked
+                    if plan.selected_model:
+                        INFLIGHT_TRACKER.inc(backend, instance)
+                    attempts[HEDGE_EXECUTOR.submit(_send_hedge, plan, backend, instance)] = picked
+                    launched.append(backend)
+            continue
+        break
+
+    # No success: relay the primary's own answer when there is one
+    last = winner or answers.get(primary) or next(iter(answers.values()), None)
+    if last is None:
+        plan.abort()
+        return jsonify({"error": "Upstream request failed", "details": str(error)}), 502
+    backend, instance, resp, body = last
+    for fut, (loser, loser_instance) in attempts.items():
+        if loser == primary and backend != primary and plan.selected_model:
+            # A running request cannot be cancelled here: the primary keeps its GPU busy until it
+            # returns, so hold a slot there until then (adopt() releases the plan's own)
+            INFLIGHT_TRACKER.inc(loser, loser_instance or "")
+            fut.add_done_callback(lambda _, b=loser, i=loser_instance or "": INFLIGHT_TRACKER.dec(b, i))
+    plan.adopt(backend, instance)
+    plan.set_status(resp.status_code)
+    plan.on_chunk(body)
+    plan.finish(True)
+    return Response(body, status=resp.status_code, headers=_filtered_response_headers(resp))
+
+
+@app.route("/", defaults={"path": ""}, methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
+@app.route("/<path:path>", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
+def proxy(path: str) -> Response:
+    full_path = request.full_path if request.query_string else request.path
+    client_ip = _get_client_ip()
+    plan: Optional[ProxyPlan] = None
+    try:
+        plan = _prepare_proxy_request(
+            request.method,
+            request.path,
+            full_path,
+            request.headers,
+            request.get_data() if request.method in {"POST", "PUT", "PATCH"} else None,
+            client_ip,
+        )
+        if plan is not None and plan.flight is not None and not plan.leads_flight:
+            followed = _follow_flight(plan)
+            if followed is not None:
+                return followed
+            # The leader got no response: route this request on its own
+            plan = _route_plan(plan)
+        if plan is not None and plan.admission is not None:
+            # Every backend is at request-max: wait (FIFO) for a slot
+            plan.assign(*ADMISSION_QUEUE.wait(plan.admission))
+    except AdmissionRejected as exc:
+        if plan is not None:
+            plan.release_flight()
+        payload, status, headers = _admission_rejected_payload(exc, request.method, full_path, client_ip)
+        return jsonify(payload), status, headers
+    if plan is None:
+        _record_request_metrics("", "", 503, None)
+        return jsonify({"error": "No backend configured"}), 503
+    if plan.cached is not None:
+        body, status, headers = _cached_reply(plan)
+        return Response(body, status=status, headers=headers)
+    offloaded = _submit_offloaded(plan)
+    reply = offloaded.result() if offloaded is not None else None
+    if reply is not None:
+        body, status, headers = _offloaded_reply(plan, reply)
+        return Response(body, status=status, headers=headers)
+    plan.reclaim_slot()
+    if HEDGER.applies(plan):
+        return _proxy_hedged(plan)
+
+    # Proxy request to the selected backend with streaming
+    while True:
+        plan.observe()
         try:
-            if selected_model and backend:
-                INFLIGHT_TRACKER.dec(backend, selected_model)
-        finally:
-            if is_completions and selected_model and backend:
-                STICKY_MANAGER.update_backend(client_ident, backend, model=selected_model)
+            upstream_resp = UPSTREAM_POOLS.session(plan.backend).request(
+                method=plan.method,
+                url=plan.target_url,
+                headers=plan.headers,
+                data=plan.data,
+                stream=True,
+                allow_redirects=False,
+                timeout=UPSTREAM_CONNECT_TIMEOUT_SEC,  # Only connect timeout; stream has no read timeout
+            )
 
+            # Log response Content-Type (for debugging)
+            #content_type = upstream_resp.headers.get('content-type', '')
+            #if not content_type.startswith('application/json') and plan.endpoint is not None:
+            #    print(f"[WARN] Unexpected content-type for completions: {content_type}, URL: {plan.target_url}", file=sys.stderr)
+            break
+        except Exception as exc:
+            # Nothing was relayed yet: try the next candidate when the connection itself failed
+            if isinstance(exc, requests.exceptions.ConnectionError) and plan.failover(_requests_never_sent(exc)):
+                continue
+            plan.abort()
+            # Return 502 when upstream connection fails
+            return jsonify({"error": "Upstream request failed", "details": str(exc)}), 502
+
+    plan.on_connected()
+    plan.set_status(upstream_resp.status_code, upstream_resp.headers.get("Content-Type", ""))
+
+    headers = _filtered_response_headers(upstream_resp)
+    if _is_event_stream(upstream_resp.headers):
+        headers = _event_stream_response_headers(headers)
+    if plan.flight is not None:
+        body = _stream_upstream_response(upstream_resp, plan.finish, plan.on_chunk)
+        return _lead_flight(plan, body, upstream_resp.status_code, headers)
     response = Response(
-        stream_with_context(_stream_upstream_response(upstream_resp, _on_complete)),
+        stream_with_context(_stream_upstream_response(upstream_resp, plan.finish, plan.on_chunk)),
         status=upstream_resp.status_code,
-        headers=_filtered_response_headers(upstream_resp),
+        headers=headers,
         direct_passthrough=True,
     )
     return response
 
 
+class _StreamingRequestHandler(WSGIRequestHandler):
+    """Dev-server handler that sends each relayed chunk as one segment, immediately.
+
+    Werkzeug writes a chunked frame as several small writes; with Nagle's algorithm
+    on, every token event can wait for the client's delayed ACK. Buffer the frame
+    (werkzeug flushes after each chunk) and disable Nagle.
+    """
+
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def run_wsgi(self) -> None:
+        if self.headers.get("Expect", "").lower().strip(" \t") == "100-continue":
+            # Werkzeug writes the interim response without a flush: in the buffer it would wait
+            # for the final response while the client waits for it before sending the body
+            self.wfile.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            self.wfile.flush()
+            del self.headers["Expect"]
+        super().run_wsgi()
+
+
+# ------------------------------
+# Asyncio Serving Engine (aiohttp)
+# ------------------------------
+
+# Serving engine: "flask" (threaded dev server, default) or "asyncio" (aiohttp, one coroutine per stream)
+SERVER_MODE = os.getenv("BALANCER_SERVER_MODE", "flask").strip().lower()
+
+# Largest request body accepted by the asyncio engine (long contexts / base64 images)
+ASYNC_CLIENT_MAX_SIZE = 1024 * 1024 * 1024
+
+# Bodies from this size on are parsed and routed in the executor rather than on the event loop
+ASYNC_PREPARE_OFFLOAD_BYTES = int(os.getenv("ASYNC_PREPARE_OFFLOAD_BYTES", str(256 * 1024)))
+
+
+def _create_async_app() -> Any:
+    """Build the aiohttp application serving the same routes as the Flask app.
+
+    Routing (BackendSelector / StickySessionManager / InFlightTracker) is shared with the
+    Flask engine through _prepare_proxy_request and ProxyPlan; only upstream I/O differs.
+    """
+    import asyncio
+    import aiohttp  # type: ignore
+    from aiohttp import web  # type: ignore
+
+    async def _on_startup(aio_app: Any) -> None:
+        async def _on_reuse(session: Any, ctx: Any, params: Any) -> None:
+            ctx.reused = True
+
+        async def _on_request_end(session: Any, ctx: Any, params: Any) -> None:
+            url = params.url
+            UPSTREAM_POOLS.record_async(f"{url.scheme}://{url.host}:{url.port}", getattr(ctx, "reused", False))
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_reuseconn.append(_on_reuse)
+        trace.on_request_end.append(_on_request_end)
+        aio_app["upstream_session"] = aiohttp.ClientSession(
+            # No per-host cap: long streams must not queue behind each other
+            connector=aiohttp.TCPConnector(
+                limit=0,
+                keepalive_timeout=UPSTREAM_POOL_IDLE_TIMEOUT_SEC,
+                use_dns_cache=UPSTREAM_DNS_CACHE_TTL_SEC > 0,
+                ttl_dns_cache=int(UPSTREAM_DNS_CACHE_TTL_SEC) or None,
+            ),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=UPSTREAM_CONNECT_TIMEOUT_SEC),
+            auto_decompress=False,
+            trace_configs=[trace],
+        )
+
+    async def _on_cleanup(aio_app: Any) -> None:
+        await aio_app["upstream_session"].close()
+
+    async def _favicon(req: Any) -> Any:
+        return web.Response(status=204)
+
+    async def _llmhealth(req: Any) -> Any:
+        return web.json_response(_build_llmhealth_payload())
+
+    async def _access_log_stats(req: Any) -> Any:
+        return web.json_response(ACCESS_LOG_MANAGER.get_stats())
+
+    async def _llmhealth_snapshot(req: Any) -> Any:
+        return web.json_response(_build_snapshot_payload())
+
+    async def _models(req: Any) -> Any:
+        return web.json_response(_build_models_payload())
+
+    async def _llmhealth_events(req: Any) -> Any:
+        since = _parse_feed_since(req.query.get("since") or req.headers.get("Last-Event-ID"))
+        resp = web.StreamResponse(headers=STATE_FEED_HEADERS)
+        await resp.prepare(req)
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+
+        def _notify() -> None:
+            if not wake.is_set():
+                loop.call_soon_threadsafe(wake.set)
+
+        STATE_FEED.subscribe(_notify)
+        try:
+            version = since
+            last_sent = 0.0
+            while True:
+                version, message = _state_feed_message(version)
+                now = time.monotonic()
+                if message is not None:
+                    await resp.write(message)
+                    last_sent = now
+                elif now - last_sent >= STATE_FEED_KEEPALIVE_SEC:
+                    await resp.write(b": keepalive\n\n")
+                    last_sent = now
+                try:
+                    await asyncio.wait_for(
+                        wake.wait(), timeout=max(0.0, last_sent + STATE_FEED_KEEPALIVE_SEC - time.monotonic())
+                    )
+                    await asyncio.sleep(STATE_FEED_BATCH_SEC)
+                    wake.clear()
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            STATE_FEED.unsubscribe(_notify)
+
+    async def _admin_reload(req: Any) -> Any:
+        if not _admin_allowed(req.headers, req.remote):
+            return web.json_response({"error": "Forbidden"}, status=403)
+        result = await asyncio.get_running_loop().run_in_executor(None, CONFIG_RELOADER.reload, "admin")
+        return web.json_response(result, status=200 if result["ok"] else 400)
+
+    async def _metrics(req: Any) -> Any:
+        return web.Response(body=METRICS.render().encode("utf-8"), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+    async def _llmhealth_monitor(req: Any) -> Any:
+        return web.Response(text=LLMHEALTH_MONITOR_HTML, content_type="text/html", charset="utf-8")
+
+    async def _proxy_hedged(session: Any, plan: ProxyPlan, upstream_headers: Dict[str, str]) -> Any:
+        """Coroutine variant of _proxy_hedged(); the losing attempt is cancelled"""
+
+        async def _attempt(
+            backend: str, instance: Optional[str] = None
+        ) -> Tuple[int, Dict[str, str], bytes, float]:
+            started = time.monotonic()
+            async with session.request(
+                plan.method,
+                _join_target_url(backend, plan.full_path),
+                headers=upstream_headers,
+                data=plan.data if instance is None else plan.data_for(instance),
+                allow_redirects=False,
+            ) as r:
+                body = await r.read()
+                return r.status, _filter_response_headers(r.headers), body, time.monotonic() - started
+
+        async def _hedge(backend: str, instance: str) -> Tuple[int, Dict[str, str], bytes, float]:
+            try:
+                return await _attempt(backend, instance)
+            finally:
+                if plan.selected_model:
+                    INFLIGHT_TRACKER.dec(backend, instance)
+
+        primary = plan.backend
+        attempts = {asyncio.ensure_future(_attempt(primary)): (primary, plan.selected_model)}
+        launched = [primary]
+        delay = HEDGER.delay(plan)
+        hedge_at = None if delay is None else time.monotonic() + delay
+        hedged = False
+        error: Any = None
+        answers: Dict[str, Any] = {}
+        winner: Any = None
+        try:
+            while attempts:
+                timeout = None if hedged or hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(set(attempts), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend, instance = attempts.pop(task)
+                    try:
+                        status, headers, body, seconds = task.result()
+                    except Exception as exc:
+                        error = exc
+                        continue
+                    answers[backend] = (backend, instance, status, headers, body)
+                    # Primary stands unless 5xx; a hedge wins only with a success
+                    if status < (500 if backend == primary else 300):
+                        winner = answers[backend]
+                        HEDGER.record(plan, seconds)
+                        if len(launched) > 1:
+                            HEDGER.outcome(plan, backend != primary)
+                        break
+                else:
+                    if not hedged and (not done or not attempts):
+                        hedged = True
+                        picked = HEDGER.pick_backend(plan)
+                        if picked:
+                            backend, instance = picked
+                            if plan.selected_model:
+                                INFLIGHT_TRACKER.inc(backend, instance)
+                            attempts[asyncio.ensure_future(_hedge(backend, instance))] = picked
+                            launched.append(backend)
+                    continue
+                break
+        except asyncio.CancelledError:
+            plan.cancel()
+            raise
+        finally:
+            for task in attempts:
+                task.cancel()
+
+        last = winner or answers.get(primary) or next(iter(answers.values()), None)
+        if last is None:
+            plan.abort()
+            return web.json_response({"error": "Upstream request failed", "details": str(error)}, status=502)
+        backend, instance, status, headers, body = last
+        plan.adopt(backend, instance)
+        plan.set_status(status)
+        plan.on_chunk(body)
+        plan.finish(True)
+        return web.Response(body=body, status=status, headers=headers)
+
+    pumps: "set[Any]" = set()
+
+    async def _pump_flight(plan: ProxyPlan, upstream_resp: Any, flight: Flight) -> None:
+        """Coroutine variant of _pump_flight(): relay the leader's upstream body into the flight"""
+        completed = False
+        framer = SSEEventFramer() if _is_event_stream(upstream_resp.headers) else None
+        try:
+            async for chunk in upstream_resp.content.iter_any():
+                if framer is not None:
+                    chunk = framer.feed(chunk)
+                if chunk:
+                    plan.on_chunk(chunk)
+                    flight.push(chunk)
+                if flight.abandoned:
+                    return
+            if framer is not None:
+                tail = framer.flush()
+                if tail:
+                    plan.on_chunk(tail)
+                    flight.push(tail)
+            completed = True
+        except Exception as exc:
+            print(f"[WARN] coalesced upstream stream failed: {exc}", file=sys.stderr)
+        finally:
+            upstream_resp.close()
+            COALESCER.release(flight)
+            flight.close(completed)
+            try:
+                plan.finish(completed)
+            except Exception:
+                pass
+
+    async def _serve_flight(req: Any, flight: Flight, plan: Optional[ProxyPlan] = None) -> Any:
+        """Stream a flight to this client; None when the leader got no response (followers only)"""
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+
+        def _notify() -> None:
+            loop.call_soon_threadsafe(wake.set)
+
+        flight.subscribe(_notify)
+        completed = False
+        try:
+            while not flight.started:
+                if flight.failed:
+                    return None
+                await wake.wait()
+                wake.clear()
+            if plan is not None:
+                plan.backend = "coalesced"
+                plan.set_status(flight.status, flight.headers.get("Content-Type", ""))
+            resp = web.StreamResponse(status=flight.status, headers=flight.headers)
+            await resp.prepare(req)
+            index = 0
+            while True:
+                wake.clear()
+                chunks, done = flight.read(index)
+                index += len(chunks)
+                for chunk in chunks:
+                    if plan is not None:
+                        plan.on_chunk(chunk)
+                    await resp.write(chunk)
+                if done:
+                    break
+                if not chunks:
+                    await wake.wait()
+            await resp.write_eof()
+            completed = flight.completed
+            return resp
+        finally:
+            flight.unsubscribe(_notify)
+            if plan is not None and plan.status:
+                plan.finish(completed)
+
+    def _drop_prepared(prepared: Any) -> None:
+        # The handler was cancelled while its plan was prepared off the loop: give back what it reserved
+        if prepared.cancelled() or prepared.exception() is not None or prepared.result() is None:
+            return
+        plan = prepared.result()
+        if plan.admission is not None:
+            plan.release_flight()
+            ADMISSION_QUEUE.cancel(plan.admission)
+        elif plan.cached is None and (plan.flight is None or plan.leads_flight):
+            plan.cancel()
+
+    async def _prepare(req: Any, raw_body: Optional[bytes], client_ip: str) -> Optional[ProxyPlan]:
+        """_prepare_proxy_request, run in the executor when it may block the loop"""
+        args = (req.method, req.path, req.path_qs, req.headers, raw_body, client_ip)
+        endpoint = ENDPOINT_ROUTES.get(req.path.rstrip("/")) if req.method == "POST" else None
+        # JSON parsing and prefix fingerprinting of a multi-MB body take milliseconds;
+        # a response-cache lookup may read (mmap) a file from the disk tier
+        offload = endpoint is not None and (
+            len(raw_body or b"") >= ASYNC_PREPARE_OFFLOAD_BYTES or (RESPONSE_CACHE.reads_disk and endpoint.cacheable)
+        )
+        if not offload:
+            return _prepare_proxy_request(*args)
+        prepared = asyncio.get_running_loop().run_in_executor(None, _prepare_proxy_request, *args)
+        try:
+            return await asyncio.shield(prepared)
+        except asyncio.CancelledError:
+            prepared.add_done_callback(_drop_prepared)
+            raise
+
+    async def _proxy(req: Any) -> Any:
+        raw_body = await req.read() if req.method in {"POST", "PUT", "PATCH"} else None
+        client_ip = _client_ip_from(req.headers, req.remote)
+        plan: Optional[ProxyPlan] = None
+        try:
+            # Selection never waits on the network (model lists come from MODEL_CATALOG); its CPU
+            # and disk work moves to the executor for large bodies and disk-tier cache lookups
+            plan = await _prepare(req, raw_body, client_ip)
+            if plan is not None and plan.flight is not None and not plan.leads_flight:
+                flight, plan.flight = plan.flight, None
+                followed = await _serve_flight(req, flight, plan)
+                if followed is not None:
+                    return followed
+                # The leader got no response: route this request on its own
+                plan = _route_plan(plan)
+            if plan is not None and plan.admission is not None:
+                # Every backend is at request-max: wait (FIFO) for a slot without blocking the loop
+                plan.assign(*await ADMISSION_QUEUE.wait_async(plan.admission))
+        except asyncio.CancelledError:
+            if plan is not None:
+                plan.release_flight()
+            raise
+        except AdmissionRejected as exc:
+            if plan is not None:
+                plan.release_flight()
+            payload, status, headers = _admission_rejected_payload(exc, req.method, req.path_qs, client_ip)
+            return web.json_response(payload, status=status, headers=headers)
+        if plan is None:
+            _record_request_metrics("", "", 503, None)
+            return web.json_response({"error": "No backend configured"}, status=503)
+        if plan.cached is not None:
+            body, status, headers = _cached_reply(plan)
+            return web.Response(body=body, status=status, headers=headers)
+
+        # Body may have been rewritten; let aiohttp compute Content-Length
+        upstream_headers = {k: v for k, v in plan.headers.items() if k.lower() != "content-length"}
+        session = req.app["upstream_session"]
+        offloaded = _submit_offloaded(plan)
+        try:
+            # Shielded: the batch or scatter still resolves the future after this client left
+            reply = await asyncio.shield(asyncio.wrap_future(offloaded)) if offloaded is not None else None
+        except asyncio.CancelledError:
+            plan.cancel()
+            raise
+        if reply is not None:
+            body, status, headers = _offloaded_reply(plan, reply)
+            return web.Response(body=body, status=status, headers=headers)
+        plan.reclaim_slot()
+        if HEDGER.applies(plan):
+            return await _proxy_hedged(session, plan, upstream_headers)
+        while True:
+            plan.observe()
+            try:
+                upstream_resp = await session.request(
+                    plan.method,
+                    plan.target_url,
+                    headers=upstream_headers,
+                    data=plan.data,
+                    allow_redirects=False,
+                )
+                break
+            except asyncio.CancelledError:
+                # Client went away before the upstream answered: the slot is still held here
+                plan.cancel()
+                raise
+            except Exception as exc:
+                # Nothing was relayed yet: try the next candidate when the connection itself failed
+                if isinstance(exc, aiohttp.ClientConnectionError) and plan.failover(
+                    isinstance(exc, aiohttp.ClientConnectorError)
+                ):
+                    continue
+                plan.abort()
+                return web.json_response({"error": "Upstream request failed", "details": str(exc)}, status=502)
+
+        plan.on_connected()
+        plan.set_status(upstream_resp.status, upstream_resp.headers.get("Content-Type", ""))
+        if plan.flight is not None:
+            flight = plan.flight
+            headers = _filter_response_headers(upstream_resp.headers)
+            if _is_event_stream(upstream_resp.headers):
+                headers = _event_stream_response_headers(headers)
+            flight.start(upstream_resp.status, headers)
+            pump = asyncio.ensure_future(_pump_flight(plan, upstream_resp, flight))
+            pumps.add(pump)
+            pump.add_done_callback(pumps.discard)
+            return await _serve_flight(req, flight)
+        completed = False
+        try:
+            headers = _filter_response_headers(upstream_resp.headers)
+            framer = None
+            if _is_event_stream(upstream_resp.headers):
+                headers = _event_stream_response_headers(headers)
+                framer = SSEEventFramer()
+            resp = web.StreamResponse(status=upstream_resp.status, headers=headers)
+            await resp.prepare(req)
+            async for chunk in upstream_resp.content.iter_any():
+                if framer is not None:
+                    chunk = framer.feed(chunk)
+                if chunk:
+                    plan.on_chunk(chunk)
+                    await resp.write(chunk)
+            if framer is not None:
+                tail = framer.flush()
+                if tail:
+                    plan.on_chunk(tail)
+                    await resp.write(tail)
+            await resp.write_eof()
+            completed = True
+            return resp
+        finally:
+            upstream_resp.close()
+            try:
+                plan.finish(completed)
+            except Exception:
+                pass
+
+    aio_app = web.Application(client_max_size=ASYNC_CLIENT_MAX_SIZE)
+    aio_app.on_startup.append(_on_startup)
+    aio_app.on_cleanup.append(_on_cleanup)
+    aio_app.router.add_get("/favicon.ico", _favicon)
+    aio_app.router.add_get("/llmhealth", _llmhealth)
+    aio_app.router.add_get("/access-log-stats", _access_log_stats)
+    aio_app.router.add_get("/llmhealth-snapshot", _llmhealth_snapshot)
+    aio_app.router.add_get("/v1/models", _models)
+    aio_app.router.add_get("/llmhealth-events", _llmhealth_events)
+    aio_app.router.add_post("/admin/reload", _admin_reload)
+    aio_app.router.add_get("/metrics", _metrics)
+    aio_app.router.add_get("/llmhealth-monitor", _llmhealth_monitor)
+    aio_app.router.add_route("*", "/{path:.*}", _proxy)
+    return aio_app
+
+
+def _run_async_server(host: str, port: int) -> None:
+    from aiohttp import web  # type: ignore
+
+    # Cancel handlers when the client disconnects so queued/streaming requests release their slot at once
+    web.run_app(_create_async_app(), host=host, port=port, handler_cancellation=True)
+
+
 # ------------------------------
 # Bootstrap background workers
 # ------------------------------
@@ -1674,16 +5894,32 @@ def _start_background_threads() -> None:
     # Backend polling
     BACKEND_MONITOR.start()
 
+    # Model list refresh
+    MODEL_CATALOG.start()
 
-_start_background_threads()
+    # Sticky entry expiry (published to the state feed)
+    STICKY_MANAGER.start()
 
+    # Durable request log writer
+    REQUEST_LOG.start()
 
-if __name__ == "__main__":
-    debug = os.getenv("FLASK_DEBUG", "0") == "1"
-    # threaded=True to enable multi-threaded handling
-    app.run(host="0.0.0.0", port="18000", threaded=True, debug=debug)
+    # Response cache disk tier
+    RESPONSE_CACHE.start()
 
+    # Embeddings micro-batching timer
+    EMBED_BATCHER.start()
 
+    # server-list.json watcher (hot reload)
+    CONFIG_RELOADER.start()
 
 
+_start_background_threads()
+
 
+if __name__ == "__main__":
+    if SERVER_MODE == "asyncio":
+        _run_async_server("0.0.0.0", 18000)
+    else:
+        debug = os.getenv("FLASK_DEBUG", "0") == "1"
+        # threaded=True to enable multi-threaded handling
+        app.run(host="0.0.0.0", port="18000", threaded=True, debug=debug, request_handler=_StreamingRequestHandler)
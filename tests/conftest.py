@@ -0,0 +1,29 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# No backends, no request log file, no config watcher while the module is imported
+os.environ.setdefault("SERVER_LIST_JSON", os.path.join(ROOT, "tests", "server-list.json"))
+os.environ.setdefault("REQUEST_LOG_PATH", "")
+os.environ.setdefault("CONFIG_WATCH_INTERVAL_SEC", "0")
+
+
+def _load_balancer():
+    name = "llama_balancer_server"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, "llama-balancer-server.py"))
+    module = importlib.util.module_from_spec(spec)
+    # Registered first: dataclasses look the module up while the class body runs
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def lb():
+    return _load_balancer()
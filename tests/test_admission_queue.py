@@ -0,0 +1,84 @@
+import pytest
+
+
+@pytest.fixture
+def slots(lb, request):
+    """A backend with request-max 1 under a name private to the test; released afterwards"""
+    backend = f"http://admission-{request.node.name}"
+    yield backend, lambda: (backend, "m") if lb.INFLIGHT_TRACKER.can_accept_request(backend, "m", 1) else None
+    while lb.INFLIGHT_TRACKER.get(backend, "m"):
+        lb.INFLIGHT_TRACKER.dec(backend, "m")
+
+
+def test_free_slot_is_reserved_at_once(lb, slots):
+    backend, select = slots
+    assert lb.AdmissionQueue().admit("m", select) == (backend, "m")
+    assert lb.INFLIGHT_TRACKER.get(backend, "m") == 1
+
+
+def test_queued_requests_are_admitted_in_arrival_order(lb, slots):
+    backend, select = slots
+    queue = lb.AdmissionQueue(max_wait_seconds=5)
+    queue.admit("m", select)
+    first, second = queue.admit("m", select), queue.admit("m", select)
+    assert isinstance(first, lb.AdmissionTicket) and isinstance(second, lb.AdmissionTicket)
+    lb.INFLIGHT_TRACKER.dec(backend, "m")
+    queue.dispatch()
+    assert first.result == (backend, "m") and second.result is None
+    assert queue.wait(first) == (backend, "m")
+    assert queue.stats() == {"m": 1}
+    assert lb.INFLIGHT_TRACKER.get(backend, "m") == 1
+
+
+def test_newcomer_does_not_overtake_the_queue(lb, slots):
+    backend, select = slots
+    queue = lb.AdmissionQueue(max_wait_seconds=5)
+    queue.admit("m", select)
+    waiting = queue.admit("m", select)
+    lb.INFLIGHT_TRACKER.dec(backend, "m")
+    # A slot is free, but a request is already waiting for it
+    assert isinstance(queue.admit("m", select), lb.AdmissionTicket)
+    queue.dispatch()
+    assert waiting.result == (backend, "m")
+
+
+def test_full_queue_and_disabled_queue_reject(lb, slots):
+    _, select = slots
+    queue = lb.AdmissionQueue(max_wait_seconds=5, max_queue=1)
+    queue.admit("m", select)
+    queue.admit("m", select)
+    with pytest.raises(lb.AdmissionRejected) as exc:
+        queue.admit("m", select)
+    assert exc.value.status == 429
+    with pytest.raises(lb.AdmissionRejected) as exc:
+        lb.AdmissionQueue(max_wait_seconds=0).admit("m", select)
+    assert exc.value.status == 503
+
+
+def test_wait_expires_and_leaves_the_queue(lb, slots):
+    _, select = slots
+    queue = lb.AdmissionQueue(max_wait_seconds=0.05)
+    queue.admit("m", select)
+    ticket = queue.admit("m", select)
+    with pytest.raises(lb.AdmissionRejected) as exc:
+        queue.wait(ticket)
+    assert exc.value.status == 503
+    assert queue.stats() == {}
+
+
+def test_cancel_leaves_the_queue_or_releases_the_reserved_slot(lb, slots):
+    backend, select = slots
+    queue = lb.AdmissionQueue(max_wait_seconds=5)
+    queue.admit("m", select)
+    queued = queue.admit("m", select)
+    queue.cancel(queued)
+    assert queue.stats() == {}
+
+    admitted = queue.admit("m", select)
+    lb.INFLIGHT_TRACKER.dec(backend, "m")
+    queue.dispatch()
+    assert admitted.result == (backend, "m")
+    assert lb.INFLIGHT_TRACKER.get(backend, "m") == 1
+    # The client left after its slot was reserved, before it was used
+    queue.cancel(admitted)
+    assert lb.INFLIGHT_TRACKER.get(backend, "m") == 0
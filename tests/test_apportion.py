@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "value, weights, expected",
+    [
+        (10, [1, 1, 1], [4, 3, 3]),
+        (3, [100, 1, 1], [1, 1, 1]),
+        (5, [1000, 1, 1, 1], [2, 1, 1, 1]),
+        (10, [0, 3, 1], [0, 8, 2]),
+        (7, [0, 0], [4, 3]),
+        (0, [1, 2], [0, 0]),
+    ],
+)
+def test_largest_remainder(lb, value, weights, expected):
+    assert lb._apportion(value, weights) == expected
+
+
+def test_totals_preserved_and_every_weighted_part_counted(lb):
+    rng = random.Random(0)
+    for _ in range(2000):
+        weights = [rng.choice([0, 1, rng.randint(1, 1000)]) for _ in range(rng.randint(1, 8))]
+        value = rng.randint(0, 3000)
+        shares = lb._apportion(value, weights)
+        assert sum(shares) == value and min(shares) >= 0
+        if value >= sum(1 for w in weights if w):
+            assert all(s >= 1 for s, w in zip(shares, weights) if w)
+
+
+def test_split_usage_keeps_non_integer_fields(lb):
+    parts = lb._split_usage({"prompt_tokens": 3, "total_tokens": 3, "model": "emb"}, [100, 1, 1])
+    assert parts == [{"prompt_tokens": 1, "total_tokens": 1, "model": "emb"}] * 3
+    assert lb._split_usage(None, [1, 2]) == [None, None]
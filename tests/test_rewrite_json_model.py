@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+
+def _rewritten(lb, raw, model="qwen-2", current="qwen"):
+    out = lb._rewrite_json_model(raw, model, current)
+    assert out is not None
+    return out
+
+
+def test_fast_path_splices_only_the_value(lb):
+    raw = b'{"model": "qwen" , "messages":[{"role":"user","content":"caf\\u00e9"}]}'
+    assert _rewritten(lb, raw) == raw.replace(b'"qwen"', b'"qwen-2"')
+
+
+def test_nested_model_after_top_level_key_is_kept(lb):
+    raw = b'{"model":"qwen","messages":[{"role":"user","content":"x","model":"other"}]}'
+    body = json.loads(_rewritten(lb, raw))
+    assert body["model"] == "qwen-2"
+    assert body["messages"][0]["model"] == "other"
+
+
+def test_nested_model_before_top_level_key_is_kept(lb):
+    raw = b'{"tools":[{"model":"other"}],"model":"qwen"}'
+    assert json.loads(_rewritten(lb, raw)) == {"tools": [{"model": "other"}], "model": "qwen-2"}
+
+
+def test_escaped_quotes_inside_strings_are_not_keys(lb):
+    raw = b'{"messages":[{"content":"say \\"model\\":\\"qwen\\""}],"model":"qwen"}'
+    body = json.loads(_rewritten(lb, raw))
+    assert body["model"] == "qwen-2"
+    assert body["messages"][0]["content"] == 'say "model":"qwen"'
+
+
+def test_non_ascii_model_name(lb):
+    assert json.loads(_rewritten(lb, b'{"model":"qwen"}', model="modèle")) == {"model": "modèle"}
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        # Duplicate top-level keys: the parser keeps the last one
+        b'{"model":"qwen","model":"qwen"}',
+        # \u006x-escaped key, alone or next to a literal nested "model"
+        b'{"\\u006dodel":"qwen"}',
+        b'{"\\u006Dodel":"qwen","m":{"model":"qwen"}}',
+        b'{"model":"qwen","m":{"\\u006dodel":"x"}}',
+        # Missing key, non-string value, value differing from what the parser saw
+        b'{"messages":[]}',
+        b'{"model":null}',
+        b'{"model":"other"}',
+    ],
+)
+def test_ambiguous_bodies_fall_back_to_reserializing(lb, raw):
+    assert lb._rewrite_json_model(raw, "qwen-2", "qwen") is None
@@ -0,0 +1,32 @@
+def test_complete_event_passes_through_unchanged(lb):
+    chunk = b"data: {}\n\n"
+    assert lb.SSEEventFramer().feed(chunk) is chunk
+
+
+def test_event_split_across_reads(lb):
+    framer = lb.SSEEventFramer()
+    assert framer.feed(b"data: a") == b""
+    assert framer.feed(b"bc\n") == b""
+    assert framer.feed(b"\ndata: d") == b"data: abc\n\n"
+    assert framer.flush() == b"data: d"
+
+
+def test_separator_split_across_reads(lb):
+    framer = lb.SSEEventFramer()
+    assert framer.feed(b"data: a\r\n\r") == b""
+    assert framer.feed(b"\ndata: b\r\r") == b"data: a\r\n\r\ndata: b\r\r"
+    assert framer.flush() == b""
+
+
+def test_several_events_release_up_to_the_last_separator(lb):
+    framer = lb.SSEEventFramer()
+    assert framer.feed(b"data: 1\n\ndata: 2\n\ndata: 3") == b"data: 1\n\ndata: 2\n\n"
+    assert framer.feed(b"\n\n") == b"data: 3\n\n"
+
+
+def test_oversized_event_is_released_without_separator(lb, monkeypatch):
+    monkeypatch.setattr(lb, "SSE_MAX_PENDING_BYTES", 16)
+    framer = lb.SSEEventFramer()
+    assert framer.feed(b"data: 0123") == b""
+    assert framer.feed(b"456789abcdef") == b"data: 0123456789abcdef"
+    assert framer.flush() == b""
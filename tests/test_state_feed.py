@@ -0,0 +1,44 @@
+def test_changes_since_returns_latest_value_per_key(lb):
+    feed = lb.StateFeed(history=16)
+    feed.publish("inflight", "b1", {"m": 1})
+    since = feed.version
+    feed.publish("inflight", "b1", {"m": 2})
+    feed.publish("sticky", "ip|m", {"backend": "b1"})
+    feed.publish("sticky", "ip|m", None)
+    version, changes = feed.changes_since(since)
+    assert version == since + 3
+    assert sorted(changes, key=lambda c: c["s"]) == [
+        {"s": "inflight", "k": "b1", "d": {"m": 2}},
+        {"s": "sticky", "k": "ip|m", "d": None},
+    ]
+    assert feed.changes_since(version) == (version, [])
+
+
+def test_unchanged_values_do_not_bump_the_version(lb):
+    feed = lb.StateFeed()
+    feed.publish("backends", "b1", {"status": "idle"})
+    version = feed.version
+    feed.publish("backends", "b1", {"status": "idle"})
+    feed.publish("backends", "missing", None)
+    assert feed.version == version
+
+
+def test_snapshot_needed_outside_the_history(lb):
+    feed = lb.StateFeed(history=2)
+    for i in range(5):
+        feed.publish("inflight", "b1", {"m": i})
+    version = feed.version
+    assert feed.changes_since(0) == (version, None)
+    assert feed.changes_since(1) == (version, None)
+    assert feed.changes_since(version + 1) == (version, None)
+    assert feed.changes_since(version - 2)[1] == [{"s": "inflight", "k": "b1", "d": {"m": 4}}]
+    assert feed.snapshot() == (version, {"local": {}, "backends": {}, "inflight": {"b1": {"m": 4}}, "sticky": {}})
+
+
+def test_listeners_are_woken_on_change_only(lb):
+    feed = lb.StateFeed()
+    woken = []
+    feed.subscribe(lambda: woken.append(1))
+    feed.publish("local", "gpu", {"util": 1})
+    feed.publish("local", "gpu", {"util": 1})
+    assert woken == [1]